@@ -2,6 +2,7 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from base.models import User
 from adminapp.models import AdminAuditLog, SystemConfig, CourseApproval
+from adminapp.config import bump_generation
 
 # Register your models here
 @admin.register(User)
@@ -40,6 +41,18 @@ class SystemConfigAdmin(admin.ModelAdmin):
     list_display = ('key', 'value', 'updated_at', 'updated_by')
     search_fields = ('key', 'description')
     readonly_fields = ('updated_at',)
+    
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        bump_generation()
+    
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        bump_generation()
+    
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        bump_generation()
 
 @admin.register(CourseApproval)
 class CourseApprovalAdmin(admin.ModelAdmin):
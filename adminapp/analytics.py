@@ -0,0 +1,225 @@
+from datetime import date, datetime, time, timedelta
+
+from django.core.cache import cache
+from django.db.models import Avg, Case, Count, DateField, F, FloatField, Q, Value, When
+from django.db.models.functions import Coalesce, Trunc
+from django.utils import timezone
+
+from base.cache import get_version
+from base.models import Course, UserCourseProgress
+from adminapp.models import CourseStatsSnapshot
+
+SNAPSHOT_FIELDS = [
+    'enrolled_count', 'completed_count', 'completion_rate',
+    'active_learners_7d', 'active_learners_30d', 'avg_progress',
+    'refreshed_at', 'updated_at',
+]
+REFRESH_BATCH_SIZE = 500
+CLOSED_BUCKET_TIMEOUT = 24 * 60 * 60  # Bounds what a write nothing invalidates can leave wrong
+
+
+def refresh_course_stats(course_ids=None):
+    """
+    Recompute snapshot rows from user_course_progress with one GROUP BY per
+    batch of courses. Pass course_ids to refresh a subset; None rebuilds all.
+    Returns the number of snapshot rows written.
+    """
+    if course_ids is None:
+        course_ids = Course.objects.values_list('id', flat=True).order_by()
+    course_ids = list(course_ids)
+
+    written = 0
+    for start in range(0, len(course_ids), REFRESH_BATCH_SIZE):
+        batch = course_ids[start:start + REFRESH_BATCH_SIZE]
+        snapshots = _compute_snapshots(batch)
+        CourseStatsSnapshot.objects.bulk_create(
+            snapshots,
+            update_conflicts=True,
+            unique_fields=['course'],
+            update_fields=SNAPSHOT_FIELDS,
+        )
+        written += len(snapshots)
+    return written
+
+
+def _compute_snapshots(course_ids):
+    now = timezone.now()
+    rows = UserCourseProgress.objects.filter(course_id__in=course_ids).order_by().values(
+        'course_id'
+    ).annotate(
+        enrolled=Count('id'),
+        completed=Count('id', filter=Q(is_completed=True)),
+        active_7d=Count('id', filter=Q(last_accessed_at__gte=now - timedelta(days=7))),
+        active_30d=Count('id', filter=Q(last_accessed_at__gte=now - timedelta(days=30))),
+        avg_progress=Avg('progress_percentage'),
+    )
+    by_course = {row['course_id']: row for row in rows}
+
+    snapshots = []
+    for course_id in course_ids:
+        row = by_course.get(course_id)
+        enrolled = row['enrolled'] if row else 0
+        completed = row['completed'] if row else 0
+        snapshots.append(CourseStatsSnapshot(
+            course_id=course_id,
+            enrolled_count=enrolled,
+            completed_count=completed,
+            completion_rate=(completed / enrolled * 100) if enrolled else 0.0,
+            active_learners_7d=row['active_7d'] if row else 0,
+            active_learners_30d=row['active_30d'] if row else 0,
+            avg_progress=round(row['avg_progress'] or 0.0, 1) if row else 0.0,
+            refreshed_at=now,
+            updated_at=now,
+        ))
+    return snapshots
+
+
+def adjust_course_stats(course_id, enrolled=0, completed=0, refresh_missing=True):
+    """
+    Apply enrollment/completion deltas to a course snapshot in a single UPDATE.
+    Falls back to a full refresh of that course when no snapshot exists yet,
+    unless refresh_missing=False (deletes: the course itself may be going away).
+    """
+    new_enrolled = F('enrolled_count') + enrolled
+    new_completed = F('completed_count') + completed
+    updated = CourseStatsSnapshot.objects.filter(course_id=course_id).update(
+        enrolled_count=new_enrolled,
+        completed_count=new_completed,
+        completion_rate=Case(
+            When(
+                Q(enrolled_count__gt=-enrolled),
+                then=new_completed * 100.0 / new_enrolled,
+            ),
+            default=Value(0.0),
+            output_field=FloatField(),
+        ),
+        updated_at=timezone.now(),
+    )
+    if not updated and refresh_missing:
+        refresh_course_stats([course_id])
+
+
+def with_snapshot_stats(queryset):
+    """
+    Annotate a Course queryset with enrolled_count/completed_count read from
+    the snapshot table, the names the admin course serializers consume.
+    """
+    return queryset.annotate(
+        enrolled_count=Coalesce(F('stats_snapshot__enrolled_count'), 0),
+        completed_count=Coalesce(F('stats_snapshot__completed_count'), 0),
+    )
+
+
+# ==================== Time-series engine ====================
+GRANULARITIES = ('day', 'week', 'month')
+MAX_BUCKETS = 366
+
+
+def bucket_start(day, granularity):
+    """First day of the bucket containing `day`"""
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def next_bucket(bucket, granularity):
+    if granularity == 'week':
+        return bucket + timedelta(days=7)
+    if granularity == 'month':
+        return (bucket.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return bucket + timedelta(days=1)
+
+
+def bucket_range(start, end, granularity):
+    """Bucket start dates covering [start, end]"""
+    if granularity not in GRANULARITIES:
+        raise ValueError(f'Unsupported granularity: {granularity}')
+    if start > end:
+        raise ValueError('start must not be after end')
+    buckets = []
+    bucket = bucket_start(start, granularity)
+    while bucket <= end:
+        buckets.append(bucket)
+        if len(buckets) > MAX_BUCKETS:
+            raise ValueError(f'Range spans more than {MAX_BUCKETS} buckets')
+        bucket = next_bucket(bucket, granularity)
+    return buckets
+
+
+def day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def count_by_bucket(queryset, date_field, start, end, granularity='day', distinct_field=None):
+    """
+    One TruncDate/TruncWeek/TruncMonth + GROUP BY query over [start, end).
+    With distinct_field, counts distinct values of that column per bucket.
+    """
+    counted = Count(distinct_field, distinct=True) if distinct_field else Count('pk')
+    rows = queryset.filter(**{
+        f'{date_field}__gte': day_start(start),
+        f'{date_field}__lt': day_start(end),
+    }).annotate(
+        bucket=Trunc(date_field, granularity, output_field=DateField())
+    ).order_by().values('bucket').annotate(count=counted)
+    return {row['bucket']: row['count'] for row in rows}
+
+
+def time_series(metric, queryset, date_field, start, end, granularity='day',
+                closed_bucket_timeout=CLOSED_BUCKET_TIMEOUT):
+    """
+    Count `queryset` rows per bucket of `date_field` between start and end
+    (inclusive dates). Buckets that ended before today are cached under the
+    metric name (a day by default, and in the base.cache 'analytics'
+    namespace, which bulk user writes invalidate) so only the open bucket and
+    cache misses hit the database, and those in a single GROUP BY query.
+    Returns [{'date': iso_date, 'count': n}, ...].
+    """
+    today = timezone.now().date()
+    buckets = bucket_range(start, end, granularity)
+    version = get_version('analytics')
+    keys = {bucket: f'analytics:v{version}:{metric}:{granularity}:{bucket.isoformat()}' for bucket in buckets}
+    closed = [b for b in buckets if next_bucket(b, granularity) <= today]
+
+    cached = cache.get_many([keys[b] for b in closed])
+    counts = {b: cached[keys[b]] for b in closed if keys[b] in cached}
+    missing = [b for b in buckets if b not in counts and b <= today]
+
+    if missing:
+        fetched = count_by_bucket(
+            queryset, date_field, missing[0], next_bucket(missing[-1], granularity), granularity
+        )
+        for bucket in missing:
+            counts[bucket] = fetched.get(bucket, 0)
+        cache.set_many(
+            {keys[b]: counts[b] for b in missing if b in closed},
+            timeout=closed_bucket_timeout
+        )
+
+    return [
+        {'date': bucket.isoformat(), 'count': counts.get(bucket, 0)}
+        for bucket in buckets
+    ]
+
+
+def cumulative_series(metric, queryset, date_field, start, end, granularity='day'):
+    """
+    Running total of `queryset` rows up to the end of each bucket: the count
+    before the first bucket (cached, it is closed history) plus the bucketed
+    counts summed in Python.
+    """
+    series = time_series(metric, queryset, date_field, start, end, granularity)
+    first_bucket = date.fromisoformat(series[0]['date'])
+    baseline_key = f'analytics:v{get_version("analytics")}:{metric}:before:{first_bucket.isoformat()}'
+    total = cache.get(baseline_key)
+    if total is None:
+        total = queryset.filter(**{f'{date_field}__lt': day_start(first_bucket)}).count()
+        if first_bucket <= timezone.now().date():
+            cache.set(baseline_key, total, timeout=CLOSED_BUCKET_TIMEOUT)
+
+    for point in series:
+        total += point['count']
+        point['count'] = total
+    return series
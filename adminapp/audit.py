@@ -0,0 +1,462 @@
+# adminapp/audit.py
+"""
+Asynchronous audit-log pipeline.
+
+AdminAuditLogger.log_action builds an unsaved AdminAuditLog and hands it to
+the pipeline, which queues it in memory and writes batches with bulk_create
+from a background thread, either once BATCH_SIZE records are waiting or after
+FLUSH_INTERVAL seconds. Batches that cannot be written (database down or
+locked) are appended to a JSONL spool file and replayed after the next
+successful flush, so an outage costs latency, not audit records.
+
+Every worker process shares the spool file. Appends and the replay's claim
+hold an flock on '<spool>.lock'. Replay renames the spool to a per-process
+file before reading it, so lines appended meanwhile go to a new spool and
+are never deleted unread. Lines that cannot be parsed, or rows the database
+rejects (bad data rather than an outage), are moved to '<spool>.rejected'
+so the rest of the spool keeps draining.
+
+Settings:
+    AUDIT_LOG_SYNC            write inline instead of queueing (tests)
+    AUDIT_LOG_BATCH_SIZE      records per bulk_create (default 200)
+    AUDIT_LOG_FLUSH_INTERVAL  seconds before a partial batch is flushed (default 1.0)
+    AUDIT_LOG_QUEUE_SIZE      in-memory queue bound (default 10000)
+    AUDIT_LOG_SPOOL_PATH      spool file (default BASE_DIR / 'audit_spool.jsonl')
+    AUDIT_LOG_RETENTION_DAYS  age at which archive_audit_logs moves rows out (default 365)
+    AUDIT_LOG_ARCHIVE_DIR     monthly gzip JSONL archives (default BASE_DIR / 'audit_archive')
+"""
+import atexit
+import glob
+import gzip
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking; run one worker there
+    fcntl = None
+
+from django.conf import settings
+from django.db import DataError, IntegrityError, close_old_connections
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from adminapp.models import AdminAuditLog
+
+logger = logging.getLogger(__name__)
+
+SPOOL_FIELDS = [
+    'id', 'admin_user_id', 'action', 'model_name', 'object_id',
+    'details', 'ip_address', 'user_agent', 'created_at',
+]
+
+
+def to_spool_line(entry):
+    row = {field: getattr(entry, field) for field in SPOOL_FIELDS}
+    row['id'] = str(row['id'])
+    row['created_at'] = row['created_at'].isoformat()
+    return json.dumps(row, default=str)
+
+
+def from_spool_line(line):
+    row = json.loads(line)
+    row['id'] = uuid.UUID(row['id'])
+    row['created_at'] = parse_datetime(row['created_at'])
+    return AdminAuditLog(**row)
+
+
+# Errors that mean this row is bad, as opposed to the database being unavailable
+BAD_ROW_ERRORS = (DataError, IntegrityError, ValueError, TypeError, KeyError)
+
+
+@contextmanager
+def file_lock(path):
+    """Exclusive advisory lock shared by every process using `path`"""
+    with open(path, 'a') as handle:
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+
+def process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class AuditPipeline:
+    def __init__(self, batch_size=200, flush_interval=1.0, max_queue=10000, spool_path=None):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.spool_path = spool_path or os.path.join(settings.BASE_DIR, 'audit_spool.jsonl')
+        self.lock_path = f'{self.spool_path}.lock'
+        self.rejected_path = f'{self.spool_path}.rejected'
+        self.queue = queue.Queue(max_queue)
+        self._spool_lock = threading.Lock()
+        self._metrics_lock = threading.Lock()
+        self._thread = None
+        self._stopping = threading.Event()
+        self.counters = {
+            'enqueued': 0,
+            'written': 0,
+            'flushes': 0,
+            'failed_flushes': 0,
+            'spooled': 0,
+            'replayed': 0,
+            'rejected': 0,
+            'dropped': 0,
+            'last_flush_ms': 0.0,
+            'max_flush_ms': 0.0,
+            'total_flush_ms': 0.0,
+        }
+
+    # ----- producer side (request thread) -----
+    def submit(self, entry):
+        """Queue one unsaved AdminAuditLog; never blocks the caller"""
+        self._ensure_started()
+        try:
+            self.queue.put_nowait(entry)
+            self._count('enqueued')
+        except queue.Full:
+            # Writer is far behind; keep the record on disk rather than wait
+            self._spool([entry])
+
+    def _ensure_started(self):
+        if self._thread is None or not self._thread.is_alive():
+            with self._metrics_lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._stopping.clear()
+                    self._thread = threading.Thread(
+                        target=self._run, name='audit-log-writer', daemon=True
+                    )
+                    self._thread.start()
+
+    # ----- consumer side (writer thread) -----
+    def _run(self):
+        while not self._stopping.is_set() or not self.queue.empty():
+            batch = self._next_batch()
+            if batch:
+                self.flush(batch)
+            close_old_connections()
+
+    def _next_batch(self):
+        """Block for the first record, then collect until the batch is full or the interval ends"""
+        try:
+            batch = [self.queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def flush(self, batch):
+        """Write a batch; spool it if the database refuses. Returns True on success."""
+        started = time.perf_counter()
+        try:
+            AdminAuditLog.objects.bulk_create(batch, batch_size=self.batch_size)
+        except Exception:
+            logger.exception('Audit log flush failed, spooling batch', extra={'records': len(batch)})
+            self._count('failed_flushes')
+            self._spool(batch)
+            return False
+        finally:
+            self._record_latency((time.perf_counter() - started) * 1000)
+
+        self._count('written', len(batch))
+        self.replay_spool()
+        return True
+
+    # ----- spool file -----
+    def _spool(self, entries):
+        try:
+            self._append(self.spool_path, ''.join(to_spool_line(entry) + '\n' for entry in entries))
+            self._count('spooled', len(entries))
+        except Exception:
+            logger.exception('Audit spool write failed, dropping records', extra={'records': len(entries)})
+            self._count('dropped', len(entries))
+
+    def _append(self, path, text):
+        with self._spool_lock, file_lock(self.lock_path), open(path, 'a', encoding='utf-8') as spool:
+            spool.write(text)
+            spool.flush()
+            os.fsync(spool.fileno())
+
+    def _claim(self):
+        """
+        Rename the spool (and claims left by dead processes) to this process's
+        claim file and return its path, or None when there is nothing to replay
+        """
+        claim_path = f'{self.spool_path}.{os.getpid()}.replay'
+        with self._spool_lock, file_lock(self.lock_path):
+            sources = [self.spool_path] if os.path.exists(self.spool_path) else []
+            for path in glob.glob(f'{glob.escape(self.spool_path)}.*.replay'):
+                pid = path[len(self.spool_path) + 1:-len('.replay')]
+                if pid.isdigit() and int(pid) != os.getpid() and not process_alive(int(pid)):
+                    sources.append(path)
+            if not sources and not os.path.exists(claim_path):
+                return None
+            with open(claim_path, 'a', encoding='utf-8') as claim:
+                for path in sources:
+                    with open(path, encoding='utf-8') as source:
+                        claim.write(source.read())
+                    os.remove(path)
+        return claim_path
+
+    def replay_spool(self):
+        """Move spooled records into the database. Returns how many were written."""
+        if not os.path.exists(self.spool_path) and not glob.glob(f'{glob.escape(self.spool_path)}.*.replay'):
+            return 0
+        claim_path = self._claim()
+        if claim_path is None:
+            return 0
+        entries, rejected = [], []
+        with open(claim_path, encoding='utf-8') as claim:
+            for line in claim:
+                if not line.strip():
+                    continue
+                try:
+                    entries.append(from_spool_line(line))
+                except BAD_ROW_ERRORS:
+                    rejected.append(line)
+
+        written = 0
+        if entries:
+            try:
+                # ignore_conflicts: a replay cut short after the insert may run again
+                AdminAuditLog.objects.bulk_create(entries, batch_size=self.batch_size, ignore_conflicts=True)
+                written = len(entries)
+            except Exception:
+                written, failed = self._insert_one_by_one(entries, rejected)
+                if failed:
+                    # The database itself is unavailable: keep the rest for the next replay
+                    logger.warning('Audit spool replay failed, will retry', exc_info=True)
+                    self._append(claim_path + '.retry', ''.join(to_spool_line(entry) + '\n' for entry in failed))
+        if rejected:
+            logger.error('Moved unreadable audit spool lines aside', extra={'records': len(rejected),
+                                                                              'path': self.rejected_path})
+            self._append(self.rejected_path, ''.join(line if line.endswith('\n') else line + '\n'
+                                                      for line in rejected))
+            self._count('rejected', len(rejected))
+        retry_path = claim_path + '.retry'
+        if os.path.exists(retry_path):
+            os.replace(retry_path, claim_path)  # Stays claimed by this process until it replays again
+        else:
+            os.remove(claim_path)
+        self._count('replayed', written)
+        return written
+
+    def _insert_one_by_one(self, entries, rejected):
+        """After a failed batch: insert rows singly, rejecting bad ones. Returns (written, unwritten)."""
+        written = 0
+        for index, entry in enumerate(entries):
+            try:
+                AdminAuditLog.objects.bulk_create([entry], ignore_conflicts=True)
+                written += 1
+            except BAD_ROW_ERRORS:
+                rejected.append(to_spool_line(entry) + '\n')
+            except Exception:
+                return written, entries[index:]
+        return written, []
+
+    # ----- lifecycle & metrics -----
+    def drain(self, timeout=5.0):
+        """Stop the writer after everything queued has been flushed"""
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._thread.join(timeout)
+
+    def _count(self, name, amount=1):
+        with self._metrics_lock:
+            self.counters[name] += amount
+
+    def _record_latency(self, elapsed_ms):
+        with self._metrics_lock:
+            self.counters['flushes'] += 1
+            self.counters['last_flush_ms'] = round(elapsed_ms, 2)
+            self.counters['max_flush_ms'] = round(max(self.counters['max_flush_ms'], elapsed_ms), 2)
+            self.counters['total_flush_ms'] += elapsed_ms
+
+    def metrics(self):
+        with self._metrics_lock:
+            counters = dict(self.counters)
+        flushes = counters.pop('flushes')
+        total = counters.pop('total_flush_ms')
+        return {
+            **counters,
+            'flushes': flushes,
+            'avg_flush_ms': round(total / flushes, 2) if flushes else 0.0,
+            'queue_depth': self.queue.qsize(),
+            'writer_alive': bool(self._thread and self._thread.is_alive()),
+        }
+
+
+_pipeline = None
+_pipeline_lock = threading.Lock()
+
+
+def get_pipeline():
+    global _pipeline
+    if _pipeline is None:
+        with _pipeline_lock:
+            if _pipeline is None:
+                _pipeline = AuditPipeline(
+                    batch_size=getattr(settings, 'AUDIT_LOG_BATCH_SIZE', 200),
+                    flush_interval=getattr(settings, 'AUDIT_LOG_FLUSH_INTERVAL', 1.0),
+                    max_queue=getattr(settings, 'AUDIT_LOG_QUEUE_SIZE', 10000),
+                    spool_path=getattr(settings, 'AUDIT_LOG_SPOOL_PATH', None),
+                )
+                atexit.register(_pipeline.drain)
+    return _pipeline
+
+
+def record(entry):
+    """Persist an unsaved AdminAuditLog: inline in sync mode, otherwise via the pipeline"""
+    if getattr(settings, 'AUDIT_LOG_SYNC', False):
+        entry.save(force_insert=True)
+    else:
+        get_pipeline().submit(entry)
+    return entry
+
+
+# ==================== Filtering, export & retention ====================
+# (column, lookup): the one audit-log row shape, shared by archives and exports.DATASETS
+EXPORT_COLUMNS = [
+    ('id', 'id'), ('admin_user_id', 'admin_user_id'), ('admin_user_email', 'admin_user__email'),
+    ('action', 'action'), ('model_name', 'model_name'), ('object_id', 'object_id'),
+    ('details', 'details'), ('ip_address', 'ip_address'), ('user_agent', 'user_agent'),
+    ('created_at', 'created_at'),
+]
+ARCHIVE_BATCH_SIZE = 1000
+
+
+def filter_audit_logs(queryset, params):
+    """
+    Apply the AuditLogView query filters. Dates become half-open created_at
+    ranges so the composite indexes can be used (created_at__date cannot).
+    Raises ValueError, with a message for the client, on malformed dates or ids.
+    """
+    from adminapp.analytics import day_start
+
+    if params.get('admin_user_id'):
+        try:
+            admin_user_id = uuid.UUID(params['admin_user_id'])
+        except ValueError:
+            raise ValueError('admin_user_id must be a UUID')
+        queryset = queryset.filter(admin_user_id=admin_user_id)
+    if params.get('action'):
+        queryset = queryset.filter(action=params['action'])
+    if params.get('model_name'):
+        queryset = queryset.filter(model_name=params['model_name'])
+    try:
+        start = date.fromisoformat(params['start_date']) if params.get('start_date') else None
+        end = date.fromisoformat(params['end_date']) if params.get('end_date') else None
+    except ValueError:
+        raise ValueError('Dates must be formatted as YYYY-MM-DD')
+    if start:
+        queryset = queryset.filter(created_at__gte=day_start(start))
+    if end:
+        queryset = queryset.filter(created_at__lt=day_start(end + timedelta(days=1)))
+    return queryset
+
+
+def export_rows(queryset, chunk_size=2000):
+    """Stream audit rows of an ordered queryset as plain dicts, a chunk at a time"""
+    columns = [column for column, _ in EXPORT_COLUMNS]
+    rows = queryset.values_list(*(lookup for _, lookup in EXPORT_COLUMNS))
+    for values in rows.iterator(chunk_size=chunk_size):
+        row = dict(zip(columns, values))
+        row['id'] = str(row['id'])
+        row['admin_user_id'] = str(row['admin_user_id'])
+        row['created_at'] = row['created_at'].isoformat()
+        yield row
+
+
+def archive_dir():
+    return getattr(settings, 'AUDIT_LOG_ARCHIVE_DIR', None) or os.path.join(
+        settings.BASE_DIR, 'audit_archive'
+    )
+
+
+def archive_path(month, directory=None):
+    return os.path.join(directory or archive_dir(), f'audit-{month}.jsonl.gz')
+
+
+def archive_audit_logs(older_than_days, directory=None, batch_size=ARCHIVE_BATCH_SIZE):
+    """
+    Move rows older than `older_than_days` into gzip JSONL files, one per
+    month. Each batch is appended (as a new gzip member) and fsynced before
+    its rows are deleted, so an interrupted run can only duplicate rows in
+    the archive, never lose them. Returns the number of rows archived.
+    """
+    directory = directory or archive_dir()
+    os.makedirs(directory, exist_ok=True)
+    cutoff = timezone.now() - timedelta(days=older_than_days)
+    expired = AdminAuditLog.objects.filter(created_at__lt=cutoff)
+
+    archived = 0
+    while True:
+        batch = list(export_rows(expired.order_by('created_at', 'id')[:batch_size]))
+        if not batch:
+            return archived
+        by_month = {}
+        for row in batch:
+            by_month.setdefault(row['created_at'][:7], []).append(row)
+        for month, rows in by_month.items():
+            with open(archive_path(month, directory), 'ab') as raw:
+                with gzip.GzipFile(fileobj=raw, mode='ab') as archive:
+                    archive.write(''.join(json.dumps(row, default=str) + '\n' for row in rows).encode())
+                raw.flush()
+                os.fsync(raw.fileno())
+        AdminAuditLog.objects.filter(id__in=[row['id'] for row in batch]).delete()
+        archived += len(batch)
+
+
+def iter_archived_audit_logs(start=None, end=None, directory=None):
+    """
+    Stream archived rows (dicts) from the monthly files, oldest month first,
+    one line at a time. start/end are optional dates bounding created_at.
+    """
+    directory = directory or archive_dir()
+    if not os.path.isdir(directory):
+        return
+    months = sorted(
+        name[len('audit-'):-len('.jsonl.gz')] for name in os.listdir(directory)
+        if name.startswith('audit-') and name.endswith('.jsonl.gz')
+    )
+    for month in months:
+        if start and month < start.isoformat()[:7]:
+            continue
+        if end and month > end.isoformat()[:7]:
+            break
+        with gzip.open(archive_path(month, directory), 'rt', encoding='utf-8') as archive:
+            for line in archive:
+                row = json.loads(line)
+                day = row['created_at'][:10]
+                if start and day < start.isoformat():
+                    continue
+                if end and day > end.isoformat():
+                    continue
+                yield row
@@ -0,0 +1,89 @@
+# adminapp/bulk.py
+"""
+Chunked bulk operations behind the admin bulk_* actions.
+
+A single UPDATE/DELETE ... WHERE id IN (<every id>) breaks SQLite's
+bound-parameter limit for large selections and holds one long write lock.
+BulkOperation de-duplicates and validates the ids, then applies the change
+a chunk at a time, each chunk in its own short transaction, and adds up the
+rows actually affected. Selections above BULK_ASYNC_THRESHOLD ids (or any
+request with "async": true) run as an AdminJob instead and report progress
+per chunk.
+"""
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from base.cache import invalidate_model
+
+CHUNK_SIZE = 500
+
+
+def clean_ids(model, ids):
+    """(unique valid primary keys in request order, invalid raw values)"""
+    valid, invalid = {}, []
+    for value in ids:
+        try:
+            valid[model._meta.pk.to_python(value)] = None
+        except ValidationError:
+            invalid.append(str(value))
+    return list(valid), invalid
+
+
+def update_rows(model, **values):
+    """Rows pending deletion are left alone, so bulk actions cannot bring them back"""
+    rows = model.objects.all()
+    if any(field.name == 'pending_delete' for field in model._meta.get_fields()):
+        rows = rows.filter(pending_delete=False)
+
+    def apply(chunk):
+        return rows.filter(pk__in=chunk).update(**values)
+    return apply
+
+
+def delete_rows(model):
+    """
+    Hard delete through adminapp.deletion (set-based, no in-memory cascade,
+    no delete signals). Counts only rows of `model`, not what cascaded.
+    """
+    def apply(chunk):
+        from adminapp.deletion import CascadeDeleter
+        return CascadeDeleter(model).delete(chunk).get(model._meta.label, 0)
+    return apply
+
+
+class BulkOperation:
+    def __init__(self, model, apply, chunk_size=CHUNK_SIZE):
+        """apply(chunk_of_pks) makes the change and returns how many rows it affected"""
+        self.model = model
+        self.apply = apply
+        self.chunk_size = chunk_size
+
+    def run(self, ids, progress=None):
+        pks, invalid = clean_ids(self.model, ids)
+        affected = 0
+        chunks = 0
+        for start in range(0, len(pks), self.chunk_size):
+            with transaction.atomic():
+                affected += self.apply(pks[start:start + self.chunk_size])
+            chunks += 1
+            if progress is not None:
+                progress.update(min(start + self.chunk_size, len(pks)))
+        if affected:
+            # Queryset updates and raw deletes send no model signals
+            invalidate_model(self.model)
+        return {
+            'requested': len(ids),
+            'affected': affected,
+            'not_found': len(pks) - affected,
+            'invalid_ids': invalid,
+            'chunks': chunks,
+        }
+
+
+def deactivate_users(chunk):
+    """Deactivate users and end their sessions (filtering by the chunk, not a subquery)"""
+    from base.models import User, UserSession
+
+    updated = User.objects.filter(pk__in=chunk).update(is_active=False)
+    UserSession.objects.filter(user_id__in=chunk, is_active=True).update(is_active=False)
+    return updated
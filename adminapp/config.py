@@ -0,0 +1,156 @@
+# adminapp/config.py
+"""
+Process-wide, typed snapshot of SystemConfig.
+
+Every config is loaded once into an immutable mapping of parsed values
+(booleans, integers, JSON... per data_type), with DEFAULT_CONFIGS filling in
+keys that have no row yet. Reads are dictionary lookups, so feature toggles
+can be checked on hot paths without touching the database.
+
+Writers call bump_generation() after changing configs. It increments the
+single ConfigGeneration row and drops this process's snapshot at once.
+Other workers notice the new generation by polling that row, at most every
+CONFIG_POLL_INTERVAL seconds (one primary-key lookup), and reload.
+"""
+import json
+import logging
+import threading
+import time
+from types import MappingProxyType
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+TRUE_VALUES = ('true', '1', 'yes', 'on')
+
+
+def parse(value, data_type):
+    """A stored (text) config value as a Python value of its data_type"""
+    if data_type == 'boolean':
+        return str(value).strip().lower() in TRUE_VALUES
+    if data_type == 'integer':
+        return int(value)
+    if data_type == 'json':
+        return json.loads(value) if isinstance(value, str) else value
+    return '' if value is None else str(value)
+
+
+def normalize(value, data_type):
+    """The text to store for a submitted value; ValueError says why it is invalid"""
+    if data_type == 'boolean':
+        text = str(value).lower()
+        if text not in ('true', 'false', '1', '0'):
+            raise ValueError('Invalid boolean value')
+        return 'true' if text in ('true', '1') else 'false'
+    if data_type == 'integer':
+        try:
+            return str(int(value))
+        except (TypeError, ValueError):
+            raise ValueError('Must be an integer')
+    return str(value)
+
+
+class ConfigSnapshot:
+    """Immutable parsed configs of one generation"""
+    def __init__(self, values, generation):
+        self.values = MappingProxyType(values)
+        self.generation = generation
+
+    def __contains__(self, key):
+        return key in self.values
+
+    def get(self, key, default=None):
+        return self.values.get(key, default)
+
+
+def load_snapshot(generation):
+    from adminapp.default_configs import DEFAULT_CONFIGS
+    from adminapp.models import SystemConfig
+
+    rows = {
+        key: {'value': value, 'data_type': data_type}
+        for key, value, data_type in SystemConfig.objects.values_list('key', 'value', 'data_type')
+    }
+    values = {}
+    for key, config in {**DEFAULT_CONFIGS, **rows}.items():
+        try:
+            values[key] = parse(config['value'], config['data_type'])
+        except (TypeError, ValueError):
+            default = DEFAULT_CONFIGS.get(key)
+            logger.warning('Invalid config value, using the default', extra={'key': key})
+            values[key] = parse(default['value'], default['data_type']) if default else None
+    return ConfigSnapshot(values, generation)
+
+
+def current_generation():
+    from adminapp.models import ConfigGeneration
+
+    generation = ConfigGeneration.objects.filter(pk=1).values_list('generation', flat=True).first()
+    return generation or 0
+
+
+class ConfigRegistry:
+    def __init__(self):
+        self._snapshot = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def snapshot(self):
+        """The current snapshot; polls the generation counter once per CONFIG_POLL_INTERVAL"""
+        snapshot = self._snapshot
+        interval = getattr(settings, 'CONFIG_POLL_INTERVAL', 2.0)
+        if snapshot is not None and time.monotonic() - self._checked_at < interval:
+            return snapshot
+        with self._lock:
+            if self._snapshot is not None and time.monotonic() - self._checked_at < interval:
+                return self._snapshot
+            generation = current_generation()
+            if self._snapshot is None or self._snapshot.generation != generation:
+                self._snapshot = load_snapshot(generation)
+            self._checked_at = time.monotonic()
+            return self._snapshot
+
+    def invalidate(self):
+        """Reload on next access (this process's own writes, tests)"""
+        with self._lock:
+            self._snapshot = None
+
+    @property
+    def generation(self):
+        return self.snapshot().generation
+
+    def get(self, key, default=None):
+        return self.snapshot().get(key, default)
+
+    def get_bool(self, key, default=False):
+        value = self.get(key, default)
+        return value if isinstance(value, bool) else parse(value, 'boolean')
+
+    def get_int(self, key, default=0):
+        value = self.get(key, default)
+        try:
+            return value if isinstance(value, int) and not isinstance(value, bool) else int(value)
+        except (TypeError, ValueError):
+            return default
+
+    def get_str(self, key, default=''):
+        value = self.get(key, default)
+        return default if value is None else str(value)
+
+
+system_config = ConfigRegistry()
+
+
+def bump_generation():
+    """Mark every worker's config snapshot stale; call after writing SystemConfig rows"""
+    from adminapp.models import ConfigGeneration
+
+    updated = ConfigGeneration.objects.filter(pk=1).update(
+        generation=F('generation') + 1, updated_at=timezone.now()
+    )
+    if not updated:
+        ConfigGeneration.objects.get_or_create(pk=1, defaults={'generation': 1})
+    system_config.invalidate()
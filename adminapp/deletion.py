@@ -0,0 +1,220 @@
+# adminapp/deletion.py
+"""
+Cascade-aware hard deletes that never load the cascade into memory.
+
+Model.delete() and QuerySet.delete() collect every dependent object in
+Python before deleting anything; for a popular course that means hundreds of
+thousands of progress rows inside one request. Instead:
+
+1. schedule_deletion() flags the targets (pending_delete, is_active=False)
+   so they disappear from listings and logins at once, then starts an
+   AdminJob.
+2. The job walks the models' reverse relations (_meta.related_objects) into
+   a plan ordered bottom-up, then for each chunk of targets deletes
+   dependents in bounded batches with plain DELETE ... WHERE pk IN (...)
+   statements, honouring on_delete (CASCADE deletes, SET_NULL/SET_DEFAULT
+   updates, PROTECT/RESTRICT abort before anything is removed).
+3. Course stats snapshots touched by the deleted enrollments are rebuilt.
+
+Batches commit independently, so an interrupted job leaves a consistent
+tree still marked pending_delete; purge_pending_deletions resumes it.
+"""
+from django.db import models, router, transaction
+from django.db.models.deletion import ProtectedError
+
+from base.cache import invalidate_model
+
+CHUNK_SIZE = 500     # Targets per pass
+BATCH_SIZE = 1000    # Dependent rows per DELETE/UPDATE
+MAX_DEPTH = 8
+
+
+class Step:
+    """One set-based operation: rows of `model` reachable through `path` from the targets"""
+    def __init__(self, action, model, path, field=None, value=None):
+        self.action = action  # 'delete', 'update' or 'protect'
+        self.model = model
+        self.path = path
+        self.field = field
+        self.value = value
+
+    def queryset(self, target_pks):
+        return self.model._base_manager.filter(**{f'{self.path}__in': target_pks})
+
+    def __repr__(self):
+        return f'<Step {self.action} {self.model._meta.label} via {self.path}>'
+
+
+def build_plan(model, path='', depth=0, ancestors=()):
+    """Steps for everything that must change before rows of `model` can go, deepest first"""
+    if depth > MAX_DEPTH:
+        raise ValueError(f'Relation chain too deep under {model._meta.label}')
+    steps = []
+    for rel in model._meta.related_objects:
+        if rel.many_to_many:
+            # Auto-created join tables; explicit `through` models show up as their own FKs
+            through = rel.through
+            if through._meta.auto_created:
+                steps.append(Step('delete', through, _join(rel.field.m2m_reverse_field_name(), path)))
+            continue
+        child, child_path = rel.related_model, _join(rel.field.name, path)
+        on_delete = rel.on_delete
+        if on_delete is models.CASCADE:
+            if child not in ancestors:
+                steps += build_plan(child, child_path, depth + 1, ancestors + (model,))
+            steps.append(Step('delete', child, child_path))
+        elif on_delete is models.SET_NULL:
+            steps.append(Step('update', child, child_path, rel.field.name, None))
+        elif on_delete is models.SET_DEFAULT:
+            steps.append(Step('update', child, child_path, rel.field.name, rel.field.get_default()))
+        elif on_delete in (models.PROTECT, models.RESTRICT):
+            steps.append(Step('protect', child, child_path))
+        # DO_NOTHING and custom SET(...) are left to the database
+
+    for field in model._meta.many_to_many:
+        through = field.remote_field.through
+        if through._meta.auto_created:
+            steps.append(Step('delete', through, _join(field.m2m_field_name(), path)))
+    return steps
+
+
+def _join(field_name, path):
+    return f'{field_name}__{path}' if path else field_name
+
+
+class CascadeDeleter:
+    def __init__(self, model, batch_size=BATCH_SIZE, chunk_size=CHUNK_SIZE):
+        self.model = model
+        self.batch_size = batch_size
+        self.chunk_size = chunk_size
+        self.plan = build_plan(model)
+        self.using = router.db_for_write(model)
+
+    def count(self, pks):
+        """Rows the deletion will touch, targets included (one COUNT per step and chunk)"""
+        total = 0
+        for chunk in self._chunks(pks):
+            total += len(chunk)
+            for step in self.plan:
+                if step.action != 'protect':
+                    total += step.queryset(chunk).count()
+        return total
+
+    def check_protected(self, pks):
+        for chunk in self._chunks(pks):
+            for step in self.plan:
+                if step.action == 'protect' and step.queryset(chunk).exists():
+                    raise ProtectedError(
+                        f'{step.model._meta.label} rows still reference these '
+                        f'{self.model._meta.verbose_name_plural}', set()
+                    )
+
+    def delete(self, pks, progress=None):
+        """Delete the targets and everything that cascades from them. Returns rows per model."""
+        pks = list(pks)
+        self.check_protected(pks)
+        deleted = {}
+        processed = 0
+        for chunk in self._chunks(pks):
+            for step in self.plan:
+                if step.action == 'protect':
+                    continue
+                for batch in self._batches(step.queryset(chunk)):
+                    with transaction.atomic(using=self.using):
+                        rows = step.model._base_manager.filter(pk__in=batch)
+                        if step.action == 'delete':
+                            # Raw DELETE: no collection, no signals (dependents are already gone)
+                            count = rows._raw_delete(self.using)
+                        else:
+                            count = rows.update(**{step.field: step.value})
+                    if step.action == 'delete':
+                        label = step.model._meta.label
+                        deleted[label] = deleted.get(label, 0) + count
+                    processed += len(batch)
+                    if progress is not None:
+                        progress.update(processed)
+            with transaction.atomic(using=self.using):
+                count = self.model._base_manager.filter(pk__in=chunk)._raw_delete(self.using)
+            deleted[self.model._meta.label] = deleted.get(self.model._meta.label, 0) + count
+            processed += len(chunk)
+            if progress is not None:
+                progress.update(processed)
+        for model in {step.model for step in self.plan} | {self.model}:
+            invalidate_model(model)
+        return deleted
+
+    def _chunks(self, pks):
+        for start in range(0, len(pks), self.chunk_size):
+            yield pks[start:start + self.chunk_size]
+
+    def _batches(self, queryset):
+        """pk batches; each one is gone (or no longer matches) before the next is read"""
+        while True:
+            batch = list(queryset.order_by().values_list('pk', flat=True)[:self.batch_size])
+            if not batch:
+                return
+            yield batch
+
+
+# ==================== Scheduling ====================
+def mark_pending(model, pks):
+    """Flag targets as pending deletion (and end users' sessions); returns how many were flagged"""
+    from adminapp.bulk import BulkOperation, update_rows
+    from base.models import User, UserSession
+
+    flag = update_rows(model, pending_delete=True, is_active=False)
+
+    def apply(chunk):
+        flagged = flag(chunk)
+        if model is User:
+            UserSession.objects.filter(user_id__in=chunk, is_active=True).update(is_active=False)
+        return flagged
+    return BulkOperation(model, apply).run(pks)['affected']
+
+
+def pending_pks(model, pks=None):
+    """Which of `pks` (default: all) are still flagged pending_delete"""
+    pending = model._base_manager.filter(pending_delete=True)
+    if pks is None:
+        return list(pending.values_list('pk', flat=True))
+    found = []
+    for start in range(0, len(pks), CHUNK_SIZE):
+        found += pending.filter(pk__in=pks[start:start + CHUNK_SIZE]).values_list('pk', flat=True)
+    return found
+
+
+def purge(model, pks=None, progress=None):
+    """Job body: hard-delete pending targets, then rebuild the stats they affected"""
+    from adminapp.analytics import refresh_course_stats
+    from base.models import User, UserCourseProgress
+
+    pks = pending_pks(model, pks)
+    deleter = CascadeDeleter(model)
+    affected_courses = []
+    if model is User:
+        for start in range(0, len(pks), deleter.chunk_size):
+            affected_courses += UserCourseProgress.objects.filter(
+                user_id__in=pks[start:start + deleter.chunk_size]
+            ).values_list('course_id', flat=True).distinct()
+    if progress is not None:
+        progress.update(0, total=deleter.count(pks))
+
+    deleted = deleter.delete(pks, progress)
+    if affected_courses:
+        refresh_course_stats(list(set(affected_courses)))
+    return {'targets': len(pks), 'deleted': deleted}
+
+
+def schedule_deletion(model, pks, created_by=None):
+    """Mark `pks` pending-delete now and start the background purge. Returns (flagged count, AdminJob)."""
+    from adminapp.bulk import clean_ids
+    from adminapp.jobs import start_job
+
+    pks, _ = clean_ids(model, pks)
+    flagged = mark_pending(model, pks)
+    job = start_job(
+        f'{model._meta.model_name}_hard_delete',
+        lambda progress: purge(model, pks, progress),
+        created_by=created_by,
+    )
+    return flagged, job
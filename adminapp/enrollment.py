@@ -0,0 +1,118 @@
+# adminapp/enrollment.py
+"""
+Bulk enrollment of many users into many courses (BulkEnrollmentView and the
+bulk_enroll command).
+
+Module counts are read once for all courses, progress rows are inserted with
+bulk_create(ignore_conflicts=True) a chunk of users at a time, and new vs
+existing enrollments are counted with one query per chunk on each side of
+the insert. bulk_create skips the post_save signals that keep
+CourseStatsSnapshot current, so each course's snapshot is adjusted once
+with the number of rows actually created, and learners' progress ETags
+(base.etags) are invalidated once at the end.
+"""
+import uuid
+
+from django.db import transaction
+from django.db.models import Count
+
+from base.cache import invalidate_model
+from base.models import Course, CourseModule, PathCourse, User, UserCourseProgress
+from adminapp.analytics import adjust_course_stats
+
+CHUNK_SIZE = 900  # Stays under SQLite's bound-parameter limit on old builds
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _as_uuids(values):
+    """Split raw ids into (valid UUIDs, invalid strings)"""
+    valid, invalid = [], []
+    for value in values:
+        try:
+            valid.append(uuid.UUID(str(value)))
+        except ValueError:
+            invalid.append(str(value))
+    return valid, invalid
+
+
+def path_course_ids(learning_path):
+    return list(
+        PathCourse.objects.filter(learning_path=learning_path).order_by('order')
+        .values_list('course_id', flat=True)
+    )
+
+
+def bulk_enroll(user_ids, course_ids=None, learning_path=None, chunk_size=CHUNK_SIZE):
+    """
+    Enroll every user in user_ids into every course in course_ids (or the
+    courses of learning_path). Inactive or unknown courses and unknown or
+    inactive users are skipped and reported. Returns a summary dict.
+    """
+    if learning_path is not None:
+        course_ids = path_course_ids(learning_path)
+
+    user_ids, invalid_users = _as_uuids(dict.fromkeys(user_ids))
+    course_ids, invalid_courses = _as_uuids(dict.fromkeys(course_ids or []))
+
+    courses = {
+        course.id: course
+        for course in Course.objects.filter(id__in=course_ids, is_active=True).only('id', 'title')
+    }
+    known_users = []
+    for chunk in _chunks(user_ids, chunk_size):
+        known_users += User.objects.filter(id__in=chunk, is_active=True).values_list('id', flat=True)
+    known_set = set(known_users)
+
+    module_counts = dict(
+        CourseModule.objects.filter(course_id__in=list(courses)).order_by().values('course_id')
+        .annotate(total=Count('id')).values_list('course_id', 'total')
+    )
+
+    per_course = []
+    for course_id in course_ids:
+        course = courses.get(course_id)
+        if course is None:
+            continue
+        created = existing = 0
+        for chunk in _chunks(known_users, chunk_size):
+            enrolled = UserCourseProgress.objects.filter(course_id=course_id, user_id__in=chunk)
+            with transaction.atomic():
+                before = enrolled.count()
+                UserCourseProgress.objects.bulk_create(
+                    [
+                        UserCourseProgress(
+                            user_id=user_id, course_id=course_id,
+                            total_modules_count=module_counts.get(course_id, 0)
+                        )
+                        for user_id in chunk
+                    ],
+                    ignore_conflicts=True,
+                )
+                after = enrolled.count()
+            created += after - before
+            existing += before
+        if created:
+            adjust_course_stats(course_id, enrolled=created)
+        per_course.append({
+            'course_id': str(course_id),
+            'title': course.title,
+            'created': created,
+            'existing': existing,
+        })
+
+    if any(course['created'] for course in per_course):
+        invalidate_model(UserCourseProgress)
+
+    return {
+        'users': len(known_users),
+        'courses': len(per_course),
+        'created': sum(course['created'] for course in per_course),
+        'existing': sum(course['existing'] for course in per_course),
+        'per_course': per_course,
+        'skipped_users': invalid_users + [str(user_id) for user_id in user_ids if user_id not in known_set],
+        'skipped_courses': invalid_courses + [str(course_id) for course_id in course_ids if course_id not in courses],
+    }
@@ -0,0 +1,191 @@
+# adminapp/exports.py
+"""
+Streaming data exports for admins (DataExportView and the export_data
+command).
+
+Rows are read with values_list().iterator(chunk_size=...), so neither model
+instances nor the full result are ever held in memory, and rendered one line
+at a time as CSV or JSON lines, optionally gzip-compressed on the fly.
+"""
+import csv
+import json
+import zlib
+from datetime import date, datetime
+from itertools import chain
+
+from base.models import User, UserCourseProgress, UserModuleProgress
+from adminapp.audit import EXPORT_COLUMNS
+from adminapp.models import AdminAuditLog
+
+CHUNK_SIZE = 2000
+FORMATS = ('csv', 'jsonl')
+
+
+class ExportDataset:
+    def __init__(self, model, columns, ordering=(), filters=None, superadmin_only=False):
+        """
+        columns: (header, lookup) pairs read with values_list.
+        filters: query param -> lookup for simple equality filters.
+        """
+        self.model = model
+        self.columns = columns
+        self.ordering = ordering
+        self.filters = filters or {}
+        self.superadmin_only = superadmin_only
+
+    @property
+    def headers(self):
+        return [header for header, _ in self.columns]
+
+    def queryset(self, params):
+        queryset = self.model.objects.all()
+        for param, lookup in self.filters.items():
+            value = params.get(param)
+            if value not in (None, ''):
+                if value in ('true', 'false'):
+                    value = value == 'true'
+                queryset = queryset.filter(**{lookup: value})
+        return queryset
+
+    def rows(self, params, chunk_size=CHUNK_SIZE):
+        queryset = self.queryset(params).order_by(*self.ordering)
+        lookups = [lookup for _, lookup in self.columns]
+        return queryset.values_list(*lookups).iterator(chunk_size=chunk_size)
+
+
+class AuditLogDataset(ExportDataset):
+    """
+    Filters as AuditLogView (raising ValueError on bad dates);
+    ?include_archived=1 streams matching archived rows before the live table
+    """
+    def queryset(self, params):
+        from adminapp.audit import filter_audit_logs
+        return filter_audit_logs(AdminAuditLog.objects.all(), params)
+
+    def rows(self, params, chunk_size=CHUNK_SIZE):
+        live = super().rows(params, chunk_size)
+        if params.get('include_archived') != '1':
+            return live
+        from adminapp.audit import iter_archived_audit_logs
+
+        start = date.fromisoformat(params['start_date']) if params.get('start_date') else None
+        end = date.fromisoformat(params['end_date']) if params.get('end_date') else None
+        headers = self.headers
+        archived = (
+            tuple(row.get(header) for header in headers)
+            for row in iter_archived_audit_logs(start, end)
+            if all(
+                not params.get(field) or str(row.get(field)) == params[field]
+                for field in ('admin_user_id', 'action', 'model_name')
+            )
+        )
+        return chain(archived, live)
+
+
+DATASETS = {
+    'users': ExportDataset(
+        User,
+        [
+            ('id', 'id'), ('email', 'email'), ('full_name', 'full_name'),
+            ('is_active', 'is_active'), ('is_staff', 'is_staff'),
+            ('created_at', 'created_at'), ('last_login', 'last_login'),
+        ],
+        ordering=('created_at', 'id'),
+        filters={'is_active': 'is_active', 'is_staff': 'is_staff'},
+    ),
+    'enrollments': ExportDataset(
+        UserCourseProgress,
+        [
+            ('id', 'id'), ('user_id', 'user_id'), ('user_email', 'user__email'),
+            ('course_id', 'course_id'), ('course_title', 'course__title'),
+            ('progress_percentage', 'progress_percentage'),
+            ('completed_modules', 'completed_modules_count'),
+            ('total_modules', 'total_modules_count'),
+            ('is_completed', 'is_completed'), ('started_at', 'started_at'),
+            ('completed_at', 'completed_at'), ('last_accessed_at', 'last_accessed_at'),
+        ],
+        filters={'course_id': 'course_id', 'user_id': 'user_id', 'is_completed': 'is_completed'},
+    ),
+    'module-progress': ExportDataset(
+        UserModuleProgress,
+        [
+            ('id', 'id'), ('user_id', 'user_id'), ('user_email', 'user__email'),
+            ('course_id', 'module__course_id'), ('module_id', 'module_id'),
+            ('module_title', 'module__title'), ('is_completed', 'is_completed'),
+            ('completed_at', 'completed_at'), ('time_spent_minutes', 'time_spent_minutes'),
+            ('last_position', 'last_position'),
+        ],
+        filters={'course_id': 'module__course_id', 'user_id': 'user_id',
+                 'is_completed': 'is_completed'},
+    ),
+    'audit-logs': AuditLogDataset(
+        AdminAuditLog,
+        EXPORT_COLUMNS,
+        ordering=('created_at', 'id'),
+        superadmin_only=True,
+    ),
+}
+
+
+def plain(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=str)
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return str(value)
+
+
+class _LineBuffer:
+    """csv.writer target that hands back what was written instead of storing it"""
+    def write(self, line):
+        return line
+
+
+def render(dataset, rows, file_format):
+    """Yield the export as text chunks, one per row (plus a CSV header)"""
+    if file_format == 'csv':
+        writer = csv.writer(_LineBuffer())
+        yield writer.writerow(dataset.headers)
+        for row in rows:
+            yield writer.writerow([plain(value) for value in row])
+    else:
+        headers = dataset.headers
+        for row in rows:
+            # JSON values (audit details) stay nested rather than becoming strings
+            values = (value if isinstance(value, (dict, list)) else plain(value) for value in row)
+            yield json.dumps(dict(zip(headers, values)), default=str) + '\n'
+
+
+def encode(chunks, compress=False, min_chunk=64 * 1024):
+    """
+    Encode text chunks to bytes, batching small lines into ~64KB writes, and
+    gzip them on the fly when compress is set.
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    pending, size = [], 0
+    for chunk in chunks:
+        data = chunk.encode('utf-8')
+        pending.append(data)
+        size += len(data)
+        if size >= min_chunk:
+            block = b''.join(pending)
+            pending, size = [], 0
+            block = compressor.compress(block) if compressor else block
+            if block:
+                yield block
+    block = b''.join(pending)
+    if compressor:
+        block = compressor.compress(block) + compressor.flush()
+    if block:
+        yield block
+
+
+def export_stream(name, params, file_format='csv', compress=False, chunk_size=CHUNK_SIZE):
+    dataset = DATASETS[name]
+    return encode(render(dataset, dataset.rows(params, chunk_size), file_format), compress)
+
+
+def export_filename(name, file_format, compress):
+    return f'{name}-{date.today().isoformat()}.{file_format}' + ('.gz' if compress else '')
@@ -0,0 +1,24 @@
+# adminapp/hashing.py
+"""
+Password hashing for adminapp.user_import's process pool.
+
+The pool's processes are spawned, so they import this module before Django
+is set up. It must not import models (directly or through adminapp.user_import)
+at module level; init_worker() sets Django up first.
+"""
+import bcrypt
+
+
+def init_worker():
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+
+
+def hash_password(password):
+    """(Django hash, bcrypt hash) for one password, as User.set_password stores them"""
+    from django.contrib.auth.hashers import make_password
+
+    bcrypt_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    return make_password(password), bcrypt_hash
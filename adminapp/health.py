@@ -0,0 +1,237 @@
+# adminapp/health.py
+"""
+Background system health sampler.
+
+A daemon thread takes a sample every HEALTH_SAMPLE_INTERVAL seconds (CPU,
+memory, disk, database ping latency, process and connection counts, active
+users) into an in-memory ring buffer, so SystemHealthView answers from
+memory without blocking on psutil.cpu_percent(interval=1) or writing a row.
+
+Every HEALTH_PERSIST_EVERY samples the buffer since the last write is
+averaged into one SystemHealth row; a cache lock makes sure only one worker
+process writes per window (with Redis; a per-process cache writes one row
+per worker). Rows older than HEALTH_RETENTION_DAYS are pruned
+at the same time.
+
+With HEALTH_SAMPLER_THREAD off (the test runner) no thread is started and
+the endpoint samples inline whenever the latest sample is older than the
+interval.
+"""
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import timedelta
+
+import psutil
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, connection
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+PERSIST_LOCK_KEY = 'health:persist-lock'
+WARNING_PERCENT = 90.0
+WARNING_DB_LATENCY_MS = 500.0
+
+
+def _db_ping():
+    """(status, latency in ms)"""
+    started = time.perf_counter()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+    except Exception as e:
+        return f'error: {e}', None
+    return 'connected', round((time.perf_counter() - started) * 1000, 2)
+
+
+def _process_stats(process):
+    stats = {'process_rss_mb': None, 'process_threads': None, 'open_connections': None}
+    try:
+        with process.oneshot():
+            stats['process_rss_mb'] = round(process.memory_info().rss / 2 ** 20, 1)
+            stats['process_threads'] = process.num_threads()
+        stats['open_connections'] = len(process.net_connections(kind='inet'))
+    except (psutil.Error, AttributeError, OSError):
+        pass
+    return stats
+
+
+def classify(sample):
+    if not sample['database_status'].startswith('connected'):
+        return 'critical'
+    if any((sample.get(key) or 0) >= WARNING_PERCENT
+           for key in ('cpu_percent', 'memory_percent', 'storage_usage')):
+        return 'warning'
+    if (sample.get('db_latency_ms') or 0) >= WARNING_DB_LATENCY_MS:
+        return 'warning'
+    return 'healthy'
+
+
+class HealthSampler:
+    def __init__(self, interval=10.0, history_size=360, persist_every=30, retention_days=7):
+        self.interval = interval
+        self.persist_every = persist_every
+        self.retention_days = retention_days
+        self.samples = deque(maxlen=history_size)
+        self._pending = []
+        self._taken = 0.0  # time.monotonic() of the latest sample
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stopping = threading.Event()
+        self._process = psutil.Process(os.getpid())
+        self.started_at = time.time()
+        psutil.cpu_percent(interval=None)  # Prime: the first non-blocking reading is meaningless
+
+    # ----- sampling -----
+    def sample(self):
+        """Take one sample (never blocks on CPU measurement) and store it"""
+        from base.models import User
+
+        database_status, db_latency_ms = _db_ping()
+        try:
+            disk = psutil.disk_usage('/')
+            storage_usage = round(disk.used / disk.total * 100, 2)
+        except OSError:
+            storage_usage = None
+        memory = psutil.virtual_memory()
+        try:
+            active_users = User.objects.filter(
+                last_login__gte=timezone.now() - timedelta(minutes=5)
+            ).count()
+        except Exception:
+            active_users = None
+
+        sample = {
+            'id': str(uuid.uuid4()),
+            'sampled_at': timezone.now().isoformat(),
+            'cpu_percent': psutil.cpu_percent(interval=None),
+            'memory_percent': memory.percent,
+            'storage_usage': storage_usage,
+            'database_status': database_status,
+            'db_latency_ms': db_latency_ms,
+            'active_users': active_users,
+            **_process_stats(self._process),
+        }
+        sample['status'] = classify(sample)
+        with self._lock:
+            self.samples.append(sample)
+            self._pending.append(sample)
+            self._taken = time.monotonic()
+            due = len(self._pending) >= self.persist_every
+        if due:
+            self.persist()
+        return sample
+
+    def latest(self, max_age=None):
+        """Most recent sample; takes one inline if there is none younger than max_age seconds"""
+        with self._lock:
+            sample = self.samples[-1] if self.samples else None
+            taken = self._taken
+        if sample is None or (max_age is not None and time.monotonic() - taken > max_age):
+            sample = self.sample()
+        return sample
+
+    def history(self, limit=60):
+        with self._lock:
+            return list(self.samples)[-limit:] if limit else []
+
+    def availability(self):
+        """Percent of buffered samples with a reachable database"""
+        with self._lock:
+            samples = list(self.samples)
+        if not samples:
+            return 100.0
+        up = sum(1 for sample in samples if sample['database_status'] == 'connected')
+        return round(up * 100 / len(samples), 2)
+
+    # ----- persistence -----
+    def persist(self):
+        """Average the samples since the last write into one SystemHealth row (one worker per window)"""
+        from adminapp.models import SystemHealth
+
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if not pending:
+            return None
+        if not cache.add(PERSIST_LOCK_KEY, os.getpid(), int(self.interval * self.persist_every * 0.9) or 1):
+            return None  # Another worker wrote this window
+
+        def mean(key):
+            values = [sample[key] for sample in pending if sample.get(key) is not None]
+            return round(sum(values) / len(values), 2) if values else 0.0
+
+        latest = pending[-1]
+        worst = max(pending, key=lambda sample: ('healthy', 'warning', 'critical').index(sample['status']))
+        try:
+            row = SystemHealth.objects.create(
+                status=worst['status'],
+                uptime=round(
+                    sum(1 for sample in pending if sample['database_status'] == 'connected') * 100 / len(pending), 2
+                ),
+                database_status=latest['database_status'][:50],
+                storage_usage=mean('storage_usage'),
+                active_users=latest['active_users'] or 0,
+                cpu_percent=mean('cpu_percent'),
+                memory_percent=mean('memory_percent'),
+                db_latency_ms=mean('db_latency_ms'),
+            )
+            SystemHealth.objects.filter(
+                created_at__lt=timezone.now() - timedelta(days=self.retention_days)
+            ).delete()
+        except Exception:
+            logger.exception('Failed to persist health sample')
+            return None
+        return row
+
+    # ----- background thread -----
+    def ensure_started(self):
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._stopping.clear()
+                    self._thread = threading.Thread(target=self._run, name='health-sampler', daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                self.sample()
+            except Exception:
+                logger.exception('Health sample failed')
+            finally:
+                close_old_connections()
+            self._stopping.wait(self.interval)
+
+    def stop(self):
+        self._stopping.set()
+
+    @property
+    def running(self):
+        return bool(self._thread and self._thread.is_alive())
+
+
+_sampler = None
+_sampler_lock = threading.Lock()
+
+
+def get_sampler():
+    """Process-wide sampler; starts its thread on first use unless HEALTH_SAMPLER_THREAD is off"""
+    global _sampler
+    if _sampler is None:
+        with _sampler_lock:
+            if _sampler is None:
+                _sampler = HealthSampler(
+                    interval=getattr(settings, 'HEALTH_SAMPLE_INTERVAL', 10.0),
+                    history_size=getattr(settings, 'HEALTH_HISTORY_SIZE', 360),
+                    persist_every=getattr(settings, 'HEALTH_PERSIST_EVERY', 30),
+                    retention_days=getattr(settings, 'HEALTH_RETENTION_DAYS', 7),
+                )
+    if getattr(settings, 'HEALTH_SAMPLER_THREAD', True):
+        _sampler.ensure_started()
+    return _sampler
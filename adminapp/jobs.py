@@ -0,0 +1,123 @@
+# adminapp/jobs.py
+"""
+Background execution for long admin operations.
+
+start_job() records an AdminJob and runs a function on a daemon thread. The
+function receives a JobProgress it can report through; progress is written
+straight to the job row, so the status endpoint (AdminJobView) reflects it
+while the job runs. With ADMIN_JOBS_SYNC (the test runner) the function runs
+inline before start_job() returns.
+
+Jobs live in the web process, so a restart kills running jobs mid-way. A
+running job records its worker ("host:pid") and refreshes heartbeat_at every
+ADMIN_JOB_HEARTBEAT_INTERVAL seconds; fail_orphaned_jobs(), run when a job is
+read, marks a running job failed once its process is gone (same host) or its
+heartbeat is older than ADMIN_JOB_ORPHAN_TIMEOUT. Operations run as
+independent short transactions so what they finished is kept, and they are
+safe to re-run.
+"""
+import logging
+import os
+import socket
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from adminapp.audit import process_alive
+from adminapp.models import AdminJob
+
+logger = logging.getLogger(__name__)
+
+
+class JobProgress:
+    """Passed to job functions; a no-op when there is no job (synchronous runs)"""
+    def __init__(self, job=None):
+        self.job = job
+
+    def update(self, processed, total=None):
+        if self.job is None:
+            return
+        fields = {'processed': processed}
+        if total is not None:
+            fields['total'] = total
+        AdminJob.objects.filter(pk=self.job.pk).update(**fields)
+
+
+def _worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def _heartbeat(job, stopped):
+    interval = getattr(settings, 'ADMIN_JOB_HEARTBEAT_INTERVAL', 30)
+    try:
+        while not stopped.wait(interval):
+            AdminJob.objects.filter(pk=job.pk, status='running').update(heartbeat_at=timezone.now())
+    finally:
+        close_old_connections()
+
+
+def fail_orphaned_jobs(jobs=None):
+    """Mark running jobs whose worker died as failed; returns how many were marked"""
+    if jobs is None:
+        jobs = AdminJob.objects.filter(status='running')
+    hostname = socket.gethostname()
+    stale_before = timezone.now() - timedelta(seconds=getattr(settings, 'ADMIN_JOB_ORPHAN_TIMEOUT', 300))
+    orphaned = []
+    for job in jobs:
+        if job.status != 'running':
+            continue
+        host, _, pid = job.worker.rpartition(':')
+        if (host == hostname and pid.isdigit() and not process_alive(int(pid))) or (
+                job.heartbeat_at is None or job.heartbeat_at < stale_before):
+            orphaned.append(job.pk)
+    if not orphaned:
+        return 0
+    return AdminJob.objects.filter(pk__in=orphaned, status='running').update(
+        status='failed', error='The worker running this job stopped', finished_at=timezone.now()
+    )
+
+
+def _execute(job, func):
+    now = timezone.now()
+    AdminJob.objects.filter(pk=job.pk).update(
+        status='running', started_at=now, worker=_worker_id(), heartbeat_at=now
+    )
+    stopped = threading.Event()
+    if not getattr(settings, 'ADMIN_JOBS_SYNC', False):
+        threading.Thread(target=_heartbeat, args=(job, stopped), name=f'admin-job-heartbeat-{job.pk}',
+                         daemon=True).start()
+    try:
+        result = func(JobProgress(job))
+    except Exception as e:
+        logger.exception('Admin job failed', extra={'job_id': str(job.pk), 'kind': job.kind})
+        AdminJob.objects.filter(pk=job.pk).update(
+            status='failed', error=str(e), finished_at=timezone.now()
+        )
+    else:
+        AdminJob.objects.filter(pk=job.pk).update(
+            status='succeeded', result=result or {}, finished_at=timezone.now()
+        )
+    finally:
+        stopped.set()
+
+
+def _run_in_thread(job, func):
+    try:
+        _execute(job, func)
+    finally:
+        close_old_connections()
+
+
+def start_job(kind, func, created_by=None, total=0):
+    """Create an AdminJob for func(progress) -> result dict and start it"""
+    job = AdminJob.objects.create(kind=kind, created_by=created_by, total=total)
+    if getattr(settings, 'ADMIN_JOBS_SYNC', False):
+        _execute(job, func)
+    else:
+        threading.Thread(
+            target=_run_in_thread, args=(job, func), name=f'admin-job-{job.pk}', daemon=True
+        ).start()
+    return job
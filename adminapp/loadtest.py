@@ -0,0 +1,279 @@
+# adminapp/loadtest.py
+"""
+Load generator behind manage.py load_test.
+
+Virtual users are asyncio tasks that each play one session at a time:
+learners log in and then pick weighted actions (dashboard, catalog, course
+detail, module completion, labs, achievements); admins log in and browse
+the dashboard, course list and analytics. A stage runs N virtual users for a
+fixed time, and stages ramp N up.
+
+Requests go through one of two clients:
+
+- HTTPClient talks to a running server (runserver, gunicorn, uvicorn...), so
+  the same run can be pointed at a WSGI and an ASGI deployment, or at
+  servers backed by SQLite and by Postgres.
+- InProcessClient drives Django's test client in this process, against the
+  configured database, with no server at all.
+
+Both block, so requests run on a thread pool sized to the stage's
+concurrency. Latencies are recorded per endpoint with the histogram of
+adminapp.metrics. Responses that failed on a database lock (SQLite "database
+is locked", Postgres deadlocks and lock timeouts) are counted separately,
+since they are the first thing to break when writes contend.
+"""
+import asyncio
+import itertools
+import json
+import math
+import random
+import re
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from adminapp.metrics import MetricsRegistry, merge_into, new_stats, summarize
+
+LOCK_ERROR = re.compile(
+    r'database is locked|database table is locked|deadlock detected|lock timeout'
+    r'|could not obtain lock|could not serialize access',
+    re.IGNORECASE,
+)
+NO_RESPONSE = 599  # Recorded for connection errors and timeouts, so they count as server errors
+
+LEARNER_MIX = [
+    ('dashboard', 3),
+    ('catalog', 2),
+    ('course_detail', 3),
+    ('module_complete', 2),
+    ('labs', 1),
+    ('achievements', 1),
+]
+ADMIN_MIX = [
+    ('admin_dashboard', 3),
+    ('admin_courses', 2),
+    ('admin_analytics', 1),
+]
+
+
+class Reply:
+    def __init__(self, status, payload=None, error=''):
+        self.status = status
+        self.payload = payload
+        self.error = error
+
+    @property
+    def ok(self):
+        return 200 <= self.status < 300
+
+    @property
+    def lock_error(self):
+        return bool(LOCK_ERROR.search(self.error))
+
+
+def _decode(body):
+    try:
+        return json.loads(body)
+    except ValueError:
+        return None
+
+
+class HTTPClient:
+    """Requests against a running server"""
+    def __init__(self, base_url, timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def request(self, method, path, token=None, data=None):
+        headers = {'Accept': 'application/json'}
+        body = None
+        if data is not None:
+            body = json.dumps(data).encode()
+            headers['Content-Type'] = 'application/json'
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+        request = urllib.request.Request(self.base_url + path, data=body, headers=headers, method=method)
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                text = response.read().decode('utf-8', 'replace')
+                return Reply(response.status, _decode(text))
+        except urllib.error.HTTPError as error:
+            text = error.read().decode('utf-8', 'replace')
+            return Reply(error.code, _decode(text), text if error.code >= 500 else '')
+        except (urllib.error.URLError, OSError) as error:
+            return Reply(NO_RESPONSE, error=str(error))
+
+
+class InProcessClient:
+    """Django's test client, in this process and against the configured database"""
+    def __init__(self):
+        from django.test import Client
+        self.client = Client(raise_request_exception=True)
+
+    def request(self, method, path, token=None, data=None):
+        from django.db import close_old_connections
+
+        extra = {'HTTP_AUTHORIZATION': f'Bearer {token}'} if token else {}
+        try:
+            response = self.client.generic(
+                method, path, json.dumps(data) if data is not None else '',
+                content_type='application/json', **extra
+            )
+        except Exception as error:
+            # The exception itself, where a server would only show a 500
+            return Reply(500, error=f'{type(error).__name__}: {error}')
+        finally:
+            # The test client keeps connections open; a server closes them per CONN_MAX_AGE
+            close_old_connections()
+        body = b''.join(response.streaming_content) if response.streaming else response.content
+        text = body.decode('utf-8', 'replace')
+        return Reply(response.status_code, _decode(text), text if response.status_code >= 500 else '')
+
+
+class LoadTest:
+    def __init__(self, client_factory, learner_emails, admin_emails, password,
+                 admin_ratio=0.1, session_length=20, think_ms=0, random_seed=42):
+        self.client_factory = client_factory
+        self.learner_emails = learner_emails
+        self.admin_emails = admin_emails
+        self.password = password
+        self.admin_ratio = admin_ratio
+        self.session_length = session_length
+        self.think_ms = think_ms
+        self.rng = random.Random(random_seed)
+        self._next_learner = itertools.count()
+        self._next_admin = itertools.count()
+
+    # ----- running -----
+    def run_stage(self, concurrency, seconds):
+        """Run `concurrency` virtual users for `seconds`; returns the stage report"""
+        return asyncio.run(self._stage(concurrency, seconds))
+
+    async def _stage(self, concurrency, seconds):
+        self.registry = MetricsRegistry()
+        self.lock_errors = {}
+        self.sample_errors = {}
+        admins = 0
+        if self.admin_emails and self.admin_ratio:
+            # At least one admin once there is room for both roles
+            admins = min(math.ceil(concurrency * self.admin_ratio), concurrency - (self.admin_ratio < 1))
+        deadline = time.monotonic() + seconds
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            self.executor = executor
+            await asyncio.gather(*(
+                self._virtual_user(admin=index < admins, deadline=deadline)
+                for index in range(concurrency)
+            ))
+        return self._report(concurrency, time.monotonic() - started)
+
+    async def _virtual_user(self, admin, deadline):
+        client = self.client_factory()
+        while time.monotonic() < deadline:
+            if admin:
+                await self._admin_session(client, deadline)
+            else:
+                await self._learner_session(client, deadline)
+
+    async def _call(self, client, endpoint, method, path, token=None, data=None):
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        reply = await loop.run_in_executor(self.executor, client.request, method, path, token, data)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.registry.record(endpoint, elapsed_ms, reply.status)
+        if reply.lock_error:
+            self.lock_errors[endpoint] = self.lock_errors.get(endpoint, 0) + 1
+        if reply.status >= 500 and endpoint not in self.sample_errors:
+            self.sample_errors[endpoint] = (reply.error or f'HTTP {reply.status}')[:300]
+        if self.think_ms:
+            await asyncio.sleep(self.rng.uniform(0, 2 * self.think_ms) / 1000)
+        return reply
+
+    def _pick(self, mix):
+        actions, weights = zip(*mix)
+        return self.rng.choices(actions, weights)[0]
+
+    async def _learner_session(self, client, deadline):
+        email = self.learner_emails[next(self._next_learner) % len(self.learner_emails)]
+        reply = await self._call(client, 'POST /api/auth/login/', 'POST', '/api/auth/login/',
+                                 data={'email': email, 'password': self.password})
+        if not reply.ok:
+            return
+        token = reply.payload['token']
+        enrolled = await self._enrolled_courses(client, token)
+        catalog = []
+        for _ in range(self.session_length):
+            if time.monotonic() >= deadline:
+                break
+            action = self._pick(LEARNER_MIX)
+            if action == 'dashboard':
+                await self._call(client, 'GET /api/dashboard/stats/', 'GET', '/api/dashboard/stats/', token)
+                enrolled = await self._enrolled_courses(client, token) or enrolled
+            elif action == 'catalog':
+                reply = await self._call(client, 'GET /api/courses/', 'GET', '/api/courses/', token)
+                if reply.ok:
+                    catalog = [course['id'] for course in reply.payload]
+            elif action == 'course_detail':
+                course_id = self.rng.choice(enrolled or catalog or [None])
+                if course_id:
+                    await self._call(client, 'GET /api/courses/<id>/', 'GET', f'/api/courses/{course_id}/', token)
+            elif action == 'module_complete' and enrolled:
+                course_id = self.rng.choice(enrolled)
+                reply = await self._call(client, 'GET /api/courses/<id>/', 'GET', f'/api/courses/{course_id}/', token)
+                if reply.ok and reply.payload['modules']:
+                    module = self.rng.choice(reply.payload['modules'])
+                    await self._call(client, 'POST /api/modules/<id>/complete/', 'POST',
+                                     f'/api/modules/{module["id"]}/complete/', token, data={})
+            elif action == 'labs':
+                await self._call(client, 'GET /api/ai-labs/', 'GET', '/api/ai-labs/', token)
+            elif action == 'achievements':
+                await self._call(client, 'GET /api/progress/achievements/', 'GET',
+                                 '/api/progress/achievements/', token)
+
+    async def _enrolled_courses(self, client, token):
+        reply = await self._call(client, 'GET /api/dashboard/courses/', 'GET', '/api/dashboard/courses/', token)
+        if not reply.ok:
+            return []
+        return [progress['course']['id'] for progress in reply.payload if not progress['is_completed']]
+
+    async def _admin_session(self, client, deadline):
+        email = self.admin_emails[next(self._next_admin) % len(self.admin_emails)]
+        reply = await self._call(client, 'POST /api/admin/auth/login/', 'POST', '/api/admin/auth/login/',
+                                 data={'email': email, 'password': self.password})
+        if not reply.ok:
+            return
+        token = reply.payload['token']
+        for _ in range(self.session_length):
+            if time.monotonic() >= deadline:
+                break
+            action = self._pick(ADMIN_MIX)
+            if action == 'admin_dashboard':
+                await self._call(client, 'GET /api/admin/dashboard/', 'GET', '/api/admin/dashboard/', token)
+            elif action == 'admin_courses':
+                await self._call(client, 'GET /api/admin/courses/', 'GET', '/api/admin/courses/', token)
+            elif action == 'admin_analytics':
+                await self._call(client, 'GET /api/admin/analytics/', 'GET', '/api/admin/analytics/', token)
+
+    # ----- reporting -----
+    def _report(self, concurrency, seconds):
+        routes = self.registry.snapshot()
+        total = new_stats()
+        endpoints = {}
+        for endpoint, stats in sorted(routes.items()):
+            merge_into(total, stats)
+            endpoints[endpoint] = self._summary(stats, seconds, self.lock_errors.get(endpoint, 0))
+        return {
+            'concurrency': concurrency,
+            'seconds': round(seconds, 2),
+            'overall': self._summary(total, seconds, sum(self.lock_errors.values())),
+            'endpoints': endpoints,
+            'sample_errors': self.sample_errors,
+        }
+
+    @staticmethod
+    def _summary(stats, seconds, lock_errors):
+        summary = summarize(stats)
+        summary['rps'] = round(stats['count'] / seconds, 2) if seconds else 0.0
+        summary['lock_errors'] = lock_errors
+        return summary
@@ -0,0 +1,186 @@
+# adminapp/log.py
+"""
+Structured logging for the admin API.
+
+Records are redacted, pushed onto an in-memory queue by QueueListenerHandler
+(cheap, never blocks the request thread on I/O) and written by a background
+QueueListener to the real handlers, which format them as one JSON object per
+line. Wiring lives in settings.LOGGING.
+"""
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import re
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+REDACTED = '[REDACTED]'
+SENSITIVE_KEYS = {
+    'password', 'token', 'access_token', 'refresh_token', 'authorization',
+    'admin_token', 'secret', 'api_key', 'cookie',
+}
+# Bearer credentials and anything shaped like a JWT (header.payload.signature)
+TOKEN_PATTERN = re.compile(
+    r'(Bearer\s+)[A-Za-z0-9\-_.=]+|eyJ[A-Za-z0-9\-_=]+\.[A-Za-z0-9\-_=]+\.[A-Za-z0-9\-_.+/=]*'
+)
+
+# Attributes every LogRecord has; anything else was passed through `extra`
+RESERVED_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+def redact(value):
+    """Return a copy of value with tokens and sensitive keys masked"""
+    if isinstance(value, str):
+        return TOKEN_PATTERN.sub(lambda m: (m.group(1) or '') + REDACTED, value)
+    if isinstance(value, dict):
+        return {
+            key: REDACTED if str(key).lower() in SENSITIVE_KEYS else redact(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return type(value)(redact(item) for item in value)
+    return value
+
+
+class RedactingFilter(logging.Filter):
+    """Masks tokens in the message, its arguments and any `extra` fields"""
+    def filter(self, record):
+        if isinstance(record.msg, str):
+            record.msg = redact(record.msg)
+        if record.args:
+            record.args = redact(record.args)
+        for key, value in list(vars(record).items()):
+            if key not in RESERVED_ATTRS:
+                setattr(record, key, REDACTED if key.lower() in SENSITIVE_KEYS else redact(value))
+        return True
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line: timestamp, level, logger, message and `extra` fields"""
+    converter = time.gmtime
+
+    def format(self, record):
+        payload = {
+            'timestamp': self.formatTime(record, '%Y-%m-%dT%H:%M:%S') + f'.{int(record.msecs):03d}Z',
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in RESERVED_ATTRS and not key.startswith('_'):
+                payload[key] = value
+        if record.exc_info:
+            payload['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            payload['exception'] = record.exc_text
+        return json.dumps(payload, default=str)
+
+
+class QueueListenerHandler(QueueHandler):
+    """
+    A QueueHandler that owns the QueueListener draining it, so the whole
+    pipeline can be declared in dictConfig. `handlers` are references to
+    other configured handlers ('cfg://handlers.<name>'); dictConfig builds
+    handlers in name order, so the targets must sort before this one.
+
+    The listener thread starts on the first record, in the process that
+    logs it: configuring LOGGING (every management command, the parent of
+    forked workers) starts nothing, and a forked child starts its own.
+    """
+    def __init__(self, handlers, respect_handler_level=True, maxsize=10000):
+        super().__init__(queue.Queue(maxsize))
+        self.maxsize = maxsize
+        targets = [handlers[index] for index in range(len(handlers))]
+        self.listener = QueueListener(
+            self.queue, *targets, respect_handler_level=respect_handler_level
+        )
+        self._listener_pid = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_listener(self):
+        if self._listener_pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._listener_pid == os.getpid():
+                return
+            if self._listener_pid is not None:
+                # Forked after the parent started its listener: that thread does not exist here,
+                # and the inherited queue may hold the parent's records or a held lock
+                self.queue = self.listener.queue = queue.Queue(self.maxsize)
+            else:
+                atexit.register(self.stop)
+            self.listener.start()
+            self._listener_pid = os.getpid()
+
+    def emit(self, record):
+        self._ensure_listener()
+        super().emit(record)
+
+    def prepare(self, record):
+        """Merge args into the message (they may not be thread-safe to format later)
+        but keep the traceback separate so the JSON formatter can emit it as a field"""
+        record = copy.copy(record)
+        record.msg = record.message = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass  # Drop rather than block the request when the writer falls behind
+
+    def stop(self):
+        if self._listener_pid == os.getpid() and self.listener._thread is not None:
+            self.listener.stop()
+
+    def close(self):
+        self.stop()
+        super().close()
+
+
+def build_logging_config(level='INFO', module_levels='', json_output=True):
+    """
+    settings.LOGGING for the project. module_levels is a comma separated
+    list of logger=LEVEL pairs, e.g. 'adminapp.middleware=DEBUG,django.db=WARNING'.
+    """
+    loggers = {
+        'adminapp': {'level': level},
+        'base': {'level': level},
+        'django': {'level': 'INFO'},
+    }
+    for pair in filter(None, (item.strip() for item in module_levels.split(','))):
+        name, _, module_level = pair.partition('=')
+        loggers.setdefault(name.strip(), {})['level'] = module_level.strip().upper()
+
+    return {
+        'version': 1,
+        'disable_existing_loggers': False,
+        'filters': {
+            'redact': {'()': 'adminapp.log.RedactingFilter'},
+        },
+        'formatters': {
+            'json': {'()': 'adminapp.log.JSONFormatter'},
+            'plain': {'format': '%(asctime)s %(levelname)s %(name)s %(message)s'},
+        },
+        'handlers': {
+            'console': {
+                'class': 'logging.StreamHandler',
+                'formatter': 'json' if json_output else 'plain',
+            },
+            'queue': {
+                '()': 'adminapp.log.QueueListenerHandler',
+                'handlers': ['cfg://handlers.console'],
+                'filters': ['redact'],
+            },
+        },
+        'root': {'handlers': ['queue'], 'level': 'WARNING'},
+        'loggers': loggers,
+    }
@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from adminapp.audit import archive_audit_logs, archive_dir
+
+
+class Command(BaseCommand):
+    help = 'Moves audit logs older than the retention period into monthly gzip JSONL archives'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int,
+                            default=getattr(settings, 'AUDIT_LOG_RETENTION_DAYS', 365),
+                            help='Archive rows older than this many days (default: AUDIT_LOG_RETENTION_DAYS)')
+        parser.add_argument('--dir', help='Archive directory (default: AUDIT_LOG_ARCHIVE_DIR)')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Rows written and deleted per batch (default: 1000)')
+
+    def handle(self, *args, **options):
+        if options['days'] < 1:
+            raise CommandError('--days must be at least 1')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        directory = options['dir'] or archive_dir()
+        archived = archive_audit_logs(options['days'], directory, options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'✓ Archived {archived} audit log(s) to {directory}'))
@@ -0,0 +1,49 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Min
+from django.utils import timezone
+
+from base.models import User
+from adminapp.rollups import write_daily_metrics
+
+
+class Command(BaseCommand):
+    help = 'Builds DailyMetrics history from existing timestamps, one bulk pass per window of days'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', metavar='YYYY-MM-DD',
+                            help='First day to build (default: first user signup)')
+        parser.add_argument('--end', metavar='YYYY-MM-DD',
+                            help='Last day to build (default: today)')
+        parser.add_argument('--window', type=int, default=90,
+                            help='Days computed per batch of GROUP BY queries (default: 90)')
+
+    def handle(self, *args, **options):
+        try:
+            end = date.fromisoformat(options['end']) if options['end'] else timezone.now().date()
+            if options['start']:
+                start = date.fromisoformat(options['start'])
+            else:
+                first_signup = User.objects.aggregate(first=Min('created_at'))['first']
+                if first_signup is None:
+                    self.stdout.write(self.style.WARNING('No users yet, nothing to backfill'))
+                    return
+                start = timezone.localtime(first_signup).date()
+        except ValueError:
+            raise CommandError('Dates must be formatted as YYYY-MM-DD')
+
+        if start > end:
+            raise CommandError('--start must not be after --end')
+        if options['window'] < 1:
+            raise CommandError('--window must be at least 1 day')
+
+        total = 0
+        window_start = start
+        while window_start <= end:
+            window_end = min(window_start + timedelta(days=options['window'] - 1), end)
+            total += write_daily_metrics(window_start, window_end)
+            self.stdout.write(f'  {window_start.isoformat()} .. {window_end.isoformat()}')
+            window_start = window_end + timedelta(days=1)
+
+        self.stdout.write(self.style.SUCCESS(f'✓ Backfilled {total} day(s) of metrics'))
@@ -0,0 +1,80 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from adminapp.models import SystemLog
+from adminapp.pagination import CursorPagination
+
+
+class Command(BaseCommand):
+    help = ('Compares offset and cursor page latency at increasing depth on a large '
+            'system_logs table. Rows are inserted in a transaction that is rolled back.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000,
+                            help='Rows to insert before measuring (default: 1,000,000)')
+        parser.add_argument('--per-page', type=int, default=50)
+        parser.add_argument('--repeat', type=int, default=5,
+                            help='Timed runs per measurement; the median is reported')
+
+    def handle(self, *args, **options):
+        rows, per_page = options['rows'], options['per_page']
+        if rows < per_page * 2:
+            raise CommandError('--rows must be at least twice --per-page')
+
+        with transaction.atomic():
+            self.insert_rows(rows)
+            self.measure(per_page, options['repeat'])
+            transaction.set_rollback(True)
+
+    def insert_rows(self, rows):
+        started = time.perf_counter()
+        batch_size = 10_000
+        for start in range(0, rows, batch_size):
+            SystemLog.objects.bulk_create([
+                SystemLog(message=f'Benchmark row {n}', category='system')
+                for n in range(start, min(start + batch_size, rows))
+            ], batch_size=batch_size)
+        self.stdout.write(f'Inserted {rows:,} rows in {time.perf_counter() - started:.1f}s')
+
+    def measure(self, per_page, repeat):
+        pagination = CursorPagination(['-created_at', '-id'])
+        queryset = SystemLog.objects.all()
+        ordered = pagination.order(queryset)
+        total = queryset.count()
+
+        self.stdout.write(f'{"depth":>12} {"offset (ms)":>14} {"cursor (ms)":>14}')
+        for fraction in (0, 0.01, 0.1, 0.5, 0.99):
+            offset = int((total - per_page) * fraction)
+
+            def offset_page():
+                # What Paginator does per request: a COUNT plus an OFFSET scan
+                ordered.count()
+                return list(ordered[offset:offset + per_page])
+
+            params = {'per_page': per_page}
+            if offset:
+                params['cursor'] = pagination.encode(ordered[offset - 1])
+
+            def cursor_page():
+                return pagination.paginate(queryset, params).rows
+
+            expected = [row.pk for row in offset_page()]
+            if [row.pk for row in cursor_page()] != expected:
+                raise CommandError(f'Cursor and offset pages differ at depth {offset}')
+
+            self.stdout.write(
+                f'{offset:>12,} {self.median_ms(offset_page, repeat):>14.2f} '
+                f'{self.median_ms(cursor_page, repeat):>14.2f}'
+            )
+        self.stdout.write(self.style.SUCCESS('✓ Benchmark finished, rows rolled back'))
+
+    def median_ms(self, fetch, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fetch()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
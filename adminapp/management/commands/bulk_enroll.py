@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from base.models import LearningPath, User
+from adminapp.enrollment import CHUNK_SIZE, bulk_enroll
+
+
+class Command(BaseCommand):
+    help = 'Enrolls many users into courses (or a learning path) in chunked bulk inserts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users-file', required=True,
+                            help='File with one user id or email per line')
+        target = parser.add_mutually_exclusive_group(required=True)
+        target.add_argument('--course', dest='course_ids', action='append', metavar='COURSE_ID',
+                            help='Course to enroll into (repeatable)')
+        target.add_argument('--learning-path', metavar='PATH_ID',
+                            help="Enroll into every course of this learning path")
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['users_file']) as handle:
+                identifiers = [line.strip() for line in handle if line.strip()]
+        except OSError as e:
+            raise CommandError(str(e))
+
+        user_ids = [value for value in identifiers if '@' not in value]
+        emails = [value.lower() for value in identifiers if '@' in value]
+        for start in range(0, len(emails), options['chunk_size']):
+            chunk = emails[start:start + options['chunk_size']]
+            found = dict(User.objects.filter(email__in=chunk).values_list('email', 'id'))
+            user_ids += [found[email] for email in chunk if email in found]
+            for email in chunk:
+                if email not in found:
+                    self.stdout.write(self.style.WARNING(f'  no user with email {email}'))
+
+        learning_path = None
+        if options['learning_path']:
+            learning_path = LearningPath.objects.filter(id=options['learning_path']).first()
+            if learning_path is None:
+                raise CommandError(f'No learning path {options["learning_path"]}')
+
+        result = bulk_enroll(user_ids, course_ids=options['course_ids'],
+                             learning_path=learning_path, chunk_size=options['chunk_size'])
+
+        for course in result['per_course']:
+            self.stdout.write(
+                f'  {course["title"]}: {course["created"]} new, {course["existing"]} already enrolled'
+            )
+        for user_id in result['skipped_users']:
+            self.stdout.write(self.style.WARNING(f'  skipped user {user_id} (unknown or inactive)'))
+        for course_id in result['skipped_courses']:
+            self.stdout.write(self.style.WARNING(f'  skipped course {course_id} (unknown or inactive)'))
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ {result["created"]} new enrollment(s), {result["existing"]} existing, '
+            f'{result["users"]} user(s) x {result["courses"]} course(s)'
+        ))
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from adminapp.exports import DATASETS, FORMATS, export_stream, export_filename
+
+
+class Command(BaseCommand):
+    help = 'Streams an admin export (users, enrollments, module-progress, audit-logs) to a local file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=list(DATASETS))
+        parser.add_argument('--output', help='File to write (default: <dataset>-<date>.<format>[.gz])')
+        parser.add_argument('--format', dest='file_format', choices=FORMATS, default='csv')
+        parser.add_argument('--gzip', action='store_true', help='Compress the output')
+        parser.add_argument('--filter', action='append', default=[], metavar='PARAM=VALUE',
+                            help='Same filters as the export endpoint, e.g. --filter course_id=<uuid>')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        filters = {}
+        for item in options['filter']:
+            param, sep, value = item.partition('=')
+            if not sep:
+                raise CommandError(f'Filters must look like PARAM=VALUE, got {item!r}')
+            filters[param] = value
+
+        output = options['output'] or export_filename(
+            options['dataset'], options['file_format'], options['gzip']
+        )
+        try:
+            stream = export_stream(
+                options['dataset'], filters, options['file_format'],
+                options['gzip'], options['chunk_size']
+            )
+        except Exception as e:
+            raise CommandError(f'Invalid filter: {e}')
+
+        written = 0
+        with open(output, 'wb') as handle:
+            for block in stream:
+                handle.write(block)
+                written += len(block)
+
+        self.stdout.write(self.style.SUCCESS(f'✓ Wrote {written:,} bytes to {output}'))
@@ -0,0 +1,66 @@
+import csv
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from base.models import User
+from adminapp.user_import import FORMATS, import_users
+
+
+class Command(BaseCommand):
+    help = 'Bulk-creates users from a CSV or JSONL file (email, full_name, password, is_staff, is_active, bio)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', dest='file_format', choices=FORMATS,
+                            help='Input format (default: from the file extension)')
+        parser.add_argument('--invite', action='store_true',
+                            help='Create accounts with unusable passwords and one-time invite tokens')
+        parser.add_argument('--invites-out', metavar='PATH',
+                            help='Write invite tokens as JSON lines here (default: stdout)')
+        parser.add_argument('--dry-run', action='store_true', help='Validate without writing')
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Password hashing processes (default: one per CPU, 0 = in-process)')
+        parser.add_argument('--chunk-size', type=int, default=500)
+        parser.add_argument('--created-by', metavar='EMAIL', help='Admin recorded on invites')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['file_format'] or (
+            'jsonl' if path.lower().endswith(('.jsonl', '.ndjson')) else 'csv'
+        )
+        created_by = None
+        if options['created_by']:
+            created_by = User.objects.filter(email=options['created_by']).first()
+            if created_by is None:
+                raise CommandError(f'No user with email {options["created_by"]}')
+
+        try:
+            with open(path, 'rb') as stream:
+                report = import_users(
+                    stream, file_format,
+                    invite=options['invite'],
+                    created_by=created_by,
+                    dry_run=options['dry_run'],
+                    chunk_size=options['chunk_size'],
+                    workers=options['workers'],
+                )
+        except (OSError, UnicodeDecodeError, csv.Error) as e:
+            raise CommandError(str(e))
+
+        for error in report.errors:
+            self.stdout.write(self.style.WARNING(
+                f'  line {error["line"]} ({error["email"]}): {error["errors"]}'
+            ))
+        if report.invites:
+            lines = ''.join(json.dumps(invite) + '\n' for invite in report.invites)
+            if options['invites_out']:
+                with open(options['invites_out'], 'w') as handle:
+                    handle.write(lines)
+            else:
+                self.stdout.write(lines, ending='')
+
+        verb = 'Would create' if options['dry_run'] else 'Created'
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ {verb} {report.created} user(s), {report.failed} row(s) failed of {report.total}'
+        ))
@@ -0,0 +1,120 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from base import seeding
+from adminapp.loadtest import HTTPClient, InProcessClient, LoadTest
+
+
+class Command(BaseCommand):
+    help = ('Simulates concurrent learners and admins against the API in ramping stages and reports '
+            'throughput, latency percentiles, errors and database lock errors per endpoint. '
+            'Uses the accounts created by seed_data.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', default='',
+                            help='Base URL of a running server, e.g. http://127.0.0.1:8000 '
+                                 '(default: in-process, through the Django test client)')
+        parser.add_argument('--stages', default='1,5,10,25',
+                            help='Comma-separated virtual user counts, run in order (default: 1,5,10,25)')
+        parser.add_argument('--stage-seconds', type=float, default=20)
+        parser.add_argument('--admin-ratio', type=float, default=0.1,
+                            help='Share of virtual users that are admins (default: 0.1)')
+        parser.add_argument('--learners', type=int, default=1000,
+                            help='Seeded learner accounts to rotate through (default: 1000)')
+        parser.add_argument('--password', default=seeding.SEED_PASSWORD)
+        parser.add_argument('--admin-email', action='append', dest='admin_emails',
+                            help=f'Admin account, repeatable (default: {seeding.SEED_ADMIN_EMAIL})')
+        parser.add_argument('--session-length', type=int, default=20,
+                            help='Actions per session before logging in again (default: 20)')
+        parser.add_argument('--think-ms', type=float, default=0,
+                            help='Mean pause between a virtual user\'s requests (default: none)')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed for the traffic mix')
+        parser.add_argument('--label', default='', help='Name of this run in the JSON report')
+        parser.add_argument('--json', dest='json_path', help='Write the full report to this file')
+        parser.add_argument('--compare', help='JSON report of an earlier run to print deltas against')
+
+    def handle(self, *args, **options):
+        try:
+            stages = [int(stage) for stage in options['stages'].split(',') if stage.strip()]
+        except ValueError:
+            raise CommandError('--stages must be comma-separated integers')
+        if not stages or min(stages) < 1:
+            raise CommandError('--stages needs at least one positive virtual user count')
+        if not 0 <= options['admin_ratio'] <= 1:
+            raise CommandError('--admin-ratio must be between 0 and 1')
+        if options['learners'] < 1:
+            raise CommandError('--learners must be positive')
+
+        baseline = None
+        if options['compare']:
+            try:
+                with open(options['compare']) as handle:
+                    baseline = {stage['concurrency']: stage for stage in json.load(handle)['stages']}
+            except (OSError, ValueError, KeyError) as error:
+                raise CommandError(f'Cannot read {options["compare"]}: {error}')
+
+        target = options['target']
+        if target:
+            client_factory = lambda: HTTPClient(target)
+            database = None
+        else:
+            client_factory = InProcessClient
+            database = connection.vendor
+
+        load_test = LoadTest(
+            client_factory,
+            learner_emails=[f'learner{index}@{seeding.SEED_DOMAIN}' for index in range(options['learners'])],
+            admin_emails=options['admin_emails'] or [seeding.SEED_ADMIN_EMAIL],
+            password=options['password'],
+            admin_ratio=options['admin_ratio'],
+            session_length=options['session_length'],
+            think_ms=options['think_ms'],
+            random_seed=options['seed'],
+        )
+        self.stdout.write(f'Target: {target or f"in-process ({database})"}')
+
+        report = {'label': options['label'], 'target': target or 'in-process', 'database': database,
+                  'stages': []}
+        for concurrency in stages:
+            stage = load_test.run_stage(concurrency, options['stage_seconds'])
+            report['stages'].append(stage)
+            self.print_stage(stage, baseline.get(concurrency) if baseline else None)
+
+        if options['json_path']:
+            with open(options['json_path'], 'w') as handle:
+                json.dump(report, handle, indent=2)
+            self.stdout.write(f'Report written to {options["json_path"]}')
+
+        failed = sum(stage['overall']['error_rate'] > 0 for stage in report['stages'])
+        if failed:
+            self.stdout.write(self.style.WARNING(f'⚠ Server errors in {failed} stage(s)'))
+        else:
+            self.stdout.write(self.style.SUCCESS('✓ Load test finished'))
+
+    def print_stage(self, stage, baseline):
+        overall = stage['overall']
+        self.stdout.write('')
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'{stage["concurrency"]} virtual user(s), {stage["seconds"]}s: {overall["requests"]} requests, '
+            f'{overall["rps"]} req/s, p50 {overall["p50_ms"]}ms, p95 {overall["p95_ms"]}ms, '
+            f'p99 {overall["p99_ms"]}ms, errors {overall["error_rate"]:.2%}, lock errors {overall["lock_errors"]}'
+        ))
+        self.stdout.write(
+            f'  {"endpoint":<38} {"req/s":>8} {"p50":>8} {"p95":>8} {"p99":>8} {"5xx":>7} {"4xx":>7} {"locks":>6}'
+            + (f' {"Δp95":>9} {"Δreq/s":>8}' if baseline else '')
+        )
+        for endpoint, summary in stage['endpoints'].items():
+            line = (
+                f'  {endpoint:<38} {summary["rps"]:>8} {summary["p50_ms"]:>8} {summary["p95_ms"]:>8} '
+                f'{summary["p99_ms"]:>8} {summary["error_rate"]:>7.1%} {summary["client_error_rate"]:>7.1%} '
+                f'{summary["lock_errors"]:>6}'
+            )
+            before = baseline['endpoints'].get(endpoint) if baseline else None
+            if before:
+                line += (f' {summary["p95_ms"] - before["p95_ms"]:>+9.2f}'
+                         f' {summary["rps"] - before["rps"]:>+8.2f}')
+            self.stdout.write(line)
+        for endpoint, error in stage['sample_errors'].items():
+            self.stdout.write(self.style.ERROR(f'  {endpoint}: {error}'))
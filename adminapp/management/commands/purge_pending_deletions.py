@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from base.models import Course, User
+from adminapp.deletion import pending_pks, purge
+
+
+class Command(BaseCommand):
+    help = 'Hard-deletes courses and users still flagged pending_delete (resumes interrupted deletion jobs)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', choices=['course', 'user'],
+                            help='Only purge this model (default: both)')
+        parser.add_argument('--dry-run', action='store_true', help='Only report what is pending')
+
+    def handle(self, *args, **options):
+        models = [Course, User]
+        if options['model']:
+            models = [model for model in models if model._meta.model_name == options['model']]
+
+        for model in models:
+            name = model._meta.verbose_name_plural
+            pks = pending_pks(model)
+            if options['dry_run'] or not pks:
+                self.stdout.write(f'  {len(pks)} {name} pending deletion')
+                continue
+            result = purge(model, pks)
+            for label, count in sorted(result['deleted'].items()):
+                self.stdout.write(f'  {label}: {count} row(s) deleted')
+            self.stdout.write(self.style.SUCCESS(f'✓ Purged {result["targets"]} {name}'))
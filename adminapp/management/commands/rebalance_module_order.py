@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from base.models import Course
+from adminapp.module_order import rebalance
+
+
+class Command(BaseCommand):
+    help = "Renumbers each course's modules 1..N in their current order, closing gaps left by deletes"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--course', dest='course_ids', action='append', metavar='COURSE_ID',
+                            help='Only this course (repeatable; default: all courses)')
+
+    def handle(self, *args, **options):
+        courses = Course.objects.order_by('created_at')
+        if options['course_ids']:
+            courses = courses.filter(id__in=options['course_ids'])
+
+        moved = 0
+        for course_id in courses.values_list('id', flat=True).iterator():
+            moved += rebalance(course_id)
+        self.stdout.write(self.style.SUCCESS(f'✓ Renumbered {moved} module(s)'))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from adminapp.analytics import refresh_course_stats
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the materialized course analytics table from user course progress'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--course', action='append', dest='course_ids', metavar='COURSE_ID',
+            help='Only refresh this course (may be repeated)'
+        )
+
+    def handle(self, *args, **options):
+        written = refresh_course_stats(options['course_ids'])
+        self.stdout.write(self.style.SUCCESS(f'✓ Refreshed stats for {written} courses'))
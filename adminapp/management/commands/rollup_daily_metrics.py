@@ -0,0 +1,34 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from adminapp.rollups import write_daily_metrics
+
+
+class Command(BaseCommand):
+    help = (
+        'Writes the DailyMetrics rollup rows for yesterday and today. '
+        'Schedule it (e.g. hourly via cron) so closed days are final and today stays fresh.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--date', dest='day', metavar='YYYY-MM-DD',
+            help='Roll up a single day instead of yesterday and today'
+        )
+
+    def handle(self, *args, **options):
+        if options['day']:
+            try:
+                start = end = date.fromisoformat(options['day'])
+            except ValueError:
+                raise CommandError('--date must be formatted as YYYY-MM-DD')
+        else:
+            end = timezone.now().date()
+            start = end - timedelta(days=1)
+
+        written = write_daily_metrics(start, end)
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Rolled up {written} day(s) from {start.isoformat()} to {end.isoformat()}'
+        ))
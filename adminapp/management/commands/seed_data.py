@@ -0,0 +1,77 @@
+import secrets
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from base import seeding
+from adminapp.analytics import refresh_course_stats
+from adminapp.rollups import write_daily_metrics
+
+
+class Command(BaseCommand):
+    help = 'Seeds realistic volumes of users, courses, modules and progress for local load tests'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=5000)
+        parser.add_argument('--courses', type=int, default=300)
+        parser.add_argument('--modules-per-course', type=int, default=10)
+        parser.add_argument('--enrollments-per-user', type=int, default=5)
+        parser.add_argument('--labs', type=int, default=30)
+        parser.add_argument('--paths', type=int, default=15)
+        parser.add_argument('--discussions', type=int, default=1000)
+        parser.add_argument('--events', type=int, default=60)
+        parser.add_argument('--seed', type=int, default=42, help='Random seed (same seed, same data)')
+        parser.add_argument('--clear', action='store_true',
+                            help='Delete previously seeded rows first')
+        parser.add_argument('--clear-only', action='store_true',
+                            help='Delete previously seeded rows and stop')
+        parser.add_argument('--password',
+                            help=f'Password of the seeded accounts, including the superuser '
+                                 f'(default: {seeding.SEED_PASSWORD} with DEBUG, otherwise random)')
+        parser.add_argument('--allow-production', action='store_true',
+                            help='Run even though DEBUG is off')
+
+    def handle(self, *args, **options):
+        # Seeding creates a superuser, so never against a real database by accident
+        if not settings.DEBUG and not options['allow_production']:
+            raise CommandError('DEBUG is off; pass --allow-production to seed this database anyway')
+        password = options['password'] or (
+            seeding.SEED_PASSWORD if settings.DEBUG else secrets.token_urlsafe(12)
+        )
+        if min(options['users'], options['courses'], options['modules_per_course'],
+               options['enrollments_per_user']) < 0:
+            raise CommandError('Counts must not be negative')
+
+        if options['clear'] or options['clear_only']:
+            deleted = seeding.clear()
+            self.stdout.write(f'  cleared {sum(deleted.values())} seeded row(s)')
+            if options['clear_only']:
+                refresh_course_stats()
+                return
+        elif seeding.User.objects.filter(email__endswith=f'@{seeding.SEED_DOMAIN}').exists():
+            raise CommandError('Seed data already exists; pass --clear to replace it')
+
+        counts = seeding.seed(
+            users=options['users'],
+            courses=options['courses'],
+            modules_per_course=options['modules_per_course'],
+            enrollments_per_user=options['enrollments_per_user'],
+            labs=options['labs'],
+            paths=options['paths'],
+            discussions=options['discussions'],
+            events=options['events'],
+            random_seed=options['seed'],
+            log=self.stdout.write,
+            password=password,
+        )
+
+        # bulk_create bypassed the signals that maintain these
+        refresh_course_stats()
+        today = timezone.now().date()
+        write_daily_metrics(today, today)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Seeded {sum(counts.values())} row(s); learners sign in with '
+            f'learnerN@{seeding.SEED_DOMAIN} (admin: {seeding.SEED_ADMIN_EMAIL}) / {password}'
+        ))
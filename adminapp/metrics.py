@@ -0,0 +1,333 @@
+# adminapp/metrics.py
+"""
+Per-route API latency, throughput, error and DB metrics.
+
+RequestMetricsMiddleware times every request and counts the queries it ran
+(through connection.execute_wrapper) under its URL pattern, e.g.
+"GET api/admin/users/<uuid:pk>/".
+
+Recording is lock-free: each thread writes only to its own store, and
+readers merge the stores. Latencies go into log-linear buckets (8 per
+power of two, so about 9% relative error, HDR-histogram style), from which
+p50/p95/p99 are read.
+
+Each worker process writes its merged snapshot to METRICS_DIR/worker-<pid>.json
+at most every METRICS_FLUSH_INTERVAL seconds, with an atomic rename. Readers
+add up the files of live workers, so the numbers cover every gunicorn
+worker. With METRICS_DIR unset, only the current process is reported.
+"""
+import json
+import math
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection
+
+BUCKETS_PER_OCTAVE = 8
+MIN_MS = 0.1
+STALE_SECONDS = 600
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def bucket_index(ms):
+    if ms <= MIN_MS:
+        return 0
+    return int(math.log2(ms / MIN_MS) * BUCKETS_PER_OCTAVE) + 1
+
+
+def bucket_upper_ms(index):
+    return MIN_MS * 2 ** (index / BUCKETS_PER_OCTAVE)
+
+
+def new_stats():
+    return {
+        'count': 0, 'errors': 0, 'client_errors': 0,
+        'total_ms': 0.0, 'max_ms': 0.0,
+        'db_queries': 0, 'db_ms': 0.0,
+        'buckets': {},
+    }
+
+
+def merge_into(target, stats):
+    for key in ('count', 'errors', 'client_errors', 'total_ms', 'db_queries', 'db_ms'):
+        target[key] += stats[key]
+    target['max_ms'] = max(target['max_ms'], stats['max_ms'])
+    buckets = target['buckets']
+    for index, count in list(stats['buckets'].items()):
+        index = int(index)  # JSON turns the keys into strings
+        buckets[index] = buckets.get(index, 0) + count
+
+
+def quantile(stats, q):
+    """Upper bound (ms) of the bucket holding the q-th quantile"""
+    if not stats['count']:
+        return 0.0
+    rank = q * stats['count']
+    seen = 0
+    for index in sorted(stats['buckets']):
+        seen += stats['buckets'][index]
+        if seen >= rank:
+            return round(min(bucket_upper_ms(index), stats['max_ms']), 2)
+    return round(stats['max_ms'], 2)
+
+
+def summarize(stats):
+    count = stats['count']
+    return {
+        'requests': count,
+        'error_rate': round(stats['errors'] / count, 4) if count else 0.0,
+        'client_error_rate': round(stats['client_errors'] / count, 4) if count else 0.0,
+        'mean_ms': round(stats['total_ms'] / count, 2) if count else 0.0,
+        'p50_ms': quantile(stats, 0.5),
+        'p95_ms': quantile(stats, 0.95),
+        'p99_ms': quantile(stats, 0.99),
+        'max_ms': round(stats['max_ms'], 2),
+        'db_queries_per_request': round(stats['db_queries'] / count, 2) if count else 0.0,
+        'db_ms_per_request': round(stats['db_ms'] / count, 2) if count else 0.0,
+    }
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._local = threading.local()
+        self._stores = {}           # Thread -> {route: stats}; each written by its thread only
+        self._retired = {}          # Merged stores of threads that have exited
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._last_flush = 0.0
+        self.started_at = time.time()
+
+    def _store(self):
+        store = getattr(self._local, 'store', None)
+        if store is None:
+            store = self._local.store = {}
+            with self._lock:
+                self._stores[threading.current_thread()] = store
+        return store
+
+    def record(self, route, elapsed_ms, status_code, db_queries=0, db_ms=0.0):
+        store = self._store()
+        stats = store.get(route)
+        if stats is None:
+            stats = store[route] = new_stats()
+        stats['count'] += 1
+        stats['total_ms'] += elapsed_ms
+        if elapsed_ms > stats['max_ms']:
+            stats['max_ms'] = elapsed_ms
+        if status_code >= 500:
+            stats['errors'] += 1
+        elif status_code >= 400:
+            stats['client_errors'] += 1
+        stats['db_queries'] += db_queries
+        stats['db_ms'] += db_ms
+        index = bucket_index(elapsed_ms)
+        stats['buckets'][index] = stats['buckets'].get(index, 0) + 1
+
+    def snapshot(self):
+        """{route: stats} merged over this process's threads"""
+        merged = {}
+        with self._lock:
+            for thread, store in list(self._stores.items()):
+                if not thread.is_alive():
+                    # Nothing writes to a dead thread's store any more: fold it in for good
+                    for route, stats in store.items():
+                        merge_into(self._retired.setdefault(route, new_stats()), stats)
+                    del self._stores[thread]
+            stores = [self._retired] + list(self._stores.values())
+            for store in stores:
+                for route, stats in list(store.items()):
+                    merge_into(merged.setdefault(route, new_stats()), stats)
+        return merged
+
+    def reset(self):
+        with self._lock:
+            self._stores.clear()
+            self._retired = {}
+        self._local = threading.local()
+
+    # ----- cross-worker file store -----
+    def maybe_flush(self):
+        directory = metrics_dir()
+        interval = getattr(settings, 'METRICS_FLUSH_INTERVAL', 5.0)
+        if not directory or time.monotonic() - self._last_flush < interval:
+            return
+        if not self._flush_lock.acquire(blocking=False):
+            return
+        try:
+            self._last_flush = time.monotonic()
+            self.flush(directory)
+        finally:
+            self._flush_lock.release()
+
+    def flush(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'worker-{os.getpid()}.json')
+        payload = {'pid': os.getpid(), 'started_at': self.started_at, 'written_at': time.time(),
+                   'routes': self.snapshot()}
+        temp = f'{path}.tmp'
+        with open(temp, 'w') as handle:
+            json.dump(payload, handle)
+        os.replace(temp, path)
+
+
+def metrics_dir():
+    return getattr(settings, 'METRICS_DIR', None)
+
+
+def _pid_alive(pid):
+    if not isinstance(pid, int):
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def collect():
+    """
+    {route: stats} over all live workers: this process from memory, the
+    others from their files. Returns (routes, worker count).
+    """
+    routes = registry.snapshot()
+    workers = 1
+    directory = metrics_dir()
+    if directory and os.path.isdir(directory):
+        now = time.time()
+        for name in os.listdir(directory):
+            if not (name.startswith('worker-') and name.endswith('.json')):
+                continue
+            path = os.path.join(directory, name)
+            try:
+                with open(path) as handle:
+                    payload = json.load(handle)
+            except (OSError, ValueError):
+                continue
+            pid = payload.get('pid')
+            if pid == os.getpid():
+                continue
+            if not _pid_alive(pid) or now - payload.get('written_at', 0) > STALE_SECONDS:
+                continue
+            workers += 1
+            for route, stats in payload['routes'].items():
+                merge_into(routes.setdefault(route, new_stats()), stats)
+    return routes, workers
+
+
+def overall(routes):
+    total = new_stats()
+    for stats in routes.values():
+        merge_into(total, stats)
+    return total
+
+
+def api_summary():
+    """What SystemHealthView reports: totals plus the slowest routes by p95"""
+    routes, workers = collect()
+    by_route = {route: summarize(stats) for route, stats in routes.items()}
+    slowest = sorted(by_route.items(), key=lambda item: item[1]['p95_ms'], reverse=True)[:10]
+    return {
+        'workers': workers,
+        'overall': summarize(overall(routes)),
+        'slowest_routes': [{'route': route, **summary} for route, summary in slowest],
+    }
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def prometheus_text():
+    """Prometheus text exposition (0.0.4) of the merged metrics"""
+    routes, workers = collect()
+    lines = [
+        '# HELP http_requests_total Requests handled, by route and outcome.',
+        '# TYPE http_requests_total counter',
+    ]
+    for route, stats in sorted(routes.items()):
+        ok = stats['count'] - stats['errors'] - stats['client_errors']
+        for outcome, value in (('success', ok), ('client_error', stats['client_errors']),
+                               ('server_error', stats['errors'])):
+            lines.append(f'http_requests_total{{route="{_label(route)}",outcome="{outcome}"}} {value}')
+
+    lines += [
+        '# HELP http_request_duration_seconds Request latency, by route.',
+        '# TYPE http_request_duration_seconds summary',
+    ]
+    for route, stats in sorted(routes.items()):
+        label = _label(route)
+        for q in QUANTILES:
+            lines.append(
+                f'http_request_duration_seconds{{route="{label}",quantile="{q}"}} {quantile(stats, q) / 1000:.6f}'
+            )
+        lines.append(f'http_request_duration_seconds_sum{{route="{label}"}} {stats["total_ms"] / 1000:.6f}')
+        lines.append(f'http_request_duration_seconds_count{{route="{label}"}} {stats["count"]}')
+
+    lines += [
+        '# HELP http_request_db_queries_total Database queries run while handling requests.',
+        '# TYPE http_request_db_queries_total counter',
+    ]
+    for route, stats in sorted(routes.items()):
+        lines.append(f'http_request_db_queries_total{{route="{_label(route)}"}} {stats["db_queries"]}')
+    lines += [
+        '# HELP http_request_db_seconds_total Time spent in database queries while handling requests.',
+        '# TYPE http_request_db_seconds_total counter',
+    ]
+    for route, stats in sorted(routes.items()):
+        lines.append(f'http_request_db_seconds_total{{route="{_label(route)}"}} {stats["db_ms"] / 1000:.6f}')
+
+    lines += [
+        '# HELP app_metrics_workers Worker processes included in these metrics.',
+        '# TYPE app_metrics_workers gauge',
+        f'app_metrics_workers {workers}',
+    ]
+    return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+class _QueryCounter:
+    """execute_wrapper that counts queries and their time for one request"""
+    def __init__(self):
+        self.count = 0
+        self.ms = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.ms += (time.perf_counter() - started) * 1000
+
+
+def route_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return f'{request.method} <unmatched>'
+    return f'{request.method} {match.route}'
+
+
+class RequestMetricsMiddleware:
+    """Place first in MIDDLEWARE so the timing covers the whole stack"""
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        counter = _QueryCounter()
+        started = time.perf_counter()
+        status_code = 500
+        try:
+            with connection.execute_wrapper(counter):
+                response = self.get_response(request)
+            status_code = response.status_code
+            return response
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            registry.record(route_name(request), elapsed_ms, status_code, counter.count, counter.ms)
+            registry.maybe_flush()
@@ -1,8 +1,12 @@
 # adminapp/middleware.py
 
+import logging
+
 from django.utils.deprecation import MiddlewareMixin
 from base.models import UserSession
 
+logger = logging.getLogger(__name__)
+
 class AdminAuthenticationMiddleware(MiddlewareMixin):
     """
     Middleware to authenticate admin requests for DRF.
@@ -11,13 +15,11 @@ class AdminAuthenticationMiddleware(MiddlewareMixin):
     def process_request(self, request):
         # Check if request is for admin endpoints
         if request.path.startswith('/api/admin/'):
-            print(f"=== AdminAuthenticationMiddleware ===")
-            print(f"Path: {request.path}")
-            print(f"Method: {request.method}")
+            log_context = {'path': request.path, 'method': request.method}
             
             # Skip for login and logout endpoints
             if request.path in ['/api/admin/auth/login/', '/api/admin/auth/logout/']:
-                print("Skipping authentication for login/logout")
+                logger.debug('Skipping admin authentication for login/logout', extra=log_context)
                 return None
             
             # Extract token
@@ -26,15 +28,15 @@ class AdminAuthenticationMiddleware(MiddlewareMixin):
             
             if auth_header.startswith('Bearer '):
                 token = auth_header.split(' ')[1]
-                print(f"Token from Authorization header: {token[:20]}...")
+                log_context['token_source'] = 'header'
             elif 'admin_token' in request.COOKIES:
                 token = request.COOKIES.get('admin_token')
-                print(f"Token from cookie: {token[:20]}...")
+                log_context['token_source'] = 'cookie'
             
             if token:
                 try:
-                    session = UserSession.objects.get(token=token, is_active=True)
-                    print(f"Found session for user: {session.user.email}")
+                    session = UserSession.objects.select_related('user').get(token=token, is_active=True)
+                    log_context['user_id'] = str(session.user_id)
                     
                     if session.is_valid():
                         user = session.user
@@ -43,20 +45,17 @@ class AdminAuthenticationMiddleware(MiddlewareMixin):
                             request.user = user
                             request._cached_user = user  # Cache for performance
                             request.admin_session = session
-                            print(f"User set on request: {request.user.email}")
-                            print(f"Is staff: {request.user.is_staff}")
+                            logger.debug('Admin user authenticated', extra=log_context)
                         else:
-                            print(f"User {user.email} is not staff")
+                            logger.info('Non-staff user on admin endpoint', extra=log_context)
                             # Don't return response, let DRF handle it
                             request.user = user  # Still set user
                     else:
-                        print("Session invalid")
+                        logger.info('Admin session expired', extra=log_context)
                         session.invalidate()
                 except UserSession.DoesNotExist:
-                    print(f"No session found for token: {token[:20]}...")
+                    logger.info('No active session for admin token', extra=log_context)
             else:
-                print("No token found in request")
-            
-            print("===")
+                logger.debug('No admin token in request', extra=log_context)
         
         return None  # Continue to next middleware/view
\ No newline at end of file
@@ -0,0 +1,62 @@
+# Generated by Django 4.2.7 on 2026-10-19 05:48
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def populate_snapshots(apps, schema_editor):
+    Course = apps.get_model('base', 'Course')
+    UserCourseProgress = apps.get_model('base', 'UserCourseProgress')
+    CourseStatsSnapshot = apps.get_model('adminapp', 'CourseStatsSnapshot')
+
+    counts = {
+        row['course_id']: row
+        for row in UserCourseProgress.objects.order_by().values('course_id').annotate(
+            enrolled=models.Count('id'),
+            completed=models.Count('id', filter=models.Q(is_completed=True)),
+            avg_progress=models.Avg('progress_percentage'),
+        )
+    }
+    snapshots = []
+    for course_id in Course.objects.values_list('id', flat=True):
+        row = counts.get(course_id, {})
+        enrolled = row.get('enrolled', 0)
+        completed = row.get('completed', 0)
+        snapshots.append(CourseStatsSnapshot(
+            course_id=course_id,
+            enrolled_count=enrolled,
+            completed_count=completed,
+            completion_rate=(completed / enrolled * 100) if enrolled else 0.0,
+            avg_progress=round(row.get('avg_progress') or 0.0, 1),
+        ))
+    CourseStatsSnapshot.objects.bulk_create(snapshots, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0010_coursemodule_updated_at'),
+        ('adminapp', '0002_systemhealth_alter_systemconfig_options_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseStatsSnapshot',
+            fields=[
+                ('course', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats_snapshot', serialize=False, to='base.course')),
+                ('enrolled_count', models.IntegerField(default=0)),
+                ('completed_count', models.IntegerField(default=0)),
+                ('completion_rate', models.FloatField(default=0.0)),
+                ('active_learners_7d', models.IntegerField(default=0)),
+                ('active_learners_30d', models.IntegerField(default=0)),
+                ('avg_progress', models.FloatField(default=0.0)),
+                ('refreshed_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'course_stats_snapshots',
+                'indexes': [models.Index(fields=['-enrolled_count'], name='course_stat_enrolle_04b666_idx')],
+            },
+        ),
+        migrations.RunPython(populate_snapshots, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.7 on 2026-10-19 05:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adminapp', '0003_coursestatssnapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyMetrics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('signups', models.IntegerField(default=0)),
+                ('logins', models.IntegerField(default=0)),
+                ('enrollments', models.IntegerField(default=0)),
+                ('completions', models.IntegerField(default=0)),
+                ('certificates', models.IntegerField(default=0)),
+                ('discussions', models.IntegerField(default=0)),
+                ('events', models.IntegerField(default=0)),
+                ('active_users', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'daily_metrics',
+                'ordering': ['date'],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-19 05:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adminapp', '0005_auditlog_created_at_default'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='adminauditlog',
+            index=models.Index(fields=['-created_at', '-id'], name='audit_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='adminauditlog',
+            index=models.Index(fields=['admin_user', '-created_at', '-id'], name='audit_admin_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='adminauditlog',
+            index=models.Index(fields=['action', '-created_at', '-id'], name='audit_action_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='adminauditlog',
+            index=models.Index(fields=['model_name', '-created_at', '-id'], name='audit_model_created_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-19 05:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adminapp', '0006_auditlog_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='systemlog',
+            index=models.Index(fields=['-created_at', '-id'], name='syslog_created_id_idx'),
+        ),
+    ]
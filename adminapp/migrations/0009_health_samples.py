@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-19 06:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adminapp', '0008_admin_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='systemhealth',
+            name='cpu_percent',
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.AddField(
+            model_name='systemhealth',
+            name='db_latency_ms',
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.AddField(
+            model_name='systemhealth',
+            name='memory_percent',
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.AddIndex(
+            model_name='systemhealth',
+            index=models.Index(fields=['created_at'], name='system_health_created_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.7 on 2026-10-19 06:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adminapp', '0009_health_samples'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConfigGeneration',
+            fields=[
+                ('id', models.PositiveSmallIntegerField(default=1, editable=False, primary_key=True, serialize=False)),
+                ('generation', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'config_generation',
+            },
+        ),
+    ]
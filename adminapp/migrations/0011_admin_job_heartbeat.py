@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adminapp', '0010_config_generation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='adminjob',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='adminjob',
+            name='worker',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+    ]
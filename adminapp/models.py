@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 import uuid
 from base.models import User, Course, AILab  # Import from base app
 
@@ -12,21 +13,20 @@ class AdminAuditLog(models.Model):
     details = models.JSONField(default=dict)
     ip_address = models.GenericIPAddressField(null=True, blank=True)
     user_agent = models.TextField(blank=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Set when the action happens, not when the batch writer gets to it
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
     
     class Meta:
         db_table = 'admin_audit_logs'
         ordering = ['-created_at']
-
-class SystemConfig(models.Model):
-    key = models.CharField(max_length=100, unique=True)
-    value = models.JSONField()
-    description = models.TextField(blank=True)
-    updated_at = models.DateTimeField(auto_now=True)
-    updated_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
-    
-    class Meta:
-        db_table = 'system_configs'
+        # Match AuditLogView: each filter narrows first, then walks created_at/id
+        # in keyset order (newest first)
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='audit_created_id_idx'),
+            models.Index(fields=['admin_user', '-created_at', '-id'], name='audit_admin_created_idx'),
+            models.Index(fields=['action', '-created_at', '-id'], name='audit_action_created_idx'),
+            models.Index(fields=['model_name', '-created_at', '-id'], name='audit_model_created_idx'),
+        ]
 
 # Admin-specific models for managing content
 class CourseApproval(models.Model):
@@ -49,12 +49,55 @@ class CourseApproval(models.Model):
     class Meta:
         db_table = 'course_approvals'
 
+class CourseStatsSnapshot(models.Model):
+    """
+    Materialized per-course enrollment analytics. Counts are adjusted in place
+    on enrollment/completion events (see adminapp.signals); the activity and
+    average-progress columns are recomputed by refresh_course_stats().
+    """
+    course = models.OneToOneField(Course, on_delete=models.CASCADE, primary_key=True, related_name='stats_snapshot')
+    enrolled_count = models.IntegerField(default=0)
+    completed_count = models.IntegerField(default=0)
+    completion_rate = models.FloatField(default=0.0)
+    active_learners_7d = models.IntegerField(default=0)
+    active_learners_30d = models.IntegerField(default=0)
+    avg_progress = models.FloatField(default=0.0)
+    refreshed_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'course_stats_snapshots'
+        indexes = [
+            models.Index(fields=['-enrolled_count']),
+        ]
+
 from django.db import models
 import uuid
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
+class DailyMetrics(models.Model):
+    """One row of platform activity counts per calendar day (see adminapp.rollups)"""
+    date = models.DateField(unique=True)
+    signups = models.IntegerField(default=0)
+    logins = models.IntegerField(default=0)
+    enrollments = models.IntegerField(default=0)
+    completions = models.IntegerField(default=0)
+    certificates = models.IntegerField(default=0)
+    discussions = models.IntegerField(default=0)
+    events = models.IntegerField(default=0)
+    active_users = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'daily_metrics'
+        ordering = ['date']
+    
+    def __str__(self):
+        return f"Metrics for {self.date}"
+
 class SystemConfig(models.Model):
     CATEGORY_CHOICES = [
         ('general', 'General'),
@@ -99,7 +142,20 @@ class SystemConfig(models.Model):
     def __str__(self):
         return self.key
 
+class ConfigGeneration(models.Model):
+    """
+    Single-row counter bumped on every SystemConfig write. Workers poll it to
+    know when their cached config snapshot is stale (see adminapp.config).
+    """
+    id = models.PositiveSmallIntegerField(primary_key=True, default=1, editable=False)
+    generation = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'config_generation'
+
 class SystemHealth(models.Model):
+    """Downsampled health history written by adminapp.health (one row per persist window)"""
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     status = models.CharField(max_length=20, choices=[
         ('healthy', 'Healthy'),
@@ -111,6 +167,9 @@ class SystemHealth(models.Model):
     storage_usage = models.FloatField(default=0.0)
     active_users = models.IntegerField(default=0)
     api_response_time = models.FloatField(default=0.0)
+    cpu_percent = models.FloatField(default=0.0)
+    memory_percent = models.FloatField(default=0.0)
+    db_latency_ms = models.FloatField(default=0.0)
     last_backup = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     
@@ -119,15 +178,10 @@ class SystemHealth(models.Model):
         verbose_name = 'System Health'
         verbose_name_plural = 'System Health Records'
         ordering = ['-created_at']
-    
-    def save(self, *args, **kwargs):
-        # Only keep latest 100 records
-        if not self.pk:
-            # Delete old records if we have more than 100
-            old_records = SystemHealth.objects.order_by('-created_at')[100:]
-            if old_records.exists():
-                old_records.delete()
-        super().save(*args, **kwargs)
+        # Retention deletes by created_at range (see HealthSampler.persist)
+        indexes = [
+            models.Index(fields=['created_at'], name='system_health_created_idx'),
+        ]
 
 class SystemLog(models.Model):
     LOG_LEVEL_CHOICES = [
@@ -167,7 +221,46 @@ class SystemLog(models.Model):
             models.Index(fields=['level', 'created_at']),
             models.Index(fields=['category', 'created_at']),
             models.Index(fields=['user', 'created_at']),
+            models.Index(fields=['-created_at', '-id'], name='syslog_created_id_idx'),
         ]
     
     def __str__(self):
-        return f"{self.level.upper()} - {self.message[:50]}"
\ No newline at end of file
+        return f"{self.level.upper()} - {self.message[:50]}"
+
+
+class AdminJob(models.Model):
+    """A long-running admin operation executed off the request (see adminapp.jobs)"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kind = models.CharField(max_length=100)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='admin_jobs')
+    total = models.IntegerField(default=0)
+    processed = models.IntegerField(default=0)
+    result = models.JSONField(default=dict)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # Which process runs the job ("host:pid") and when it last said so, to spot orphans
+    worker = models.CharField(max_length=255, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'admin_jobs'
+        ordering = ['-created_at']
+    
+    @property
+    def progress(self):
+        if self.status == 'succeeded':
+            return 100.0
+        return round(self.processed * 100 / self.total, 1) if self.total else 0.0
+    
+    def __str__(self):
+        return f"{self.kind} ({self.status})"
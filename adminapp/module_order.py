@@ -0,0 +1,103 @@
+# adminapp/module_order.py
+"""
+Module ordering within a course.
+
+CourseModule.order is unique per course (unique_together course/order), so
+moving modules one save at a time collides with the neighbour's position.
+Every change here is applied as one transaction of two set-based UPDATEs,
+however many modules move:
+
+1. the moved rows are parked on the negatives of their target positions
+   (one UPDATE ... SET order = CASE id WHEN ... END), which cannot collide
+   with the positive positions of the rows left in place;
+2. UPDATE ... SET order = -order flips them into place.
+
+Only rows whose position actually changes are written. Positions stay dense
+(1..N) because they are shown to learners as module numbers; rebalance()
+closes gaps left by deletes.
+"""
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Max, Value, When
+
+from base.cache import invalidate_model
+from base.models import CourseModule
+
+
+class OrderError(ValueError):
+    pass
+
+
+def next_order(course_id):
+    """Position for a module appended to the course"""
+    highest = CourseModule.objects.filter(course_id=course_id).aggregate(highest=Max('order'))['highest']
+    return (highest or 0) + 1
+
+
+def _rows(course_id):
+    """[(module id, order)] in display order, locking the rows where the database supports it"""
+    return list(
+        CourseModule.objects.select_for_update().filter(course_id=course_id)
+        .order_by('order', 'created_at').values_list('id', 'order')
+    )
+
+
+def _write(changes):
+    if not changes:
+        return
+    ids = list(changes)
+    CourseModule.objects.filter(id__in=ids).update(order=Case(
+        *[When(id=module_id, then=Value(-position)) for module_id, position in changes.items()],
+        output_field=IntegerField(),
+    ))
+    CourseModule.objects.filter(id__in=ids).update(order=-F('order'))
+    invalidate_model(CourseModule)
+
+
+def _apply(ordered_ids, current):
+    changes = {
+        module_id: position
+        for position, module_id in enumerate(ordered_ids, start=1)
+        if current[module_id] != position
+    }
+    _write(changes)
+    return changes
+
+
+def set_order(course_id, module_ids):
+    """
+    Reorder a course to match module_ids, which must list each of its modules
+    exactly once. Returns {module id: new position} for the modules that moved.
+    """
+    with transaction.atomic():
+        current = dict(_rows(course_id))
+        ordered_ids = []
+        field = CourseModule._meta.pk
+        for value in module_ids:
+            try:
+                ordered_ids.append(field.to_python(value))
+            except ValidationError:
+                raise OrderError(f'Invalid module id: {value}')
+        if len(ordered_ids) != len(current) or set(ordered_ids) != set(current):
+            raise OrderError('module_ids must list every module of the course exactly once')
+        return _apply(ordered_ids, current)
+
+
+def move_module(module, position):
+    """Move one module to a 1-based position (clamped), shifting the ones in between"""
+    with transaction.atomic():
+        rows = _rows(module.course_id)
+        ordered_ids = [module_id for module_id, _ in rows]
+        ordered_ids.remove(module.id)
+        position = min(max(int(position), 1), len(ordered_ids) + 1)
+        ordered_ids.insert(position - 1, module.id)
+        changes = _apply(ordered_ids, dict(rows))
+    module.order = position
+    return changes
+
+
+def rebalance(course_id):
+    """Renumber a course's modules 1..N in their current order; returns how many moved"""
+    with transaction.atomic():
+        rows = _rows(course_id)
+        return len(_apply([module_id for module_id, _ in rows], dict(rows)))
@@ -0,0 +1,172 @@
+# adminapp/pagination.py
+"""
+Cursor (keyset) pagination shared by the admin list endpoints.
+
+Offset pagination re-reads and discards every earlier row and needs a
+COUNT(*) per page, so deep pages get slower as tables grow. A keyset page is
+one range scan on an indexed ordering, however deep: the opaque cursor holds
+the ordering values of the last row returned and the next page starts
+strictly after them. Page size is capped.
+
+Keyset pages are served when the request carries ?cursor= (empty for the
+first page). Without it, clients get the offset pages they always had (page,
+total_pages and the total), through the same component with a capped size,
+plus a next_cursor to move on with. Totals come from a COUNT cached
+separately for a short while, so they are approximate; keyset pages include
+them only with ?include_total=1.
+"""
+import base64
+import hashlib
+import json
+import math
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db.models import F, Q
+from rest_framework.exceptions import ParseError
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 200
+TOTAL_CACHE_TTL = 60
+
+
+class InvalidCursor(ParseError):
+    default_detail = 'Invalid cursor'
+
+
+class CursorPage:
+    def __init__(self, rows, per_page, next_cursor=None, page=None, total=None):
+        self.rows = rows
+        self.per_page = per_page
+        self.next_cursor = next_cursor
+        self.page = page
+        self.total = total
+
+    def data(self, collection_key, items, total_key):
+        """Response body: the serialized rows plus paging metadata"""
+        body = {collection_key: items, 'next_cursor': self.next_cursor, 'per_page': self.per_page}
+        if self.total is not None:
+            body[total_key] = self.total
+            body['total_is_approximate'] = True
+        if self.page is not None:
+            body['page'] = self.page
+            body['total_pages'] = max(math.ceil((self.total or 0) / self.per_page), 1)
+        return body
+
+
+class CursorPagination:
+    """
+    `ordering` lists attribute names (use attnames such as 'course_id' for
+    foreign keys), '-' for descending, and must end with a unique column so
+    every row has a distinct position. Nullable columns sort last.
+    """
+    def __init__(self, ordering, default_page_size=DEFAULT_PAGE_SIZE,
+                 max_page_size=MAX_PAGE_SIZE, total_cache_ttl=TOTAL_CACHE_TTL):
+        self.ordering = [(name.lstrip('-'), name.startswith('-')) for name in ordering]
+        self.default_page_size = default_page_size
+        self.max_page_size = max_page_size
+        self.total_cache_ttl = total_cache_ttl
+
+    def paginate(self, queryset, params):
+        per_page = self.page_size(params)
+        queryset = self.order(queryset)
+        total = None
+        if params.get('include_total') == '1' or 'cursor' not in params:
+            total = self.approximate_total(queryset)
+
+        if 'cursor' not in params:
+            try:
+                page = max(int(params.get('page') or 1), 1)
+            except ValueError:
+                page = 1
+            offset = (page - 1) * per_page
+            rows = list(queryset[offset:offset + per_page + 1])
+            next_cursor = self.encode(rows[per_page - 1]) if len(rows) > per_page else None
+            return CursorPage(rows[:per_page], per_page, next_cursor=next_cursor, page=page, total=total)
+
+        cursor = params.get('cursor')
+        if cursor:
+            try:
+                queryset = queryset.filter(self.after(queryset.model, self.decode(cursor)))
+            except (ValueError, TypeError, ValidationError):
+                raise InvalidCursor()
+        rows = list(queryset[:per_page + 1])
+        next_cursor = None
+        if len(rows) > per_page:
+            rows = rows[:per_page]
+            next_cursor = self.encode(rows[-1])
+        return CursorPage(rows, per_page, next_cursor=next_cursor, total=total)
+
+    def page_size(self, params):
+        try:
+            size = int(params.get('per_page', self.default_page_size))
+        except (TypeError, ValueError):
+            size = self.default_page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def order(self, queryset):
+        model = queryset.model
+        expressions = []
+        for name, descending in self.ordering:
+            if model._meta.get_field(name).null:
+                expression = F(name).desc(nulls_last=True) if descending else F(name).asc(nulls_last=True)
+            else:
+                expression = f'-{name}' if descending else name
+            expressions.append(expression)
+        return queryset.order_by(*expressions)
+
+    def after(self, model, values):
+        """Rows strictly after `values` in the ordering, as one Q"""
+        if len(values) != len(self.ordering):
+            raise InvalidCursor()
+        condition = Q(pk__in=[])
+        equal = Q()
+        for (name, descending), value in zip(self.ordering, values):
+            if value is None:
+                # Nulls sort last: nothing is strictly after a null
+                strictly_after = Q(pk__in=[])
+                same = Q(**{f'{name}__isnull': True})
+            else:
+                strictly_after = Q(**{f'{name}__{"lt" if descending else "gt"}': value})
+                if model._meta.get_field(name).null:
+                    strictly_after |= Q(**{f'{name}__isnull': True})
+                same = Q(**{name: value})
+            condition |= equal & strictly_after
+            equal &= same
+        
+        # Redundant bound on the leading column: planners (SQLite especially)
+        # only turn the OR above into an index range scan with it
+        name, descending = self.ordering[0]
+        if values[0] is not None and not model._meta.get_field(name).null:
+            condition = Q(**{f'{name}__{"lte" if descending else "gte"}': values[0]}) & condition
+        return condition
+
+    def encode(self, row):
+        values = [getattr(row, name) for name, _ in self.ordering]
+        raw = json.dumps([
+            value.isoformat() if hasattr(value, 'isoformat') else
+            value if value is None or isinstance(value, (int, float)) else str(value)
+            for value in values
+        ]).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode(self, cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded))
+        except ValueError:
+            raise InvalidCursor()
+        if not isinstance(values, list):
+            raise InvalidCursor()
+        return values
+
+    def approximate_total(self, queryset):
+        """COUNT(*) of the filtered queryset, cached for total_cache_ttl seconds"""
+        sql, params = queryset.order_by().values('pk').query.sql_with_params()
+        digest = hashlib.md5(f'{sql}|{params}'.encode()).hexdigest()
+        key = f'pagination:total:{queryset.model._meta.db_table}:{digest}'
+        total = cache.get(key)
+        if total is None:
+            total = queryset.order_by().count()
+            cache.set(key, total, self.total_cache_ttl)
+        return total
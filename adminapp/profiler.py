@@ -0,0 +1,174 @@
+# adminapp/profiler.py
+"""
+Per-request SQL profiler with N+1 detection.
+
+SQLProfilerMiddleware captures every statement a request runs (through
+connection.execute_wrapper), groups them by a normalized fingerprint
+(literals, numbers and IN lists collapsed) and flags any fingerprint run
+SQL_PROFILER_REPEAT_THRESHOLD or more times as a likely N+1. The response
+gets X-DB-Queries and X-DB-Time (ms) headers, and the request's profile is
+kept in a per-process ring buffer served by /api/admin/system/sql-profiles/.
+
+Profiling runs when SQL_PROFILER_ENABLED is on (every request) or when a
+staff user sends the SQL_PROFILER_HEADER header. Otherwise the middleware
+does one settings lookup and one header lookup and returns: no wrapper is
+installed and nothing is recorded.
+"""
+import os
+import re
+import threading
+import time
+import traceback
+import uuid
+from collections import deque
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\bIN\s*\((?:\s*(?:%s|\?|\$\d+)\s*,?)+\)', re.IGNORECASE)
+_SPACE = re.compile(r'\s+')
+_APP_DIRS = ('adminapp', 'base')
+_WRAPPER_FILES = ('metrics.py', 'profiler.py')  # execute_wrappers, not callers
+
+
+def fingerprint(sql):
+    """SQL with literals and parameter lists collapsed, so repeats of one query shape compare equal"""
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = sql.replace('%s', '?')
+    sql = _IN_LIST.sub('IN (...)', sql)
+    return _SPACE.sub(' ', sql).strip()
+
+
+def _caller():
+    """'file:line in function' of the innermost app frame that issued the query"""
+    roots = tuple(os.path.join(str(settings.BASE_DIR), app) + os.sep for app in _APP_DIRS)
+    for frame in reversed(traceback.extract_stack(limit=40)):
+        if frame.filename.startswith(roots) and os.path.basename(frame.filename) not in _WRAPPER_FILES:
+            path = os.path.relpath(frame.filename, str(settings.BASE_DIR))
+            return f'{path}:{frame.lineno} in {frame.name}'
+    return None
+
+
+class QueryProfile:
+    """execute_wrapper collecting the statements of one request"""
+    def __init__(self):
+        self.queries = []   # (fingerprint, sql, ms)
+        self.callers = {}   # fingerprint -> first app frame that issued it
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            ms = (time.perf_counter() - started) * 1000
+            key = fingerprint(sql)
+            self.queries.append((key, sql, ms))
+            if key not in self.callers:
+                self.callers[key] = _caller()
+
+    @property
+    def total_ms(self):
+        return sum(ms for _, _, ms in self.queries)
+
+    def groups(self):
+        """[{fingerprint, count, total_ms, ...}] by descending count"""
+        grouped = {}
+        for key, sql, ms in self.queries:
+            group = grouped.get(key)
+            if group is None:
+                group = grouped[key] = {'fingerprint': key, 'count': 0, 'total_ms': 0.0,
+                                        'example': sql, 'caller': self.callers.get(key)}
+            group['count'] += 1
+            group['total_ms'] += ms
+        for group in grouped.values():
+            group['total_ms'] = round(group['total_ms'], 2)
+        return sorted(grouped.values(), key=lambda group: (-group['count'], -group['total_ms']))
+
+    def summary(self, request, response, elapsed_ms, threshold):
+        groups = self.groups()
+        suspects = [group for group in groups if group['count'] >= threshold]
+        match = getattr(request, 'resolver_match', None)
+        return {
+            'id': str(uuid.uuid4()),
+            'recorded_at': timezone.now().isoformat(),
+            'method': request.method,
+            'path': request.path,
+            'route': match.route if match else None,
+            'status_code': response.status_code,
+            'duration_ms': round(elapsed_ms, 2),
+            'queries': len(self.queries),
+            'db_ms': round(self.total_ms, 2),
+            'distinct_queries': len(groups),
+            'n_plus_one': suspects,
+            'groups': groups,
+        }
+
+
+class ProfileStore:
+    """Most recent profiles of this process"""
+    def __init__(self, size=50):
+        self._profiles = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, profile):
+        with self._lock:
+            self._profiles.append(profile)
+
+    def list(self, flagged_only=False):
+        with self._lock:
+            profiles = list(self._profiles)
+        profiles.reverse()
+        if flagged_only:
+            profiles = [profile for profile in profiles if profile['n_plus_one']]
+        return profiles
+
+    def get(self, profile_id):
+        with self._lock:
+            for profile in self._profiles:
+                if profile['id'] == profile_id:
+                    return profile
+        return None
+
+    def clear(self):
+        with self._lock:
+            self._profiles.clear()
+
+
+store = ProfileStore(getattr(settings, 'SQL_PROFILER_SAMPLES', 50))
+
+
+def _requested(request):
+    header = getattr(settings, 'SQL_PROFILER_HEADER', 'X-Profile-SQL')
+    if not request.headers.get(header):
+        return False
+    return bool(getattr(request.user, 'is_staff', False))
+
+
+class SQLProfilerMiddleware:
+    """Place after the authentication middleware: the header opt-in is checked against request.user"""
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not (getattr(settings, 'SQL_PROFILER_ENABLED', False) or _requested(request)):
+            return self.get_response(request)
+
+        profile = QueryProfile()
+        started = time.perf_counter()
+        with connection.execute_wrapper(profile):
+            response = self.get_response(request)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        threshold = getattr(settings, 'SQL_PROFILER_REPEAT_THRESHOLD', 5)
+        summary = profile.summary(request, response, elapsed_ms, threshold)
+        store.add(summary)
+        response['X-DB-Queries'] = str(summary['queries'])
+        response['X-DB-Time'] = f'{summary["db_ms"]:.2f}'
+        response['X-DB-Profile'] = summary['id']
+        if summary['n_plus_one']:
+            response['X-DB-N-Plus-One'] = str(len(summary['n_plus_one']))
+        return response
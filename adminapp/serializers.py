@@ -1,4 +1,7 @@
+import logging
+
 from rest_framework import serializers
+from django.db.models import Count, Q
 from base.models import *
 from adminapp.models import *
 
@@ -12,6 +15,8 @@ from base.serializers import (
     DashboardStatsSerializer
 )
 
+logger = logging.getLogger(__name__)
+
 # Admin Auth Serializers
 class AdminLoginSerializer(serializers.Serializer):
     email = serializers.EmailField()
@@ -85,31 +90,65 @@ class AdminUserUpdateSerializer(serializers.ModelSerializer):
     
     def update(self, instance, validated_data):
         """Update user with password handling"""
-        print(f"=== AdminUserUpdateSerializer.update() ===")
-        print(f"Updating user: {instance.email}")
-        print(f"Validated data keys: {list(validated_data.keys())}")
-        
         # Handle password update
         password = validated_data.pop('password', None)
         
-        if password is not None:  # Check if password field was sent
-            if password:  # Check if password is not empty
-                print(f"Setting new password for {instance.email}")
-                instance.set_password(password)  # This hashes the password
-            else:
-                print(f"Password field empty, keeping current password")
+        if password:  # An empty password keeps the current one
+            instance.set_password(password)  # This hashes the password
         
         # Update other fields
         for attr, value in validated_data.items():
-            print(f"Setting {attr} = {value}")
             setattr(instance, attr, value)
         
         instance.save()
-        print(f"User saved successfully")
+        logger.info('Admin updated user', extra={
+            'user_id': str(instance.pk),
+            'fields': sorted(validated_data),
+            'password_changed': bool(password),
+        })
         return instance
 
 # Course Management Serializers
-class AdminCourseSerializer(serializers.ModelSerializer):
+class CourseStatsMixin:
+    """
+    Reads the counts annotated by Course.objects.with_stats() (or the snapshot
+    table via adminapp.analytics.with_snapshot_stats) and the approval row
+    joined by with_approval(). Un-annotated instances (single-object use) read
+    the course's snapshot row, or one live aggregate when it has none yet.
+    """
+    def _course_counts(self, obj):
+        if getattr(obj, 'enrolled_count', None) is None:
+            try:
+                snapshot = obj.stats_snapshot
+                obj.enrolled_count = snapshot.enrolled_count
+                obj.completed_count = snapshot.completed_count
+            except CourseStatsSnapshot.DoesNotExist:
+                counts = UserCourseProgress.objects.filter(course=obj).aggregate(
+                    enrolled=Count('id'),
+                    completed=Count('id', filter=Q(is_completed=True))
+                )
+                obj.enrolled_count = counts['enrolled']
+                obj.completed_count = counts['completed']
+        return obj.enrolled_count, obj.completed_count
+
+    def _modules_count(self, obj):
+        if getattr(obj, 'modules_count', None) is None:
+            obj.modules_count = CourseModule.objects.filter(course=obj).count()
+        return obj.modules_count
+
+    def _completion_rate(self, obj):
+        enrolled, completed = self._course_counts(obj)
+        if enrolled == 0:
+            return 0
+        return (completed / enrolled) * 100
+
+    def _approval_status(self, obj, default):
+        try:
+            return obj.courseapproval.status
+        except CourseApproval.DoesNotExist:
+            return default
+
+class AdminCourseSerializer(CourseStatsMixin, serializers.ModelSerializer):
     approval_status = serializers.SerializerMethodField()
     enrolled_users = serializers.SerializerMethodField()
     completion_rate = serializers.SerializerMethodField()
@@ -121,21 +160,13 @@ class AdminCourseSerializer(serializers.ModelSerializer):
                  'approval_status', 'enrolled_users', 'completion_rate']
     
     def get_approval_status(self, obj):
-        try:
-            approval = CourseApproval.objects.get(course=obj)
-            return approval.status
-        except CourseApproval.DoesNotExist:
-            return 'not_required'
+        return self._approval_status(obj, 'not_required')
     
     def get_enrolled_users(self, obj):
-        return UserCourseProgress.objects.filter(course=obj).count()
+        return self._course_counts(obj)[0]
     
     def get_completion_rate(self, obj):
-        total_enrolled = UserCourseProgress.objects.filter(course=obj).count()
-        if total_enrolled == 0:
-            return 0
-        completed = UserCourseProgress.objects.filter(course=obj, is_completed=True).count()
-        return (completed / total_enrolled) * 100
+        return self._completion_rate(obj)
 
 # Audit Log Serializer
 class AuditLogSerializer(serializers.ModelSerializer):
@@ -149,14 +180,15 @@ class AuditLogSerializer(serializers.ModelSerializer):
                  'user_agent', 'created_at']
         read_only_fields = fields
 
-# System Config Serializer
-class SystemConfigSerializer(serializers.ModelSerializer):
-    updated_by_name = serializers.CharField(source='updated_by.full_name', read_only=True)
+# Admin Job Serializer
+class AdminJobSerializer(serializers.ModelSerializer):
+    progress = serializers.FloatField(read_only=True)
     
     class Meta:
-        model = SystemConfig
-        fields = ['key', 'value', 'description', 'updated_by_name', 'updated_at']
-        read_only_fields = ['updated_by_name', 'updated_at']
+        model = AdminJob
+        fields = ['id', 'kind', 'status', 'total', 'processed', 'progress',
+                 'result', 'error', 'created_at', 'started_at', 'finished_at']
+        read_only_fields = fields
 
 # Statistics Serializers
 class AdminDashboardStatsSerializer(serializers.Serializer):
@@ -204,7 +236,7 @@ class CourseCreateUpdateSerializer(serializers.ModelSerializer):
         
         return super().create(validated_data)
 
-class CourseDetailSerializer(serializers.ModelSerializer):
+class CourseDetailSerializer(CourseStatsMixin, serializers.ModelSerializer):
     """Detailed course serializer for admin"""
     enrolled_students = serializers.SerializerMethodField()
     modules_count = serializers.SerializerMethodField()
@@ -222,24 +254,16 @@ class CourseDetailSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at']
     
     def get_enrolled_students(self, obj):
-        return UserCourseProgress.objects.filter(course=obj).count()
+        return self._course_counts(obj)[0]
     
     def get_modules_count(self, obj):
-        return CourseModule.objects.filter(course=obj).count()
+        return self._modules_count(obj)
     
     def get_completion_rate(self, obj):
-        total = UserCourseProgress.objects.filter(course=obj).count()
-        if total == 0:
-            return 0
-        completed = UserCourseProgress.objects.filter(course=obj, is_completed=True).count()
-        return round((completed / total) * 100, 1)
+        return round(self._completion_rate(obj), 1)
     
     def get_approval_status(self, obj):
-        try:
-            approval = CourseApproval.objects.get(course=obj)
-            return approval.status
-        except CourseApproval.DoesNotExist:
-            return 'approved'  # Default for existing courses
+        return self._approval_status(obj, 'approved')  # Default for existing courses
 
 # Admin-specific Course Module Serializer
 class AdminCourseModuleSerializer(serializers.ModelSerializer):
@@ -322,7 +346,11 @@ class CommunityEventSerializer(serializers.ModelSerializer):
         ]
     
     def get_current_attendees(self, obj):
-        return obj.attendees.count()
+        # Lists annotate attendees_count; fall back to a COUNT for single objects
+        attendees_count = getattr(obj, 'attendees_count', None)
+        if attendees_count is None:
+            attendees_count = obj.attendees.count()
+        return attendees_count
 
 class CommunityStatsSerializer(serializers.Serializer):
     total_discussions = serializers.IntegerField()
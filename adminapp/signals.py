@@ -0,0 +1,37 @@
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from base.models import UserCourseProgress
+from adminapp.analytics import adjust_course_stats
+
+
+@receiver(post_init, sender=UserCourseProgress)
+def remember_completion_state(sender, instance, **kwargs):
+    # Read from __dict__ so deferred loads never trigger a query
+    instance._was_completed = instance.__dict__.get('is_completed', False)
+
+
+@receiver(post_save, sender=UserCourseProgress)
+def update_course_stats_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    was_completed = instance._was_completed
+    completed_delta = int(instance.is_completed) - int(was_completed and not created)
+    if created or completed_delta:
+        adjust_course_stats(
+            instance.course_id,
+            enrolled=1 if created else 0,
+            completed=completed_delta,
+        )
+    instance._was_completed = instance.is_completed
+
+
+@receiver(post_delete, sender=UserCourseProgress)
+def update_course_stats_on_delete(sender, instance, **kwargs):
+    # A course delete removes its snapshot before the progress rows; do not recreate it
+    adjust_course_stats(
+        instance.course_id,
+        enrolled=-1,
+        completed=-1 if instance.is_completed else 0,
+        refresh_missing=False,
+    )
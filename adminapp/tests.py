@@ -1,3 +1,1472 @@
+import io
+import json
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLResolver
+from django.utils import timezone
+
+from base.models import (
+    User, UserSession, Course, CourseModule, UserCourseProgress,
+    Discussion, DiscussionReply, CommunityEvent, EventAttendance, LearningPath, PathCourse,
+    Certificate, UserModuleProgress
+)
+from adminapp.models import (
+    AdminAuditLog, AdminJob, CourseApproval, CourseStatsSnapshot, DailyMetrics, SystemHealth, SystemLog
+)
+from adminapp.analytics import refresh_course_stats, time_series, cumulative_series
+from adminapp.rollups import compute_daily_metrics, metric_total, rollup_series
+from adminapp.pagination import CursorPagination
+from adminapp.config import ConfigRegistry, bump_generation, system_config
+
+
+class AdminFixtureMixin:
+    """A superuser (cls.admin) and a bearer token for it (cls.token), made in setUpTestData"""
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.admin = User.objects.create_superuser(
+            email='admin@example.com', full_name='Admin', password='Admin123!'
+        )
+        cls.token = UserSession.create_session(cls.admin).token
+
+
+class QueryBudgetMixin:
+    """
+    Assertions that keep a block of code or an endpoint under a fixed number
+    of SQL queries. Budgets are constants, so any per-row query (N+1) blows
+    through them as soon as the fixture holds more rows than the budget.
+    """
+    @contextmanager
+    def assertQueryBudget(self, max_queries, label='Block'):
+        with CaptureQueriesContext(connection) as context:
+            yield context
+        executed = len(context.captured_queries)
+        if executed > max_queries:
+            statements = '\n'.join(query['sql'] for query in context.captured_queries)
+            self.fail(
+                f'{label} ran {executed} queries, budget is {max_queries}:\n{statements}'
+            )
+
+    def assertEndpointWithinBudget(self, url, max_queries, token, params=None):
+        return self.assertRequestWithinBudget('GET', url, max_queries, token, data=params or {})
+
+    def assertRequestWithinBudget(self, method, url, max_queries, token=None, status_code=200,
+                                  data=None, max_seconds=2.0, content_type='application/json'):
+        """
+        Call an endpoint (streamed bodies included) under a query and wall-clock
+        budget. content_type=None sends POST data as multipart.
+        """
+        # Load or re-poll the config registry outside the budget; workers keep it warm
+        system_config.snapshot()
+        headers = {'HTTP_AUTHORIZATION': f'Bearer {token}'} if token else {}
+        call = getattr(self.client, method.lower())
+        label = f'{method} {url}'
+        with self.assertQueryBudget(max_queries, label=label):
+            started = time.perf_counter()
+            if method == 'GET' or content_type is None:
+                response = call(url, data, **headers)
+            else:
+                response = call(url, data, content_type=content_type, **headers)
+            body = b''.join(response.streaming_content) if response.streaming else response.content
+            elapsed = time.perf_counter() - started
+        self.assertEqual(response.status_code, status_code, f'{label}: {body[:500]}')
+        self.assertLessEqual(elapsed, max_seconds, f'{label} took {elapsed:.2f}s')
+        return response
+
+    def assertRoutesCovered(self, urlconf, exercised, exempt=()):
+        """Fail for routes of `urlconf` that no budget exercised, so new endpoints get one"""
+        missing = route_names(urlconf.urlpatterns) - set(exercised) - set(exempt)
+        self.assertFalse(missing, f'Routes without a query budget: {sorted(missing)}')
+
+
+def route_names(patterns):
+    """Names of every route in a urlconf, including those of included routers"""
+    names = set()
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            names |= route_names(pattern.url_patterns)
+        elif pattern.name:
+            names.add(pattern.name)
+    return names
+
+
+class AdminListQueryBudgetTests(AdminFixtureMixin, QueryBudgetMixin, TestCase):
+    """Every admin list endpoint must cost the same number of queries for any page size"""
+    ROWS = 25
+    BUDGET = 10
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        learners = User.objects.bulk_create([
+            User(email=f'learner{i}@example.com', full_name=f'Learner {i}', password='!')
+            for i in range(cls.ROWS)
+        ])
+        courses = Course.objects.bulk_create([
+            Course(title=f'Course {i}', description='Description', category='ml')
+            for i in range(cls.ROWS)
+        ])
+        cls.course = courses[0]
+        CourseModule.objects.bulk_create([
+            CourseModule(course=course, title=f'Module {order}', order=order)
+            for course in courses
+            for order in range(1, 4)
+        ])
+        CourseModule.objects.bulk_create([
+            CourseModule(course=cls.course, title=f'Extra {order}', order=order)
+            for order in range(4, cls.ROWS + 4)
+        ])
+        UserCourseProgress.objects.bulk_create([
+            UserCourseProgress(user=learner, course=course, is_completed=(i % 2 == 0))
+            for i, learner in enumerate(learners)
+            for course in courses[:3]
+        ])
+        # bulk_create bypasses the snapshot signals, so rebuild like the command does
+        refresh_course_stats()
+        CourseApproval.objects.bulk_create([
+            CourseApproval(course=course, status='pending') for course in courses[::2]
+        ])
+        Discussion.objects.bulk_create([
+            Discussion(title=f'Topic {i}', content='Content', author=learner, course=cls.course)
+            for i, learner in enumerate(learners)
+        ])
+        events = CommunityEvent.objects.bulk_create([
+            CommunityEvent(title=f'Event {i}', description='Description',
+                           event_type='workshop', host=cls.admin)
+            for i in range(cls.ROWS)
+        ])
+        EventAttendance.objects.bulk_create([
+            EventAttendance(event=event, user=learner)
+            for event in events
+            for learner in learners[:2]
+        ])
+        AdminAuditLog.objects.bulk_create([
+            AdminAuditLog(admin_user=cls.admin, action='course_created', model_name='Course')
+            for _ in range(cls.ROWS)
+        ])
+        SystemLog.objects.bulk_create([
+            SystemLog(message=f'Log {i}', user=learner) for i, learner in enumerate(learners)
+        ])
+
+    def assertListWithinBudget(self, url, collection_key):
+        response = self.assertEndpointWithinBudget(
+            url, self.BUDGET, self.token, {'per_page': self.ROWS}
+        )
+        self.assertGreaterEqual(len(response.json()[collection_key]), self.BUDGET)
+        return response
+
+    def test_users_list(self):
+        self.assertListWithinBudget('/api/admin/users/', 'users')
+
+    def test_courses_list(self):
+        response = self.assertListWithinBudget('/api/admin/courses/', 'courses')
+        first = next(c for c in response.json()['courses'] if c['id'] == str(self.course.id))
+        self.assertEqual(first['enrolled_students'], self.ROWS)
+        self.assertEqual(first['modules_count'], self.ROWS + 3)
+        self.assertEqual(first['completion_rate'], 52.0)
+        self.assertEqual(first['approval_status'], 'pending')
+
+    def test_modules_list(self):
+        self.assertListWithinBudget('/api/admin/modules/', 'modules')
+
+    def test_course_modules_list(self):
+        self.assertListWithinBudget(f'/api/admin/courses/{self.course.id}/modules/', 'modules')
+
+    def test_discussions_list(self):
+        self.assertListWithinBudget('/api/admin/community/discussions/', 'discussions')
+
+    def test_events_list(self):
+        response = self.assertListWithinBudget('/api/admin/community/events/', 'events')
+        self.assertEqual(response.json()['events'][0]['current_attendees'], 2)
+
+    def test_audit_logs_list(self):
+        self.assertListWithinBudget('/api/admin/system/audit-logs/', 'logs')
+
+    def test_system_logs_list(self):
+        self.assertListWithinBudget('/api/admin/system/logs/', 'logs')
+
+
+class CourseStatsSnapshotTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.course = Course.objects.create(title='Course', description='Description', category='ml')
+        cls.learners = User.objects.bulk_create([
+            User(email=f'learner{i}@example.com', full_name=f'Learner {i}', password='!')
+            for i in range(3)
+        ])
+
+    def snapshot(self):
+        return CourseStatsSnapshot.objects.get(course=self.course)
+
+    def test_enrollment_and_completion_events_update_snapshot(self):
+        progress = [
+            UserCourseProgress.objects.create(user=learner, course=self.course)
+            for learner in self.learners
+        ]
+        self.assertEqual(self.snapshot().enrolled_count, 3)
+
+        progress[0].is_completed = True
+        progress[0].save()
+        progress[0].save()  # Re-saving a completed row must not count twice
+        snapshot = self.snapshot()
+        self.assertEqual(snapshot.completed_count, 1)
+        self.assertAlmostEqual(snapshot.completion_rate, 100 / 3)
+
+        progress[0].delete()
+        snapshot = self.snapshot()
+        self.assertEqual((snapshot.enrolled_count, snapshot.completed_count), (2, 0))
+        self.assertEqual(snapshot.completion_rate, 0)
+
+    def test_rebuild_matches_incremental_counts(self):
+        for i, learner in enumerate(self.learners):
+            UserCourseProgress.objects.create(
+                user=learner, course=self.course, is_completed=(i == 0), progress_percentage=50
+            )
+        incremental = self.snapshot()
+        refresh_course_stats()
+        rebuilt = self.snapshot()
+        self.assertEqual(rebuilt.enrolled_count, incremental.enrolled_count)
+        self.assertEqual(rebuilt.completed_count, incremental.completed_count)
+        self.assertAlmostEqual(rebuilt.completion_rate, incremental.completion_rate)
+        self.assertEqual(rebuilt.active_learners_7d, 3)
+        self.assertEqual(rebuilt.avg_progress, 50.0)
+
+    def test_deleting_a_course_with_enrollments(self):
+        for learner in self.learners:
+            UserCourseProgress.objects.create(user=learner, course=self.course)
+
+        self.course.delete()
+
+        # Progress rows are deleted after the snapshot; they must not recreate it
+        self.assertFalse(CourseStatsSnapshot.objects.filter(course_id=self.course.id).exists())
+        connection.check_constraints()
+
+
+class TimeSeriesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.today = timezone.now().date()
+        users = User.objects.bulk_create([
+            User(email=f'user{i}@example.com', full_name=f'User {i}', password='!')
+            for i in range(10)
+        ])
+        # One signup per day for the last ten days, plus today
+        for days_ago, user in enumerate(users):
+            User.objects.filter(pk=user.pk).update(
+                created_at=timezone.now() - timedelta(days=days_ago)
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_daily_buckets_match_per_day_counts(self):
+        start = self.today - timedelta(days=13)
+        series = time_series('signups', User.objects.all(), 'created_at', start, self.today)
+        self.assertEqual(len(series), 14)
+        for point in series:
+            expected = User.objects.filter(created_at__date=point['date']).count()
+            self.assertEqual(point['count'], expected, point['date'])
+
+    def test_closed_buckets_are_served_from_cache(self):
+        start = self.today - timedelta(days=6)
+        # One GROUP BY for the buckets plus the baseline count
+        with self.assertNumQueries(2):
+            first = cumulative_series('signups', User.objects.all(), 'created_at', start, self.today)
+        # Only the open (today) bucket is recomputed
+        with self.assertNumQueries(1):
+            second = cumulative_series('signups', User.objects.all(), 'created_at', start, self.today)
+        self.assertEqual(first, second)
+        self.assertEqual(second[-1]['count'], 10)
+
+    def test_bulk_user_deletes_invalidate_closed_buckets(self):
+        from adminapp.deletion import CascadeDeleter
+
+        start = self.today - timedelta(days=6)
+        cumulative_series('signups', User.objects.all(), 'created_at', start, self.today)
+        doomed = User.objects.filter(created_at__date=self.today - timedelta(days=3))
+        CascadeDeleter(User).delete(list(doomed.values_list('pk', flat=True)))
+
+        series = cumulative_series('signups', User.objects.all(), 'created_at', start, self.today)
+        self.assertEqual(series[-1]['count'], 9)
+
+    def test_weekly_buckets_sum_to_total(self):
+        start = self.today - timedelta(days=20)
+        series = time_series(
+            'signups', User.objects.all(), 'created_at', start, self.today, granularity='week'
+        )
+        self.assertEqual(sum(point['count'] for point in series), 10)
+
+    def test_analytics_view_accepts_range_and_granularity(self):
+        admin = User.objects.create_superuser(
+            email='admin@example.com', full_name='Admin', password='Admin123!'
+        )
+        auth = {'HTTP_AUTHORIZATION': f'Bearer {UserSession.create_session(admin).token}'}
+        start = (self.today - timedelta(days=60)).isoformat()
+
+        response = self.client.get(
+            '/api/admin/analytics/', {'start': start, 'granularity': 'month'}, **auth
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['user_growth'][-1]['count'], 11)
+
+        response = self.client.get('/api/admin/analytics/', {'granularity': 'hour'}, **auth)
+        self.assertEqual(response.status_code, 400)
+
+
+class DailyMetricsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.today = timezone.now().date()
+        users = User.objects.bulk_create([
+            User(email=f'user{i}@example.com', full_name=f'User {i}', password='!')
+            for i in range(6)
+        ])
+        sessions = []
+        for days_ago, user in enumerate(users):
+            User.objects.filter(pk=user.pk).update(
+                created_at=timezone.now() - timedelta(days=days_ago)
+            )
+            # Two logins by the same user count once towards active users
+            sessions += [
+                UserSession(user=user, token=f'{user.pk}-{n}', expires_at=timezone.now())
+                for n in range(2)
+            ]
+        for session in UserSession.objects.bulk_create(sessions):
+            days_ago = users.index(session.user)
+            UserSession.objects.filter(pk=session.pk).update(
+                created_at=timezone.now() - timedelta(days=days_ago)
+            )
+
+    def test_compute_matches_live_counts(self):
+        start = self.today - timedelta(days=6)
+        with self.assertNumQueries(8):  # One GROUP BY per metric
+            rows = compute_daily_metrics(start, self.today)
+        self.assertEqual(len(rows), 7)
+        self.assertEqual([row.signups for row in rows], [0, 1, 1, 1, 1, 1, 1])
+        self.assertEqual([row.logins for row in rows], [0, 2, 2, 2, 2, 2, 2])
+        self.assertEqual([row.active_users for row in rows], [0, 1, 1, 1, 1, 1, 1])
+
+    def test_totals_read_closed_days_from_rollups(self):
+        start = self.today - timedelta(days=5)
+        self.assertEqual(metric_total('signups', start, self.today), 6)
+
+        call_command('backfill_daily_metrics', stdout=open('/dev/null', 'w'))
+        # Rollup rows are authoritative for closed days
+        DailyMetrics.objects.filter(date=start).update(signups=10)
+        with self.assertNumQueries(2):
+            self.assertEqual(metric_total('signups', start, self.today), 15)
+
+    def test_series_buckets_sum_daily_rows(self):
+        call_command('rollup_daily_metrics', stdout=open('/dev/null', 'w'))
+        series = rollup_series(self.today - timedelta(days=40), self.today, 'month')
+        self.assertEqual(sum(point['signups'] for point in series), 6)
+        self.assertEqual(sum(point['logins'] for point in series), 12)
+
+
+class DashboardStatsTests(AdminFixtureMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        User.objects.filter(pk=cls.admin.pk).update(last_login=timezone.now())
+        Course.objects.bulk_create([
+            Course(title=f'Course {i}', description='Description', category='ml',
+                   is_active=(i != 0))
+            for i in range(3)
+        ])
+
+    def setUp(self):
+        cache.clear()
+
+    def test_stats_use_one_query_and_are_cached(self):
+        from adminapp.utils import AdminStatsCalculator
+
+        with self.assertNumQueries(1):
+            stats = AdminStatsCalculator.get_dashboard_stats()
+        self.assertEqual(stats['total_users'], 1)
+        self.assertEqual(stats['active_users_today'], 1)
+        self.assertEqual(stats['total_active_courses'], 2)
+        self.assertEqual(stats['engagement_rate'], 100.0)
+
+        Course.objects.update(is_active=True)
+        with self.assertNumQueries(0):
+            self.assertEqual(AdminStatsCalculator.get_dashboard_stats()['total_courses'], 2)
+        self.assertEqual(AdminStatsCalculator.get_dashboard_stats(fresh=True)['total_courses'], 3)
+
+    def test_stale_stats_served_while_another_caller_refreshes(self):
+        from adminapp.utils import AdminStatsCalculator
+        from base.cache import get_version, make_key
+
+        AdminStatsCalculator.get_dashboard_stats()
+        key = make_key('admin_stats', ('dashboard',), get_version('admin_stats'))
+        entry = cache.get(key)
+        entry['fresh_until'] = 0
+        cache.set(key, entry)
+        Course.objects.update(is_active=True)
+
+        cache.add(f'{key}:refresh', True)  # Another caller is refreshing
+        with self.assertNumQueries(0):
+            self.assertEqual(AdminStatsCalculator.get_dashboard_stats()['total_courses'], 2)
+        cache.delete(f'{key}:refresh')
+        with self.assertNumQueries(1):
+            self.assertEqual(AdminStatsCalculator.get_dashboard_stats()['total_courses'], 3)
+        self.assertIsNone(cache.get(f'{key}:refresh'))
+
+
+class StructuredLoggingTests(TestCase):
+    def test_tokens_and_sensitive_fields_are_redacted(self):
+        import json
+        import logging
+        from adminapp.log import JSONFormatter, RedactingFilter
+
+        record = logging.LogRecord(
+            'adminapp.middleware', logging.INFO, __file__, 1,
+            'Header was %s', ('Bearer eyJhbGciOi.eyJ1c2VyIjox.c2lnbmF0dXJl',), None
+        )
+        record.password = 'Secret123!'
+        record.payload = {'email': 'a@example.com', 'token': 'abc'}
+        RedactingFilter().filter(record)
+        line = json.loads(JSONFormatter().format(record))
+
+        self.assertEqual(line['message'], 'Header was Bearer [REDACTED]')
+        self.assertEqual(line['password'], '[REDACTED]')
+        self.assertEqual(line['payload'], {'email': 'a@example.com', 'token': '[REDACTED]'})
+        self.assertEqual(line['logger'], 'adminapp.middleware')
+
+    def test_module_levels_override_the_default(self):
+        from adminapp.log import build_logging_config
+
+        config = build_logging_config('INFO', 'adminapp.middleware=debug, django.db=WARNING')
+        self.assertEqual(config['loggers']['adminapp.middleware']['level'], 'DEBUG')
+        self.assertEqual(config['loggers']['django.db']['level'], 'WARNING')
+        self.assertEqual(config['loggers']['adminapp']['level'], 'INFO')
+
+    def test_listener_starts_on_first_record(self):
+        import logging
+        from adminapp.log import QueueListenerHandler
+
+        written = []
+        target = logging.Handler()
+        target.emit = written.append
+        handler = QueueListenerHandler([target])
+        self.addCleanup(handler.close)
+        self.assertIsNone(handler.listener._thread)
+
+        handler.handle(logging.LogRecord('adminapp', logging.WARNING, __file__, 1, 'Hello', (), None))
+        self.assertIsNotNone(handler.listener._thread)
+        handler.stop()
+        self.assertEqual([record.getMessage() for record in written], ['Hello'])
+
+
+class AuditPipelineTests(AdminFixtureMixin, TestCase):
+    def setUp(self):
+        import tempfile
+        from adminapp.audit import AuditPipeline
+
+        spool_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(spool_dir.cleanup)
+        self.pipeline = AuditPipeline(batch_size=10, spool_path=f'{spool_dir.name}/spool.jsonl')
+
+    def entries(self, count):
+        return [
+            AdminAuditLog(admin_user=self.admin, action='course_created', model_name='Course',
+                          object_id=str(i), details={'n': i})
+            for i in range(count)
+        ]
+
+    def test_batches_are_written_with_one_insert(self):
+        with self.assertNumQueries(1):
+            self.assertTrue(self.pipeline.flush(self.entries(5)))
+        self.assertEqual(AdminAuditLog.objects.count(), 5)
+        metrics = self.pipeline.metrics()
+        self.assertEqual((metrics['written'], metrics['flushes']), (5, 1))
+
+    def test_failed_flush_spools_and_replays(self):
+        from unittest import mock
+        from django.db import OperationalError
+
+        batch = self.entries(3)
+        with mock.patch.object(
+            AdminAuditLog.objects, 'bulk_create', side_effect=OperationalError('database is locked')
+        ), self.assertLogs('adminapp.audit', 'ERROR'):
+            self.assertFalse(self.pipeline.flush(batch))
+        self.assertEqual(AdminAuditLog.objects.count(), 0)
+        self.assertEqual(self.pipeline.metrics()['spooled'], 3)
+
+        self.assertEqual(self.pipeline.replay_spool(), 3)
+        replayed = AdminAuditLog.objects.get(object_id='1')
+        self.assertEqual(replayed.created_at, batch[1].created_at)
+        self.assertEqual(replayed.details, {'n': 1})
+
+    def test_bad_lines_are_moved_aside_and_outages_keep_the_spool(self):
+        import os
+        from unittest import mock
+        from django.db import OperationalError
+        from adminapp.audit import to_spool_line
+
+        with open(self.pipeline.spool_path, 'w') as spool:
+            spool.write(to_spool_line(self.entries(1)[0]) + '\n{"truncated\n')
+
+        with mock.patch.object(
+            AdminAuditLog.objects, 'bulk_create', side_effect=OperationalError('database is locked')
+        ), self.assertLogs('adminapp.audit', 'WARNING'):
+            self.assertEqual(self.pipeline.replay_spool(), 0)
+        self.assertEqual(AdminAuditLog.objects.count(), 0)
+
+        with open(self.pipeline.rejected_path) as rejected:
+            self.assertEqual(rejected.read(), '{"truncated\n')
+
+        self.pipeline._spool(self.entries(2))  # Appended while the first lines are claimed
+        self.assertEqual(self.pipeline.replay_spool(), 3)
+        self.assertEqual(AdminAuditLog.objects.count(), 3)
+        self.assertEqual(self.pipeline.replay_spool(), 0)
+        self.assertFalse(os.path.exists(self.pipeline.spool_path))
+
+
+class AuditLogStorageTests(AdminFixtureMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        now = timezone.now()
+        # Seven rows share a timestamp so the id tie-breaker matters
+        AdminAuditLog.objects.bulk_create([
+            AdminAuditLog(admin_user=cls.admin, action='user_updated', model_name='User',
+                          object_id=str(i), created_at=now - timedelta(days=i // 7 * 40))
+            for i in range(21)
+        ])
+
+    def get(self, url, params=None):
+        return self.client.get(url, params or {}, HTTP_AUTHORIZATION=f'Bearer {self.token}')
+
+    def test_keyset_pages_cover_every_row_once(self):
+        seen, cursor = [], ''
+        while cursor is not None:
+            body = self.get('/api/admin/system/audit-logs/', {'cursor': cursor, 'per_page': 5}).json()
+            seen += [log['id'] for log in body['logs']]
+            cursor = body['next_cursor']
+        self.assertEqual(len(seen), 21)
+        self.assertEqual(len(set(seen)), 21)
+
+        response = self.get('/api/admin/system/audit-logs/', {'cursor': 'garbage'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_malformed_filters_are_rejected(self):
+        for url in ('/api/admin/system/audit-logs/', '/api/admin/system/audit-logs/export/'):
+            response = self.get(url, {'admin_user_id': 'garbage'})
+            self.assertEqual((response.status_code, response.json()), (400, {'error': 'admin_user_id must be a UUID'}))
+            self.assertEqual(self.get(url, {'start_date': '2024-13-01'}).status_code, 400)
+        response = self.get('/api/admin/system/audit-logs/', {'admin_user_id': str(self.admin.id)})
+        self.assertEqual(response.json()['total_logs'], 21)
+
+    def test_archive_moves_old_rows_and_export_streams_them(self):
+        import tempfile
+        from adminapp.audit import archive_audit_logs, iter_archived_audit_logs
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        with self.settings(AUDIT_LOG_ARCHIVE_DIR=directory.name):
+            self.assertEqual(archive_audit_logs(30, batch_size=4), 14)
+            self.assertEqual(AdminAuditLog.objects.count(), 7)
+            self.assertEqual(len(list(iter_archived_audit_logs())), 14)
+
+            response = self.get('/api/admin/system/audit-logs/export/', {'include_archived': '1'})
+            lines = b''.join(response.streaming_content).decode().splitlines()
+            dataset = self.get('/api/admin/export/audit-logs/', {'include_archived': '1', 'file_format': 'jsonl'})
+            # Plus the audit row recording this export
+            self.assertEqual(b''.join(dataset.streaming_content).decode().splitlines()[:21], lines)
+        self.assertEqual(len(lines), 21)
+        self.assertEqual(len({json.loads(line)['id'] for line in lines}), 21)
+        self.assertIsInstance(json.loads(lines[0])['details'], dict)
+
+
+class CursorPaginationTests(AdminFixtureMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        now = timezone.now()
+        # Nullable ordering column with ties and NULLs, which must sort last
+        CommunityEvent.objects.bulk_create([
+            CommunityEvent(title=f'Event {i}', description='Description', event_type='meetup',
+                           host=cls.admin, start_date=None if i % 4 == 0 else now + timedelta(days=i % 3))
+            for i in range(23)
+        ])
+
+    def setUp(self):
+        cache.clear()  # Totals are cached by query
+
+    def get(self, params):
+        return self.client.get(
+            '/api/admin/community/events/', params, HTTP_AUTHORIZATION=f'Bearer {self.token}'
+        ).json()
+
+    def test_cursor_walk_matches_full_ordering(self):
+        seen, cursor = [], ''
+        while cursor is not None:
+            body = self.get({'per_page': 4, 'cursor': cursor})
+            seen += [event['id'] for event in body['events']]
+            cursor = body['next_cursor']
+        expected = CursorPagination(['start_date', 'id']).order(CommunityEvent.objects.all())
+        self.assertEqual(seen, [event.id for event in expected])
+
+    def test_page_size_is_capped_and_totals_are_optional(self):
+        body = self.get({'per_page': 5000, 'cursor': ''})
+        self.assertEqual(body['per_page'], 200)
+        self.assertNotIn('total_events', body)
+
+        body = self.get({'per_page': 10, 'cursor': '', 'include_total': '1'})
+        self.assertEqual(body['total_events'], 23)
+        self.assertTrue(body['total_is_approximate'])
+
+    def test_requests_without_a_cursor_keep_offset_pages(self):
+        body = self.get({'per_page': 10})
+        self.assertEqual((body['page'], body['total_pages'], body['total_events']), (1, 3, 23))
+
+        body = self.get({'page': 2, 'per_page': 10})
+        following = self.get({'per_page': 10, 'cursor': body['next_cursor']})
+        self.assertEqual(following['events'], self.get({'page': 3, 'per_page': 10})['events'])
+        self.assertEqual(len(following['events']), 3)
+
+
+class DataExportTests(AdminFixtureMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        learners = User.objects.bulk_create([
+            User(email=f'learner{i}@example.com', full_name=f'Learner, {i}', password='!')
+            for i in range(30)
+        ])
+        cls.course = Course.objects.create(title='Course', description='Description', category='ml')
+        UserCourseProgress.objects.bulk_create([
+            UserCourseProgress(user=learner, course=cls.course) for learner in learners
+        ])
+
+    def export(self, dataset, params=None):
+        response = self.client.get(
+            f'/api/admin/export/{dataset}/', params or {}, HTTP_AUTHORIZATION=f'Bearer {self.token}'
+        )
+        if response.status_code != 200:
+            return response, None
+        return response, b''.join(response.streaming_content)
+
+    def test_users_csv_streams_every_row(self):
+        import csv
+        import io
+
+        response, body = self.export('users')
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        rows = list(csv.DictReader(io.StringIO(body.decode())))
+        self.assertEqual(len(rows), 31)
+        self.assertIn('Learner, 7', [row['full_name'] for row in rows])
+
+    def test_gzip_jsonl_enrollments_with_filter(self):
+        import gzip
+
+        response, body = self.export('enrollments', {
+            'file_format': 'jsonl', 'gzip': '1', 'course_id': str(self.course.id)
+        })
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        lines = gzip.decompress(body).decode().splitlines()
+        self.assertEqual(len(lines), 30)
+        self.assertEqual(json.loads(lines[0])['course_title'], 'Course')
+
+        response, _ = self.export('enrollments', {'course_id': 'not-a-uuid'})
+        self.assertEqual(response.status_code, 400)
+
+
+class BulkUserImportTests(AdminFixtureMixin, TestCase):
+    def upload(self, name, content, **data):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        return self.client.post(
+            '/api/admin/users/import/',
+            {'file': SimpleUploadedFile(name, content.encode()), **data},
+            HTTP_AUTHORIZATION=f'Bearer {self.token}'
+        )
+
+    def test_csv_import_reports_per_row_errors(self):
+        content = (
+            'email,full_name,password,is_staff\n'
+            'new1@example.com,New One,Password123,false\n'
+            'new2@example.com,New Two,Password456,yes\n'
+            'admin@example.com,Existing,Password789,false\n'
+            'not-an-email,Broken,Password000,false\n'
+            'NEW1@example.com,Again,Password111,false\n'
+        )
+        response = self.upload('users.csv', content)
+        self.assertEqual(response.status_code, 200, response.content)
+        report = response.json()
+        self.assertEqual((report['total_rows'], report['created'], report['failed']), (5, 2, 3))
+        self.assertEqual([error['line'] for error in report['errors']], [4, 5, 6])
+
+        user = User.objects.get(email='new2@example.com')
+        self.assertTrue(user.is_staff)
+        self.assertTrue(user.check_password('Password456'))
+        self.assertTrue(user.password_hash.startswith('$2'))
+
+    def test_large_password_imports_run_as_a_job(self):
+        content = 'email,full_name,password\nbig1@example.com,Big One,Password123\n'
+        with self.settings(USER_IMPORT_ASYNC_BYTES=10):
+            response = self.upload('users.csv', content)
+        self.assertEqual(response.status_code, 202, response.content)
+        job = AdminJob.objects.get(pk=response.json()['job']['id'])
+        self.assertEqual((job.status, job.result['created']), ('succeeded', 1))
+        self.assertTrue(User.objects.get(email='big1@example.com').check_password('Password123'))
+        log = AdminAuditLog.objects.get(action='users_bulk_imported')
+        self.assertEqual(log.details['job_id'], str(job.pk))
+
+    def test_invite_import_skips_hashing_and_token_sets_password(self):
+        content = '{"email": "invited@example.com", "full_name": "Invited"}\n'
+        report = self.upload('users.jsonl', content, invite='true').json()
+        self.assertEqual(report['created'], 1)
+        user = User.objects.get(email='invited@example.com')
+        self.assertFalse(user.has_usable_password())
+
+        token = report['invites'][0]['token']
+        response = self.client.post(
+            '/api/auth/accept-invite/', {'token': token, 'password': 'Welcome123'},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        user.refresh_from_db()
+        self.assertTrue(user.check_password('Welcome123'))
+
+        response = self.client.post(
+            '/api/auth/accept-invite/', {'token': token, 'password': 'Welcome456'},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_invite_cannot_sign_in_a_deactivated_account(self):
+        content = '{"email": "invited@example.com", "full_name": "Invited"}\n'
+        token = self.upload('users.jsonl', content, invite='true').json()['invites'][0]['token']
+        User.objects.filter(email='invited@example.com').update(is_active=False)
+
+        response = self.client.post(
+            '/api/auth/accept-invite/', {'token': token, 'password': 'Welcome123'},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(User.objects.get(email='invited@example.com').has_usable_password())
+        self.assertFalse(UserSession.objects.filter(user__email='invited@example.com').exists())
+
+
+class BulkEnrollmentTests(AdminFixtureMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.courses = [
+            Course.objects.create(title=f'Course {i}', description='Description', category='ml')
+            for i in range(2)
+        ]
+        CourseModule.objects.bulk_create([
+            CourseModule(course=cls.courses[0], title=f'Module {i}', description='d', order=i)
+            for i in range(3)
+        ])
+        cls.path = LearningPath.objects.create(
+            title='Path', description='d', icon_name='brain', color='google-blue', difficulty='beginner'
+        )
+        for order, course in enumerate(cls.courses):
+            PathCourse.objects.create(learning_path=cls.path, course=course, order=order)
+        cls.learners = User.objects.bulk_create([
+            User(email=f'learner{i}@example.com', full_name=f'Learner {i}', password='!')
+            for i in range(5)
+        ])
+
+    def enroll(self, **body):
+        return self.client.post(
+            '/api/admin/enrollments/bulk/', body, content_type='application/json',
+            HTTP_AUTHORIZATION=f'Bearer {self.token}'
+        )
+
+    def test_learning_path_enrollment_counts_new_and_existing(self):
+        UserCourseProgress.objects.create(user=self.learners[0], course=self.courses[0])
+        user_ids = [str(learner.id) for learner in self.learners] + ['not-a-uuid']
+
+        response = self.enroll(user_ids=user_ids, learning_path_id=str(self.path.id))
+        self.assertEqual(response.status_code, 200, response.content)
+        result = response.json()
+        self.assertEqual((result['created'], result['existing']), (9, 1))
+        self.assertEqual(result['skipped_users'], ['not-a-uuid'])
+        self.assertEqual(
+            [course['course_id'] for course in result['per_course']],
+            [str(course.id) for course in self.courses]
+        )
+
+        progress = UserCourseProgress.objects.get(user=self.learners[1], course=self.courses[0])
+        self.assertEqual(progress.total_modules_count, 3)
+        snapshot = CourseStatsSnapshot.objects.get(course=self.courses[0])
+        self.assertEqual(snapshot.enrolled_count, 5)
+
+        # Running again creates nothing
+        result = self.enroll(user_ids=user_ids, course_ids=[str(self.courses[1].id)]).json()
+        self.assertEqual((result['created'], result['existing']), (0, 5))
+        self.assertTrue(AdminAuditLog.objects.filter(action='users_bulk_enrolled').exists())
+
+    def test_requires_exactly_one_target(self):
+        user_ids = [str(self.learners[0].id)]
+        self.assertEqual(self.enroll(user_ids=user_ids).status_code, 400)
+        self.assertEqual(self.enroll(
+            user_ids=user_ids, course_ids=[str(self.courses[0].id)], learning_path_id=str(self.path.id)
+        ).status_code, 400)
+
+
+class BulkActionTests(AdminFixtureMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.users = User.objects.bulk_create([
+            User(email=f'bulk{i}@example.com', full_name=f'Bulk {i}', password='!')
+            for i in range(5)
+        ])
+        UserSession.objects.bulk_create([
+            UserSession(user=user, token=f'bulk-token-{i}', expires_at=timezone.now() + timedelta(days=1))
+            for i, user in enumerate(cls.users)
+        ])
+
+    def post(self, url, body):
+        return self.client.post(
+            url, body, content_type='application/json', HTTP_AUTHORIZATION=f'Bearer {self.token}'
+        )
+
+    def test_chunks_report_accurate_counts(self):
+        from unittest import mock
+        from adminapp.bulk import BulkOperation, deactivate_users
+
+        ids = [str(user.id) for user in self.users]
+        progress = mock.Mock()
+        result = BulkOperation(User, deactivate_users, chunk_size=2).run(
+            ids + ids[:1] + ['bogus', '00000000-0000-0000-0000-000000000000'], progress
+        )
+        self.assertEqual(result['affected'], 5)
+        self.assertEqual(result['invalid_ids'], ['bogus'])
+        self.assertEqual(result['chunks'], 3)
+        self.assertEqual([call.args[0] for call in progress.update.call_args_list], [2, 4, 6])
+        self.assertEqual(result['not_found'], 1)
+        self.assertFalse(UserSession.objects.filter(user__in=self.users, is_active=True).exists())
+
+    def test_bulk_deactivate_endpoint_and_async_job(self):
+        ids = [str(user.id) for user in self.users[:2]]
+        response = self.post('/api/admin/users/bulk_deactivate/', {'user_ids': ids})
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()['deactivated_count'], 2)
+
+        ids = [str(user.id) for user in self.users]
+        response = self.post('/api/admin/users/bulk_activate/', {'user_ids': ids, 'async': True})
+        self.assertEqual(response.status_code, 202, response.content)
+        job_id = response.json()['job']['id']
+
+        job = self.client.get(f'/api/admin/jobs/{job_id}/', HTTP_AUTHORIZATION=f'Bearer {self.token}').json()
+        self.assertEqual(job['status'], 'succeeded')
+        self.assertEqual((job['processed'], job['result']['affected']), (5, 5))
+        self.assertEqual(User.objects.filter(id__in=ids, is_active=True).count(), 5)
+        log = AdminAuditLog.objects.get(action='users_bulk_activated')
+        self.assertEqual(log.details['job_id'], job_id)
+
+    def test_jobs_of_dead_workers_are_failed_when_read(self):
+        import os
+        import socket
+
+        host = socket.gethostname()
+        now = timezone.now()
+        dead, alive, silent = [
+            AdminJob.objects.create(kind='test', status='running', worker=worker, heartbeat_at=heartbeat)
+            for worker, heartbeat in [
+                (f'{host}:999999999', now),
+                (f'{host}:{os.getpid()}', now),
+                ('elsewhere:123', now - timedelta(hours=1)),
+            ]
+        ]
+        for job, expected in ((dead, 'failed'), (alive, 'running'), (silent, 'failed')):
+            body = self.client.get(f'/api/admin/jobs/{job.id}/', HTTP_AUTHORIZATION=f'Bearer {self.token}').json()
+            self.assertEqual(body['status'], expected, job.worker)
+
+    def test_bulk_activate_skips_rows_pending_deletion(self):
+        doomed = self.users[0]
+        User.objects.filter(pk=doomed.pk).update(is_active=False, pending_delete=True)
+        ids = [str(user.id) for user in self.users[:2]]
+        response = self.post('/api/admin/users/bulk_activate/', {'user_ids': ids})
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()['activated_count'], 1)
+        doomed.refresh_from_db()
+        self.assertFalse(doomed.is_active)
+
+
+class CascadeDeleteTests(AdminFixtureMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.learner = User.objects.create(email='learner@example.com', full_name='Learner', password='!')
+        cls.course, cls.other = [
+            Course.objects.create(title=title, description='Description', category='ml')
+            for title in ('Doomed', 'Kept')
+        ]
+        module = CourseModule.objects.create(course=cls.course, title='Module', description='d', order=1)
+        UserCourseProgress.objects.create(user=cls.learner, course=cls.course, current_module=module)
+        UserCourseProgress.objects.create(user=cls.learner, course=cls.other)
+        UserModuleProgress.objects.create(user=cls.learner, module=module)
+        Certificate.objects.create(user=cls.learner, course=cls.course, certificate_id='CERT-1')
+        path = LearningPath.objects.create(
+            title='Path', description='d', icon_name='brain', color='google-blue', difficulty='beginner'
+        )
+        PathCourse.objects.create(learning_path=path, course=cls.course)
+        discussion = Discussion.objects.create(
+            title='Thread', content='c', author=cls.learner, course=cls.course
+        )
+        DiscussionReply.objects.create(discussion=discussion, author=cls.admin, content='Reply')
+        cls.discussion = discussion
+
+    def auth(self):
+        return {'HTTP_AUTHORIZATION': f'Bearer {self.token}'}
+
+    def test_plan_deletes_dependents_before_parents(self):
+        from adminapp.deletion import build_plan
+
+        order = [(step.action, step.model.__name__) for step in build_plan(Course)]
+        self.assertLess(order.index(('delete', 'UserModuleProgress')), order.index(('delete', 'CourseModule')))
+        self.assertLess(order.index(('update', 'UserCourseProgress')), order.index(('delete', 'CourseModule')))
+        self.assertIn(('update', 'Discussion'), order)
+
+    def test_course_destroy_purges_cascade_in_job(self):
+        response = self.client.delete(f'/api/admin/courses/{self.course.id}/', **self.auth())
+        self.assertEqual(response.status_code, 202, response.content)
+        job = response.json()['job']
+        self.assertEqual(job['status'], 'succeeded')
+        self.assertEqual(job['result']['deleted']['base.UserModuleProgress'], 1)
+
+        self.assertFalse(Course.objects.filter(id=self.course.id).exists())
+        self.assertFalse(CourseModule.objects.filter(course_id=self.course.id).exists())
+        self.assertFalse(Certificate.objects.exists())
+        self.assertFalse(PathCourse.objects.exists())
+        self.assertEqual(UserCourseProgress.objects.get().course, self.other)
+        self.discussion.refresh_from_db()
+        self.assertIsNone(self.discussion.course)
+        self.assertTrue(AdminAuditLog.objects.filter(action='course_hard_deleted').exists())
+
+    def test_user_hard_delete_refreshes_course_stats(self):
+        response = self.client.delete(
+            '/api/admin/users/bulk_delete/', {'user_ids': [str(self.learner.id)], 'hard': True},
+            content_type='application/json', **self.auth()
+        )
+        self.assertEqual(response.status_code, 202, response.content)
+        self.assertFalse(User.objects.filter(id=self.learner.id).exists())
+        self.assertFalse(Discussion.objects.exists())
+        self.assertFalse(DiscussionReply.objects.exists())
+        self.assertEqual(CourseStatsSnapshot.objects.get(course=self.other).enrolled_count, 0)
+
+        response = self.client.delete(
+            '/api/admin/users/bulk_delete/', {'user_ids': [str(self.admin.id)], 'hard': True},
+            content_type='application/json', **self.auth()
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class ModuleOrderTests(AdminFixtureMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.course = Course.objects.create(title='Course', description='Description', category='ml')
+        cls.modules = [
+            CourseModule.objects.create(course=cls.course, title=f'M{i}', description='d', order=i)
+            for i in range(1, 6)
+        ]
+
+    def titles(self):
+        return list(CourseModule.objects.filter(course=self.course).order_by('order').values_list('title', flat=True))
+
+    def post(self, url, body):
+        return self.client.post(
+            url, body, content_type='application/json', HTTP_AUTHORIZATION=f'Bearer {self.token}'
+        )
+
+    def test_full_reorder_uses_constant_queries(self):
+        from adminapp.module_order import set_order
+
+        ids = [module.id for module in reversed(self.modules)]
+        # SELECT ... FOR UPDATE, park on negatives, flip; plus the savepoint pair
+        with self.assertNumQueries(5):
+            changes = set_order(self.course.id, ids)
+        self.assertEqual(len(changes), 4)  # M3 stays in the middle
+        self.assertEqual(self.titles(), ['M5', 'M4', 'M3', 'M2', 'M1'])
+
+        response = self.post(f'/api/admin/courses/{self.course.id}/modules/reorder/',
+                             {'module_ids': [str(module_id) for module_id in ids[:4]]})
+        self.assertEqual(response.status_code, 400)
+
+    def test_move_to_position_and_direction(self):
+        response = self.post(f'/api/admin/modules/{self.modules[4].id}/reorder/', {'position': 2})
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()['order'], 2)
+        self.assertEqual(self.titles(), ['M1', 'M5', 'M2', 'M3', 'M4'])
+
+        self.post(f'/api/admin/modules/{self.modules[0].id}/reorder/', {'direction': 'down'})
+        self.assertEqual(self.titles(), ['M5', 'M1', 'M2', 'M3', 'M4'])
+
+    def test_rebalance_closes_gaps(self):
+        from adminapp.module_order import next_order, rebalance
+
+        self.modules[1].delete()
+        CourseModule.objects.filter(id=self.modules[4].id).update(order=40)
+        self.assertEqual(next_order(self.course.id), 41)
+        self.assertEqual(rebalance(self.course.id), 3)
+        orders = list(CourseModule.objects.filter(course=self.course).order_by('order').values_list('order', flat=True))
+        self.assertEqual(orders, [1, 2, 3, 4])
+        self.assertEqual(self.titles(), ['M1', 'M3', 'M4', 'M5'])
+
+
+class HealthSamplerTests(AdminFixtureMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_endpoint_serves_samples_without_writing(self):
+        token = self.token
+
+        response = self.client.get('/api/admin/system/health/?history=5', HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(response.status_code, 200, response.content)
+        data = response.json()
+        self.assertEqual(data['database_status'], 'connected')
+        self.assertIn('cpu_percent', data)
+        self.assertEqual(data['id'], data['history'][-1]['id'])
+        self.assertEqual(data['created_at'], data['history'][-1]['sampled_at'])
+        self.assertGreaterEqual(len(data['history']), 1)
+        self.assertFalse(SystemHealth.objects.exists())
+
+    def test_persist_downsamples_once_per_window(self):
+        from adminapp.health import HealthSampler
+
+        sampler = HealthSampler(interval=60, persist_every=3)
+        for _ in range(3):
+            sampler.sample()
+        self.assertEqual(SystemHealth.objects.count(), 1)
+        row = SystemHealth.objects.get()
+        self.assertEqual((row.database_status, row.uptime), ('connected', 100.0))
+
+        # Another worker in the same window does not write a second row
+        other = HealthSampler(interval=60, persist_every=3)
+        for _ in range(3):
+            other.sample()
+        self.assertEqual(SystemHealth.objects.count(), 1)
+        self.assertEqual(len(other.history(limit=2)), 2)
+
+
+class RequestMetricsTests(AdminFixtureMixin, TestCase):
+    def setUp(self):
+        from adminapp.metrics import registry
+        registry.reset()
+
+    def test_quantiles_from_log_buckets(self):
+        from adminapp.metrics import new_stats, MetricsRegistry, quantile
+
+        registry = MetricsRegistry()
+        for ms in [1.0] * 90 + [100.0] * 9 + [1000.0]:
+            registry.record('GET x/', ms, 200)
+        stats = registry.snapshot()['GET x/']
+        self.assertAlmostEqual(quantile(stats, 0.5), 1.0, delta=0.1)
+        self.assertAlmostEqual(quantile(stats, 0.95), 100.0, delta=10)
+        self.assertAlmostEqual(quantile(stats, 0.99), 100.0, delta=10)
+        self.assertEqual(quantile(stats, 1.0), 1000.0)
+        self.assertEqual(quantile(new_stats(), 0.5), 0.0)
+
+    def test_prometheus_endpoint_merges_worker_files(self):
+        import os
+        import tempfile
+        from django.test import override_settings
+
+        auth = {'HTTP_AUTHORIZATION': f'Bearer {self.token}'}
+        self.client.get('/api/admin/dashboard/', **auth)
+        self.client.get('/api/admin/dashboard/', **auth)
+
+        with tempfile.TemporaryDirectory() as directory, override_settings(METRICS_DIR=directory):
+            other = {'pid': os.getppid(), 'written_at': time.time(), 'routes': {
+                'GET api/admin/dashboard/': {
+                    'count': 3, 'errors': 1, 'client_errors': 0, 'total_ms': 30.0, 'max_ms': 12.0,
+                    'db_queries': 6, 'db_ms': 3.0, 'buckets': {'34': 3},
+                },
+            }}
+            with open(os.path.join(directory, 'worker-1.json'), 'w') as handle:
+                json.dump(other, handle)
+            response = self.client.get('/api/admin/system/metrics', **auth)
+
+        self.assertEqual(response.status_code, 200)
+        text = response.content.decode()
+        self.assertIn('http_requests_total{route="GET api/admin/dashboard/",outcome="success"} 4', text)
+        self.assertIn('http_requests_total{route="GET api/admin/dashboard/",outcome="server_error"} 1', text)
+        self.assertIn('app_metrics_workers 2', text)
+        self.assertIn('http_request_duration_seconds_count{route="GET api/admin/dashboard/"} 5', text)
+
+
+class SQLProfilerTests(AdminFixtureMixin, TestCase):
+    def setUp(self):
+        from adminapp.profiler import store
+        store.clear()
+
+    def test_fingerprint_collapses_literals_and_in_lists(self):
+        from adminapp.profiler import fingerprint
+
+        self.assertEqual(
+            fingerprint("SELECT * FROM t WHERE id = 42 AND name = 'x''y' AND k IN (%s, %s,  %s)"),
+            'SELECT * FROM t WHERE id = ? AND name = ? AND k IN (...)',
+        )
+        self.assertEqual(fingerprint('SELECT a FROM t WHERE b IN (%s)'),
+                         fingerprint('SELECT a  FROM t\nWHERE b IN (%s, %s)'))
+
+    def test_repeated_fingerprint_flagged_as_n_plus_one(self):
+        from django.db import connection
+        from adminapp.profiler import QueryProfile
+
+        profile = QueryProfile()
+        with connection.execute_wrapper(profile):
+            for _ in range(6):
+                User.objects.filter(pk=self.admin.pk).first()
+            User.objects.count()
+        groups = profile.groups()
+        self.assertEqual(len(profile.queries), 7)
+        self.assertEqual(groups[0]['count'], 6)
+        self.assertTrue(groups[0]['caller'].startswith('adminapp/tests.py:'))
+
+    def test_header_opt_in_sets_headers_and_stores_profile(self):
+        auth = {'HTTP_AUTHORIZATION': f'Bearer {self.token}'}
+        plain = self.client.get('/api/admin/users/', **auth)
+        self.assertNotIn('X-DB-Queries', plain)
+
+        response = self.client.get('/api/admin/users/', HTTP_X_PROFILE_SQL='1', **auth)
+        self.assertGreater(int(response['X-DB-Queries']), 0)
+        self.assertIn('X-DB-Time', response)
+
+        listing = self.client.get('/api/admin/system/sql-profiles/', **auth).json()
+        self.assertEqual(listing['count'], 1)
+        self.assertEqual(listing['results'][0]['id'], response['X-DB-Profile'])
+        detail = self.client.get(f'/api/admin/system/sql-profiles/{response["X-DB-Profile"]}/', **auth).json()
+        self.assertEqual(sum(group['count'] for group in detail['groups']), int(response['X-DB-Queries']))
+
+    def test_header_ignored_for_non_staff(self):
+        learner = User.objects.create_user(email='learner@example.com', full_name='Learner', password='Pass123!')
+        token = UserSession.create_session(learner).token
+        response = self.client.get('/api/auth/profile/', HTTP_X_PROFILE_SQL='1',
+                                   HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertNotIn('X-DB-Queries', response)
+
+
+class SeedCommandTests(TestCase):
+    def test_refuses_without_debug_and_seeds_with_a_random_password(self):
+        from django.core.management.base import CommandError
+        from base import seeding
+
+        sizes = ['--users', '2', '--courses', '1', '--labs', '0', '--paths', '0',
+                 '--discussions', '0', '--events', '0']
+        with self.settings(DEBUG=False):
+            with self.assertRaises(CommandError):
+                call_command('seed_data', *sizes, stdout=io.StringIO())
+            self.assertFalse(User.objects.exists())
+
+            out = io.StringIO()
+            call_command('seed_data', *sizes, '--allow-production', stdout=out)
+        password = out.getvalue().strip().rsplit(' / ', 1)[1]
+        self.assertNotEqual(password, seeding.SEED_PASSWORD)
+        self.assertTrue(User.objects.get(email=seeding.SEED_ADMIN_EMAIL).check_password(password))
+
+
+class AdminEndpointBudgetTests(QueryBudgetMixin, TestCase):
+    """
+    Every admin route against seeded data at realistic volume (base.seeding):
+    thousands of users and enrollments, so a query per row cannot hide.
+    Budgets are today's exact counts, authentication and audit writes
+    included. Bulk actions get 500 ids, more than one chunk.
+    """
+    SEED = dict(users=1500, courses=120, modules_per_course=6, enrollments_per_user=3,
+                labs=8, paths=6, discussions=200, events=24)
+
+    @classmethod
+    def setUpTestData(cls):
+        from base import seeding
+        from adminapp.models import AdminJob
+
+        seeding.seed(**cls.SEED)
+        refresh_course_stats()
+        cls.admin = User.objects.create_superuser(
+            email='admin@example.com', full_name='Admin', password='Admin123!'
+        )
+        # Explicit token: create_session() tokens only differ per second, and login issues one too
+        cls.token = UserSession.objects.create(
+            user=cls.admin, token='admin-budget-token', expires_at=timezone.now() + timedelta(days=1)
+        ).token
+        cls.course = Course.objects.order_by('title').first()
+        cls.module = CourseModule.objects.filter(course=cls.course).order_by('order').first()
+        cls.learner = User.objects.filter(is_staff=False).order_by('email').first()
+        cls.discussion = Discussion.objects.order_by('id').first()
+        cls.event = CommunityEvent.objects.order_by('id').first()
+        cls.job = AdminJob.objects.create(kind='test', status='succeeded', created_by=cls.admin)
+        cls.user_ids = [str(pk) for pk in User.objects.filter(is_staff=False).values_list('id', flat=True)[:500]]
+        cls.course_ids = [str(pk) for pk in Course.objects.values_list('id', flat=True)[:60]]
+        cls.module_ids = [str(pk) for pk in CourseModule.objects.values_list('id', flat=True)[:500]]
+
+    def test_read_endpoints(self):
+        from adminapp import urls as admin_urls
+        from adminapp.profiler import store
+
+        profiled = self.client.get('/api/admin/users/', HTTP_X_PROFILE_SQL='1',
+                                   HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        course, module = self.course, self.module
+        exercised = set()
+        for names, url, budget in [
+            (['admin-profile'], '/api/admin/auth/profile/', 3),
+            (['admin-dashboard'], '/api/admin/dashboard/', 4),
+            (['admin-course-stats'], '/api/admin/dashboard/course-stats/', 8),
+            (['admin-user-list'], '/api/admin/users/', 5),
+            (['admin_users'], '/api/admin/api/admin/users/', 5),
+            (['admin-user-stats'], '/api/admin/users/stats/', 11),
+            (['admin-user-detail', 'admin_user_detail'], f'/api/admin/users/{self.learner.id}/', 5),
+            (['admin-course-list'], '/api/admin/courses/', 5),
+            (['admin-course-detail'], f'/api/admin/courses/{course.id}/', 4),
+            # The explicit course module routes shadow the router's identical ones
+            (['course-modules-list', 'admin-course-module-list'], f'/api/admin/courses/{course.id}/modules/', 5),
+            (['course-module-detail', 'admin-course-module-detail'],
+             f'/api/admin/courses/{course.id}/modules/{module.id}/', 4),
+            (['admin-module-list'], '/api/admin/modules/', 5),
+            (['admin-module-detail'], f'/api/admin/modules/{module.id}/', 4),
+            (['module-stats'], '/api/admin/modules/stats/', 7),
+            (['admin-discussion-list'], '/api/admin/community/discussions/', 5),
+            (['admin-discussion-detail'], f'/api/admin/community/discussions/{self.discussion.id}/', 4),
+            (['admin-event-list'], '/api/admin/community/events/', 5),
+            (['admin-event-detail'], f'/api/admin/community/events/{self.event.id}/', 4),
+            (['community-stats'], '/api/admin/community/stats/', 10),
+            (['admin-analytics'], '/api/admin/analytics/', 16),
+            (['system-config'], '/api/admin/system/config/', 4),
+            (['system-health'], '/api/admin/system/health/', 5),
+            (['system-metrics'], '/api/admin/system/metrics', 3),
+            (['sql-profiles'], '/api/admin/system/sql-profiles/', 3),
+            (['sql-profile-detail'], f'/api/admin/system/sql-profiles/{profiled["X-DB-Profile"]}/', 3),
+            (['setting-categories'], '/api/admin/system/categories/', 4),
+            (['system-logs'], '/api/admin/system/logs/', 5),
+            (['audit-logs'], '/api/admin/system/audit-logs/', 5),
+            (['audit-logs-export'], '/api/admin/system/audit-logs/export/', 4),
+            (['admin-job'], f'/api/admin/jobs/{self.job.id}/', 4),
+            (['data-export'], '/api/admin/export/users/', 5),
+            (['api-root'], '/api/admin/', 3),
+        ]:
+            with self.subTest(names[0]):
+                self.assertRequestWithinBudget('GET', url, budget, self.token)
+            exercised.update(names)
+        store.clear()
+
+        self.assertRoutesCovered(admin_urls, exercised, exempt=[
+            # Writes, budgeted in the tests below
+            'admin-login', 'admin-logout', 'admin-user-bulk-activate', 'admin-user-bulk-deactivate',
+            'admin-user-bulk-delete', 'admin-user-bulk-import', 'admin-user-send-welcome',
+            'admin-user-activate', 'admin-user-deactivate', 'admin-user-promote-to-admin',
+            'admin-course-bulk-activate', 'admin-course-bulk-deactivate', 'admin-course-bulk-delete',
+            'admin-course-approve', 'admin-course-reject', 'admin-course-module-reorder',
+            'admin-module-bulk-activate', 'admin-module-bulk-deactivate', 'admin-module-bulk-delete',
+            'admin-module-reorder', 'admin-discussion-bulk-approve', 'admin-discussion-bulk-delete',
+            'admin-discussion-flag', 'admin-event-bulk-delete', 'system-config-reset', 'bulk-enrollment',
+        ])
+
+    def test_user_writes(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        check, token, learner = self.assertRequestWithinBudget, self.token, self.learner
+        # Password hashing makes these slow by design
+        check('POST', '/api/admin/auth/login/', 4, max_seconds=5,
+              data={'email': self.admin.email, 'password': 'Admin123!'})
+        check('POST', '/api/admin/users/', 7, token, status_code=201, max_seconds=5,
+              data={'email': 'created@example.com', 'full_name': 'Created', 'password': 'Created123!'})
+        check('PATCH', f'/api/admin/users/{learner.id}/', 6, token, data={'full_name': 'Renamed'})
+        check('POST', f'/api/admin/users/{learner.id}/deactivate/', 8, token)
+        check('POST', f'/api/admin/users/{learner.id}/activate/', 7, token)
+        check('POST', f'/api/admin/users/{learner.id}/promote_to_admin/', 7, token)
+        check('POST', '/api/admin/users/send_welcome/', 5, token, data={'user_id': str(learner.id)})
+        check('POST', '/api/admin/users/bulk_deactivate/', 8, token, data={'user_ids': self.user_ids})
+        check('POST', '/api/admin/users/bulk_activate/', 7, token, data={'user_ids': self.user_ids})
+        check('DELETE', '/api/admin/users/bulk_delete/', 8, token, data={'user_ids': self.user_ids})
+        rows = 'email,full_name\n' + ''.join(f'imported{i}@example.com,Imported {i}\n' for i in range(200))
+        check('POST', '/api/admin/users/import/', 12, token, content_type=None,
+              data={'file': SimpleUploadedFile('users.csv', rows.encode()), 'invite': 'true'})
+        check('POST', '/api/admin/enrollments/bulk/', 7, token,
+              data={'user_ids': self.user_ids, 'course_ids': self.course_ids[:2]})
+        # Hard delete runs its purge job inline under the test settings: a few
+        # statements per related table, each covering up to deletion.BATCH_SIZE rows
+        check('DELETE', f'/api/admin/users/{learner.id}/', 96, token, status_code=202)
+        check('POST', '/api/admin/auth/logout/', 5, token)
+
+    def test_course_writes(self):
+        check, token, course, module = self.assertRequestWithinBudget, self.token, self.course, self.module
+        check('POST', '/api/admin/courses/', 8, token, status_code=201, data={
+            'title': 'New course', 'description': 'Description', 'category': 'ml',
+            'difficulty': 'beginner', 'duration_minutes': 60,
+        })
+        check('PATCH', f'/api/admin/courses/{course.id}/', 5, token, data={'title': 'Renamed'})
+        check('POST', f'/api/admin/courses/{course.id}/reject/', 11, token)
+        check('POST', f'/api/admin/courses/{course.id}/approve/', 8, token)
+        check('POST', f'/api/admin/courses/{course.id}/modules/', 8, token, status_code=201,
+              data={'title': 'Appended', 'description': 'Description', 'duration_minutes': 10})
+        module_ids = [str(pk) for pk in CourseModule.objects.filter(course=course)
+                      .order_by('-order').values_list('id', flat=True)]
+        check('POST', f'/api/admin/courses/{course.id}/modules/reorder/', 11, token,
+              data={'module_ids': module_ids})
+        check('PATCH', f'/api/admin/courses/{course.id}/modules/{module.id}/', 5, token,
+              data={'title': 'Renamed'})
+        check('POST', f'/api/admin/modules/{module.id}/reorder/', 10, token, data={'position': 1})
+        check('PATCH', f'/api/admin/modules/{module.id}/', 5, token, data={'title': 'Renamed again'})
+        check('POST', '/api/admin/modules/bulk_deactivate/', 7, token, data={'module_ids': self.module_ids})
+        check('POST', '/api/admin/modules/bulk_activate/', 7, token, data={'module_ids': self.module_ids})
+        check('DELETE', '/api/admin/modules/bulk_delete/', 15, token, data={'module_ids': self.module_ids[-50:]})
+        check('POST', '/api/admin/courses/bulk_deactivate/', 7, token, data={'course_ids': self.course_ids})
+        check('POST', '/api/admin/courses/bulk_activate/', 7, token, data={'course_ids': self.course_ids})
+        check('DELETE', '/api/admin/courses/bulk_delete/', 7, token, data={'course_ids': self.course_ids})
+        check('DELETE', f'/api/admin/courses/{course.id}/', 71, token, status_code=202)
+
+    def test_community_and_system_writes(self):
+        check, token = self.assertRequestWithinBudget, self.token
+        self.addCleanup(system_config.invalidate)
+        discussion_ids = list(Discussion.objects.values_list('id', flat=True)[:100])
+        event_ids = list(CommunityEvent.objects.values_list('id', flat=True)[:10])
+        check('POST', f'/api/admin/community/discussions/{self.discussion.id}/flag/', 6, token,
+              data={'reason': 'Spam', 'action': 'lock'})
+        check('POST', '/api/admin/community/discussions/bulk_approve/', 7, token, data={'ids': discussion_ids})
+        check('DELETE', '/api/admin/community/discussions/bulk_delete/', 14, token, data={'ids': discussion_ids})
+        check('DELETE', '/api/admin/community/events/bulk_delete/', 15, token, data={'ids': event_ids})
+        # Bulk writes: the same count for any number of settings
+        check('POST', '/api/admin/system/config/reset/', 13, token)
+        check('PUT', '/api/admin/system/config/', 9, token, data={'MAINTENANCE_MODE': 'true'})
+        check('DELETE', '/api/admin/system/sql-profiles/', 3, token, status_code=204)
+
+
+
+class LoadTestHarnessTests(TestCase):
+    """The traffic engine, against a stub server: test databases cannot be shared across threads"""
+    class StubClient:
+        def request(self, method, path, token=None, data=None):
+            from adminapp.loadtest import Reply
+
+            if path.endswith('/auth/login/'):
+                return Reply(200, {'token': 'token'})
+            if path == '/api/dashboard/courses/':
+                return Reply(200, [{'course': {'id': 'course'}, 'is_completed': False}])
+            if path == '/api/courses/course/':
+                return Reply(200, {'course': {}, 'modules': [{'id': 'module'}]})
+            if path.endswith('/complete/'):
+                return Reply(500, error='OperationalError: database is locked')
+            return Reply(200, [])
+
+    def test_stage_drives_learner_and_admin_mix(self):
+        from adminapp.loadtest import LoadTest
+
+        load_test = LoadTest(self.StubClient, learner_emails=['learner@example.com'],
+                             admin_emails=['admin@example.com'], password='secret', admin_ratio=0.5,
+                             session_length=5)
+        stage = load_test.run_stage(concurrency=2, seconds=0.3)
+
+        endpoints = stage['endpoints']
+        self.assertEqual(stage['concurrency'], 2)
+        self.assertIn('POST /api/auth/login/', endpoints)
+        self.assertIn('POST /api/admin/auth/login/', endpoints)
+        self.assertIn('GET /api/admin/dashboard/', endpoints)
+        self.assertEqual(endpoints['GET /api/courses/'].get('error_rate'), 0.0)
+        completions = endpoints['POST /api/modules/<id>/complete/']
+        self.assertEqual(completions['error_rate'], 1.0)
+        self.assertEqual(completions['lock_errors'], completions['requests'])
+        self.assertEqual(stage['overall']['lock_errors'], completions['lock_errors'])
+        self.assertIn('database is locked', stage['sample_errors']['POST /api/modules/<id>/complete/'])
+
+
+class SystemConfigRegistryTests(AdminFixtureMixin, TestCase):
+    def setUp(self):
+        system_config.invalidate()
+        self.addCleanup(system_config.invalidate)
+
+    def test_defaults_are_typed(self):
+        self.assertIs(system_config.get('ENABLE_AI_LABS'), True)
+        self.assertEqual(system_config.get('MAX_STUDENTS_PER_COURSE'), 500)
+        self.assertEqual(system_config.get_str('DEFAULT_TIMEZONE'), 'UTC')
+        self.assertEqual(system_config.generation, 0)
+
+    def test_reads_are_free_once_loaded(self):
+        system_config.snapshot()
+        with self.assertNumQueries(0):
+            for _ in range(100):
+                system_config.get_bool('ALLOW_NEW_REGISTRATIONS')
+
+    def test_put_bumps_generation_and_reloads_this_worker(self):
+        from adminapp.models import ConfigGeneration, SystemConfig
+
+        token = self.token
+        SystemConfig.objects.create(key='ENABLE_AI_LABS', value='true', description='Labs',
+                                    category='features', data_type='boolean')
+        self.assertTrue(system_config.get_bool('ENABLE_AI_LABS'))
+
+        response = self.client.put('/api/admin/system/config/', {'ENABLE_AI_LABS': 'false'},
+                                   content_type='application/json', HTTP_AUTHORIZATION=f'Bearer {token}')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(ConfigGeneration.objects.get().generation, 1)
+        self.assertFalse(system_config.get_bool('ENABLE_AI_LABS'))
+        self.assertEqual(system_config.generation, 1)
+
+    def test_other_workers_poll_the_generation(self):
+        from adminapp.models import SystemConfig
+
+        worker = ConfigRegistry()
+        with self.settings(CONFIG_POLL_INTERVAL=3600):
+            self.assertEqual(worker.get_int('MAX_STUDENTS_PER_COURSE'), 500)
+            SystemConfig.objects.create(key='MAX_STUDENTS_PER_COURSE', value='20', description='Cap',
+                                        data_type='integer')
+            bump_generation()
+            # Within the poll interval the worker keeps its snapshot, at no cost
+            with self.assertNumQueries(0):
+                self.assertEqual(worker.get_int('MAX_STUDENTS_PER_COURSE'), 500)
+        with self.settings(CONFIG_POLL_INTERVAL=0):
+            self.assertEqual(worker.get_int('MAX_STUDENTS_PER_COURSE'), 20)
+            # Unchanged generation: one primary-key lookup, no reload
+            with self.assertNumQueries(1):
+                worker.snapshot()
+
+    def test_put_writes_all_or_nothing(self):
+        from adminapp.models import ConfigGeneration, SystemConfig
+
+        token = self.token
+        self.client.post('/api/admin/system/config/reset/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        generation = ConfigGeneration.objects.get().generation
+
+        response = self.client.put('/api/admin/system/config/', {
+            'ENABLE_AI_LABS': 'false', 'MAX_STUDENTS_PER_COURSE': 'lots', 'NO_SUCH_KEY': '1',
+        }, content_type='application/json', HTTP_AUTHORIZATION=f'Bearer {token}')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(len(response.json()['details']), 2)
+        self.assertEqual(SystemConfig.objects.get(key='ENABLE_AI_LABS').value, 'true')
+        self.assertEqual(ConfigGeneration.objects.get().generation, generation)
+
+        response = self.client.put('/api/admin/system/config/', {
+            'ENABLE_AI_LABS': 0, 'MAX_STUDENTS_PER_COURSE': '25',
+        }, content_type='application/json', HTTP_AUTHORIZATION=f'Bearer {token}')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(SystemConfig.objects.get(key='ENABLE_AI_LABS').value, 'false')
+        self.assertEqual(ConfigGeneration.objects.get().generation, generation + 1)
+        self.assertEqual(system_config.get_int('MAX_STUDENTS_PER_COURSE'), 25)
+
+    def test_reset_restores_and_creates_defaults(self):
+        from adminapp.default_configs import DEFAULT_CONFIGS
+        from adminapp.models import SystemConfig
+
+        token = self.token
+        SystemConfig.objects.create(key='PLATFORM_NAME', value='Renamed', description='Name')
+
+        response = self.client.post('/api/admin/system/config/reset/', HTTP_AUTHORIZATION=f'Bearer {token}')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(SystemConfig.objects.count(), len(DEFAULT_CONFIGS))
+        self.assertEqual(SystemConfig.objects.get(key='PLATFORM_NAME').value, DEFAULT_CONFIGS['PLATFORM_NAME']['value'])
+        self.assertEqual(system_config.get_str('PLATFORM_NAME'), DEFAULT_CONFIGS['PLATFORM_NAME']['value'])
+
+    def test_invalid_values_fall_back_to_the_default(self):
+        from adminapp.models import SystemConfig
 
-# Create your tests here.
+        SystemConfig.objects.create(key='MAX_STUDENTS_PER_COURSE', value='many', description='Cap',
+                                    data_type='integer')
+        self.assertEqual(system_config.get_int('MAX_STUDENTS_PER_COURSE'), 500)
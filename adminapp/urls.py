@@ -1,4 +1,4 @@
-from django.urls import path, include
+from django.urls import path, re_path, include
 from rest_framework.routers import DefaultRouter
 from . import views
 
@@ -49,9 +49,22 @@ urlpatterns = [
     path('system/config/', views.SystemConfigView.as_view(), name='system-config'),
     path('system/config/reset/', views.ResetConfigDefaultsView.as_view(), name='system-config-reset'),
     path('system/health/', views.SystemHealthView.as_view(), name='system-health'),
+    re_path(r'^system/metrics/?$', views.SystemMetricsView.as_view(), name='system-metrics'),
+    path('system/sql-profiles/', views.SQLProfileView.as_view(), name='sql-profiles'),
+    path('system/sql-profiles/<uuid:pk>/', views.SQLProfileView.as_view(), name='sql-profile-detail'),
     path('system/categories/', views.SettingCategoriesView.as_view(), name='setting-categories'),
     path('system/logs/', views.SystemLogsView.as_view(), name='system-logs'),
     path('system/audit-logs/', views.AuditLogView.as_view(), name='audit-logs'),
+    path('system/audit-logs/export/', views.AuditLogExportView.as_view(), name='audit-logs-export'),
+    
+    # Background jobs (large bulk actions)
+    path('jobs/<uuid:pk>/', views.AdminJobView.as_view(), name='admin-job'),
+    
+    # Bulk enrollment
+    path('enrollments/bulk/', views.BulkEnrollmentView.as_view(), name='bulk-enrollment'),
+    
+    # Data exports
+    path('export/<str:dataset>/', views.DataExportView.as_view(), name='data-export'),
     
     # Include router URLs
     path('', include(router.urls)),
@@ -0,0 +1,248 @@
+# adminapp/user_import.py
+"""
+Bulk user import from CSV or JSON lines (the users endpoint's import action
+and the import_users command).
+
+The input is read and validated one row at a time; valid rows are gathered
+into chunks, which are checked against existing emails with one query,
+hashed in parallel and written with bulk_create. Password hashing (PBKDF2
+for Django auth plus bcrypt for password_hash, as User.set_password does)
+dominates the cost, so it runs on a pool of at most USER_IMPORT_WORKERS
+processes. They are spawned, never forked: a web worker's background threads
+may hold locks a forked child would inherit. With invite=True accounts get
+unusable passwords and a one-time UserInvite token instead, and no hashing
+happens at all.
+"""
+import csv
+import io
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+
+from adminapp.hashing import hash_password, init_worker
+from base.cache import invalidate_model
+from base.models import User, UserInvite
+
+FORMATS = ('csv', 'jsonl')
+CHUNK_SIZE = 500
+MAX_REPORTED_ERRORS = 1000
+TRUE_VALUES = {'1', 'true', 'yes', 'y'}
+FALSE_VALUES = {'0', 'false', 'no', 'n', ''}
+
+
+def read_rows(stream, file_format):
+    """Yield (line_number, dict or None) from a binary stream, one row at a time"""
+    stream = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if file_format == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    else:
+        for line_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                yield line_number, None
+                continue
+            yield line_number, row if isinstance(row, dict) else None
+
+
+def _boolean(value, default):
+    if value is None:
+        return default
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return default if text == '' else False
+    raise ValueError
+
+
+def validate_row(row, invite):
+    """Cleaned field dict, or raises ValueError with a {field: message} dict"""
+    if row is None:
+        raise ValueError({'row': 'Not a valid JSON object'})
+
+    errors = {}
+    email = str(row.get('email') or '').strip().lower()
+    full_name = str(row.get('full_name') or '').strip()
+    password = str(row.get('password') or '')
+    try:
+        validate_email(email)
+    except ValidationError:
+        errors['email'] = 'Enter a valid email address'
+    if not full_name:
+        errors['full_name'] = 'This field is required'
+    elif len(full_name) > 255:
+        errors['full_name'] = 'Ensure this field has no more than 255 characters'
+    if not invite and not password:
+        errors['password'] = 'This field is required (or import with invites)'
+
+    cleaned = {'email': email, 'full_name': full_name, 'bio': str(row.get('bio') or ''),
+               'password': password}
+    for field, default in (('is_staff', False), ('is_active', True)):
+        try:
+            cleaned[field] = _boolean(row.get(field), default)
+        except ValueError:
+            errors[field] = 'Must be true or false'
+    if errors:
+        raise ValueError(errors)
+    return cleaned
+
+
+class ImportReport:
+    def __init__(self):
+        self.total = 0
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+        self.invites = []
+
+    def add_error(self, line, email, errors):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'email': email, 'errors': errors})
+
+    def as_dict(self):
+        return {
+            'total_rows': self.total,
+            'created': self.created,
+            'failed': self.failed,
+            'errors': sorted(self.errors, key=lambda error: error['line']),
+            'errors_truncated': self.failed > len(self.errors),
+            'invites': self.invites,
+        }
+
+
+class UserImporter:
+    def __init__(self, invite=False, created_by=None, dry_run=False,
+                 chunk_size=CHUNK_SIZE, workers=None):
+        """workers=0 hashes in-process; None uses USER_IMPORT_WORKERS (at most one per CPU)"""
+        self.invite = invite
+        self.created_by = created_by
+        self.dry_run = dry_run
+        self.chunk_size = chunk_size
+        if workers is None:
+            workers = min(getattr(settings, 'USER_IMPORT_WORKERS', 2), os.cpu_count() or 1)
+        self.workers = workers
+        self.report = ImportReport()
+        self._seen_emails = set()
+        self._pool = None
+
+    def run(self, stream, file_format):
+        try:
+            chunk = []
+            for line, row in read_rows(stream, file_format):
+                self.report.total += 1
+                email = (row or {}).get('email')
+                try:
+                    cleaned = validate_row(row, self.invite)
+                except ValueError as e:
+                    self.report.add_error(line, email, e.args[0])
+                    continue
+                if cleaned['email'] in self._seen_emails:
+                    self.report.add_error(line, email, {'email': 'Duplicate email in this file'})
+                    continue
+                self._seen_emails.add(cleaned['email'])
+                chunk.append((line, cleaned))
+                if len(chunk) >= self.chunk_size:
+                    self._write_chunk(chunk)
+                    chunk = []
+            if chunk:
+                self._write_chunk(chunk)
+            if self.report.created and not self.dry_run:
+                invalidate_model(User)  # bulk_create sends no signals
+        finally:
+            if self._pool:
+                self._pool.shutdown()
+        return self.report
+
+    def _hash_all(self, passwords):
+        if not self.workers or len(passwords) < 2:
+            return [hash_password(password) for password in passwords]
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                self.workers, mp_context=multiprocessing.get_context('spawn'), initializer=init_worker
+            )
+        chunksize = max(len(passwords) // (self.workers * 4), 1)
+        return list(self._pool.map(hash_password, passwords, chunksize=chunksize))
+
+    def _write_chunk(self, chunk):
+        existing = set(User.objects.filter(
+            email__in=[cleaned['email'] for _, cleaned in chunk]
+        ).values_list('email', flat=True))
+        rows = []
+        for line, cleaned in chunk:
+            if cleaned['email'] in existing:
+                self.report.add_error(line, cleaned['email'], {'email': 'A user with this email already exists'})
+            else:
+                rows.append((line, cleaned))
+        if self.dry_run:
+            self.report.created += len(rows)  # Would be created
+            return
+        if not rows:
+            return
+
+        users = [
+            User(email=cleaned['email'], full_name=cleaned['full_name'], bio=cleaned['bio'],
+                 is_staff=cleaned['is_staff'], is_active=cleaned['is_active'])
+            for _, cleaned in rows
+        ]
+        if self.invite:
+            for user in users:
+                user.set_unusable_password()
+        else:
+            hashes = self._hash_all([cleaned['password'] for _, cleaned in rows])
+            for user, (django_hash, bcrypt_hash) in zip(users, hashes):
+                user.password, user.password_hash = django_hash, bcrypt_hash
+
+        try:
+            with transaction.atomic():
+                User.objects.bulk_create(users)
+                tokens = self._create_invites(users)
+        except IntegrityError:
+            # Lost a race with another writer: fall back to row-by-row for this chunk
+            self._write_individually(rows, users)
+            return
+        self.report.created += len(users)
+        self.report.invites += tokens
+
+    def _write_individually(self, rows, users):
+        for (line, cleaned), user in zip(rows, users):
+            try:
+                with transaction.atomic():
+                    user.save(force_insert=True)
+                    tokens = self._create_invites([user])
+            except IntegrityError:
+                self.report.add_error(line, cleaned['email'], {'email': 'A user with this email already exists'})
+            else:
+                self.report.created += 1
+                self.report.invites += tokens
+
+    def _create_invites(self, users):
+        """Insert invites for users; returns their raw tokens for the report"""
+        if not self.invite:
+            return []
+        ttl = timedelta(days=getattr(settings, 'USER_INVITE_TTL_DAYS', 14))
+        invites, tokens = [], []
+        for user in users:
+            invite, token = UserInvite.issue(user, self.created_by, ttl)
+            invites.append(invite)
+            tokens.append({'email': user.email, 'token': token})
+        UserInvite.objects.bulk_create(invites)
+        return tokens
+
+
+def import_users(stream, file_format, **options):
+    return UserImporter(**options).run(stream, file_format)
@@ -1,4 +1,5 @@
 from django.utils import timezone
+from django.db import connections
 from adminapp.models import AdminAuditLog
 import json
 from datetime import timedelta  # <-- Add this import
@@ -8,6 +9,24 @@ from base.models import User, Course, UserSession  # <-- Add necessary imports
 User = get_user_model()  # <-- Get the user model
 
 
+def count_in_one_query(**querysets):
+    """
+    COUNT several querysets in one round-trip: each one becomes a scalar
+    subquery of a single SELECT. All querysets must use the same database.
+    """
+    selects, params = [], []
+    for name, queryset in querysets.items():
+        sql, query_params = queryset.order_by().values('pk').query.sql_with_params()
+        selects.append(f'(SELECT COUNT(*) FROM ({sql}) counted_{len(selects)})')
+        params.extend(query_params)
+    
+    using = next(iter(querysets.values())).db
+    with connections[using].cursor() as cursor:
+        cursor.execute('SELECT ' + ', '.join(selects), params)
+        row = cursor.fetchone()
+    return dict(zip(querysets, row))
+
+
 class AdminAuditLogger:
     """
     Utility class for logging admin actions
@@ -16,18 +35,22 @@ class AdminAuditLogger:
     def log_action(admin_user, action, model_name=None, object_id=None, 
                    details=None, request=None):
         """
-        Log an admin action
+        Log an admin action. The record is queued and written in batches by
+        adminapp.audit off the request thread (inline when AUDIT_LOG_SYNC).
         """
-        audit_log = AdminAuditLog.objects.create(
+        from adminapp.audit import record
+        
+        audit_log = AdminAuditLog(
             admin_user=admin_user,
             action=action,
             model_name=model_name or '',
             object_id=str(object_id) if object_id else '',
             details=details or {},
             ip_address=request.META.get('REMOTE_ADDR') if request else None,
-            user_agent=request.META.get('HTTP_USER_AGENT', '') if request else ''
+            user_agent=request.META.get('HTTP_USER_AGENT', '') if request else '',
+            created_at=timezone.now()
         )
-        return audit_log
+        return record(audit_log)
     
     @staticmethod
     def log_user_management(admin_user, action, user, request=None):
@@ -64,66 +87,60 @@ class AdminAuditLogger:
 
 
 class AdminStatsCalculator:
+    DASHBOARD_TTL = 30  # Seconds the cached stats count as fresh
+    DASHBOARD_STALE_TTL = 300  # Extra seconds stale stats are served while one caller refreshes
+
     @staticmethod
-    def get_dashboard_stats():
-        """Calculate dashboard statistics"""
-        today = timezone.now().date()
-        yesterday = today - timedelta(days=1)  # <-- Now timedelta is defined
-        
-        # Get total users
-        total_users = User.objects.filter(is_active=True).count()
-        
-        # Get active users today (users who logged in today)
-        active_users_today = User.objects.filter(
-            last_login__date=today
-        ).count()
-        
-        # Get total courses
-        total_courses = Course.objects.filter(is_active=True).count()
-        total_active_courses = Course.objects.filter(is_active=True).count()
+    def get_dashboard_stats(fresh=False):
+        """
+        Dashboard statistics through base.cache.cached_query ('admin_stats'),
+        with stale-while-revalidate: once the TTL passes, the first caller
+        recomputes while concurrent callers keep getting the stale copy, so
+        open admin tabs never stampede the DB. Pass fresh=True to recompute.
+        """
+        from base.cache import cached_query
         
-        # Get pending approvals
+        calculator = AdminStatsCalculator
+        return cached_query(
+            'admin_stats', ('dashboard',), calculator.compute_dashboard_stats,
+            ttl=calculator.DASHBOARD_TTL, stale_ttl=calculator.DASHBOARD_STALE_TTL, refresh=fresh
+        )
+
+    @staticmethod
+    def compute_dashboard_stats():
+        """Calculate dashboard statistics in a single database round-trip"""
         from adminapp.models import CourseApproval
-        pending_approvals = CourseApproval.objects.filter(
-            status='pending'
-        ).count()
+        from base.models import AILab, Certificate, CourseModule
         
-        # Get total AI labs
-        from base.models import AILab
-        total_ai_labs = AILab.objects.filter(is_active=True).count()
+        start_of_today = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
         
-        # Get certificates issued
-        from base.models import Certificate
-        total_certificates_issued = Certificate.objects.count()
-        
-        # Get total modules
-        from base.models import CourseModule
-        total_modules = CourseModule.objects.count()
-        
-        # Calculate engagement rate (simplified)
-        total_sessions = UserSession.objects.filter(
-            created_at__date=today
-        ).count()
-        total_logged_in_users = User.objects.filter(
-            last_login__date=today
-        ).count()
+        counts = count_in_one_query(
+            total_users=User.objects.filter(is_active=True),
+            # Users who logged in today
+            active_users_today=User.objects.filter(last_login__gte=start_of_today),
+            total_active_courses=Course.objects.filter(is_active=True),
+            pending_approvals=CourseApproval.objects.filter(status='pending'),
+            total_ai_labs=AILab.objects.filter(is_active=True),
+            total_certificates_issued=Certificate.objects.all(),
+            total_modules=CourseModule.objects.all(),
+        )
         
         engagement_rate = 0
-        if total_users > 0:
-            engagement_rate = (total_logged_in_users / total_users) * 100
+        if counts['total_users'] > 0:
+            engagement_rate = (counts['active_users_today'] / counts['total_users']) * 100
         
         return {
-            'total_users': total_users,
-            'active_users_today': active_users_today,
-            'total_courses': total_courses,
-            'total_active_courses': total_active_courses,
-            'pending_approvals': pending_approvals,
-            'total_ai_labs': total_ai_labs,
-            'total_certificates_issued': total_certificates_issued,
+            'total_users': counts['total_users'],
+            'active_users_today': counts['active_users_today'],
+            'total_courses': counts['total_active_courses'],
+            'total_active_courses': counts['total_active_courses'],
+            'pending_approvals': counts['pending_approvals'],
+            'total_ai_labs': counts['total_ai_labs'],
+            'total_certificates_issued': counts['total_certificates_issued'],
             'revenue_today': 0.00,
             'revenue_month': 0.00,
             'system_uptime': 99.9,
-            'total_modules': total_modules,
+            'total_modules': counts['total_modules'],
             'engagement_rate': round(engagement_rate, 1),
         }
     
@@ -133,10 +150,10 @@ class AdminStatsCalculator:
         today = timezone.now().date()
         week_ago = today - timedelta(days=7)
         
-        # New users this week
-        new_users_week = User.objects.filter(
-            created_at__date__gte=week_ago
-        ).count()
+        # New users and completions this week (daily rollups + live today)
+        from adminapp.rollups import metric_total
+        new_users_week = metric_total('signups', week_ago, today)
+        completions_week = metric_total('completions', week_ago, today)
         
         # New courses this week
         from base.models import Course
@@ -144,13 +161,6 @@ class AdminStatsCalculator:
             created_at__date__gte=week_ago
         ).count()
         
-        # Course completions this week
-        from base.models import UserCourseProgress
-        completions_week = UserCourseProgress.objects.filter(
-            is_completed=True,
-            completed_at__date__gte=week_ago
-        ).count()
-        
         return {
             'new_users_week': new_users_week,
             'new_courses_week': new_courses_week,
@@ -1,3 +1,7 @@
+import csv
+import json
+import logging
+
 from rest_framework import status, viewsets
 from rest_framework.decorators import api_view, permission_classes, action
 from rest_framework.response import Response
@@ -6,24 +10,33 @@ from rest_framework.views import APIView
 from django.utils import timezone
 from django.db.models import Count, Q, Sum, F
 from django.contrib.auth import get_user_model
-from django.core.paginator import Paginator
 from django.shortcuts import get_object_or_404
+from django.core.exceptions import ValidationError
 from django.conf import settings
 from base.models import (
     User, UserSession, Course, AILab, Certificate, 
     UserCourseProgress, UserLearningStats, LearningPath
 )
-from adminapp.models import AdminAuditLog, SystemConfig, CourseApproval
+from adminapp.models import AdminAuditLog, AdminJob, SystemConfig, CourseApproval, CourseStatsSnapshot
 from adminapp.serializers import *
 from adminapp.permissions import IsAdminUser, IsSuperAdmin
 from adminapp.utils import AdminAuditLogger, AdminStatsCalculator
+from adminapp.analytics import with_snapshot_stats, time_series, cumulative_series
+from adminapp.rollups import metric_total, rollup_series
+from adminapp.pagination import CursorPagination
+from adminapp.bulk import BulkOperation, update_rows, delete_rows, deactivate_users
+from adminapp.config import bump_generation
+from base.cache import cached_query
 from rest_framework.authentication import SessionAuthentication, BasicAuthentication, TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
-from datetime import timedelta
+from datetime import date, timedelta
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
 
 User = get_user_model()
+logger = logging.getLogger(__name__)
+
+ADMIN_STATS_CACHE_TTL = 60  # Seconds; course and module writes invalidate sooner (base.signals)
 
 
 # ==================== Admin Authentication Views ====================
@@ -114,10 +127,6 @@ class AdminProfileView(APIView):
     
     def get(self, request):
         """Get admin profile information"""
-        print(f"=== AdminProfileView ===")
-        print(f"User: {request.user.email}")
-        print(f"Is staff: {request.user.is_staff}")
-        
         return Response(
             AdminUserSerializer(request.user).data,
             status=status.HTTP_200_OK
@@ -131,26 +140,106 @@ class AdminDashboardView(APIView):
     
     def get(self, request):
         """Get admin dashboard statistics"""
-        print(f"=== AdminDashboardView ===")
-        print(f"Request user: {request.user}")
-        print(f"User email: {request.user.email}")
-        print(f"Is authenticated: {request.user.is_authenticated}")
-        print(f"Is staff: {request.user.is_staff}")
-        print(f"Is superuser: {request.user.is_superuser}")
-        print(f"Token from header: {request.headers.get('Authorization', 'No token')}")
-        
         try:
             from adminapp.utils import AdminStatsCalculator
-            stats = AdminStatsCalculator.get_dashboard_stats()
+            # ?fresh=1 skips the stats cache, for superadmins only
+            fresh = request.query_params.get('fresh') == '1' and request.user.is_superuser
+            stats = AdminStatsCalculator.get_dashboard_stats(fresh=fresh)
             serializer = AdminDashboardStatsSerializer(stats)
             return Response(serializer.data, status=status.HTTP_200_OK)
         except Exception as e:
-            print(f"Error in AdminDashboardView: {str(e)}")
+            logger.exception('Failed to compute dashboard stats')
             return Response(
                 {'error': str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+# ==================== Bulk Actions ====================
+MAX_AUDITED_IDS = 1000
+
+
+def run_bulk_action(request, operation, ids, action, model_name, noun, verb, count_key, ids_key=None):
+    """
+    Apply a BulkOperation to `ids` for one of the bulk_* actions. Large
+    selections (over BULK_ASYNC_THRESHOLD ids) or {"async": true} run as an
+    AdminJob and answer 202 with the job; poll /api/admin/jobs/<id>/.
+    """
+    from adminapp.jobs import start_job
+    
+    if not isinstance(ids, list) or not ids:
+        return Response(
+            {'error': f'No {noun} IDs provided'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    def execute(progress=None):
+        result = operation.run(ids, progress)
+        details = {'count': result['affected'], 'requested': result['requested']}
+        if ids_key:
+            details[ids_key] = [str(value) for value in ids[:MAX_AUDITED_IDS]]
+        if progress is not None and progress.job is not None:
+            details['job_id'] = str(progress.job.pk)
+        AdminAuditLogger.log_action(
+            admin_user=request.user,
+            action=action,
+            model_name=model_name,
+            details=details,
+            request=request
+        )
+        return result
+    
+    threshold = getattr(settings, 'BULK_ASYNC_THRESHOLD', 5000)
+    if len(ids) > threshold or str(request.data.get('async', '')).lower() == 'true':
+        job = start_job(action, execute, created_by=request.user, total=len(ids))
+        job.refresh_from_db()
+        return Response({
+            'message': f'{verb.capitalize()} {len(ids)} {noun}s in the background',
+            'job': AdminJobSerializer(job).data,
+        }, status=status.HTTP_202_ACCEPTED)
+    
+    result = execute()
+    return Response({
+        'message': f'Successfully {verb} {result["affected"]} {noun}s',
+        count_key: result['affected'],
+        **result,
+    })
+
+
+def schedule_hard_delete(request, model, ids, action, noun):
+    """
+    Hard-delete courses or users: flag them pending_delete now and purge
+    them and everything that cascades from them in an AdminJob (202).
+    """
+    from adminapp.deletion import schedule_deletion
+    
+    if not isinstance(ids, list) or not ids:
+        return Response(
+            {'error': f'No {noun} IDs provided'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if model is User and str(request.user.pk) in map(str, ids):
+        return Response(
+            {'error': 'You cannot delete your own account'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    flagged, job = schedule_deletion(model, ids, created_by=request.user)
+    AdminAuditLogger.log_action(
+        admin_user=request.user,
+        action=action,
+        model_name=model.__name__,
+        object_id=ids[0] if len(ids) == 1 else None,
+        details={'count': flagged, 'job_id': str(job.pk),
+                 'ids': [str(value) for value in ids[:MAX_AUDITED_IDS]]},
+        request=request
+    )
+    job.refresh_from_db()
+    return Response({
+        'message': f'{flagged} {noun}s scheduled for deletion',
+        'pending_count': flagged,
+        'job': AdminJobSerializer(job).data,
+    }, status=status.HTTP_202_ACCEPTED)
+
 from adminapp.authentication import CsrfExemptSessionAuthentication
 
 class AdminUserViewSet(viewsets.ModelViewSet):
@@ -164,6 +253,7 @@ class AdminUserViewSet(viewsets.ModelViewSet):
     
     # Add this queryset attribute
     queryset = User.objects.all().order_by('-created_at')
+    cursor_pagination = CursorPagination(['-created_at', '-id'])
     
     def get_serializer_class(self):
         if self.action == 'create':
@@ -174,7 +264,7 @@ class AdminUserViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         """Override to add annotations for stats"""
-        queryset = User.objects.all().order_by('-created_at')
+        queryset = User.objects.filter(pending_delete=False).order_by('-created_at')
         
         # Annotate with course stats
         from django.db.models import Count, Sum, Q
@@ -217,21 +307,10 @@ class AdminUserViewSet(viewsets.ModelViewSet):
             )
         
         # Pagination
-        page = request.query_params.get('page', 1)
-        per_page = request.query_params.get('per_page', 20)
+        page = self.cursor_pagination.paginate(queryset, request.query_params)
+        serializer = self.get_serializer(page.rows, many=True)
         
-        paginator = Paginator(queryset, per_page)
-        page_obj = paginator.get_page(page)
-        
-        serializer = self.get_serializer(page_obj, many=True)
-        
-        return Response({
-            'users': serializer.data,
-            'page': page_obj.number,
-            'total_pages': paginator.num_pages,
-            'total_users': paginator.count,
-            'per_page': per_page
-        })
+        return Response(page.data('users', serializer.data, 'total_users'))
 
         
     # @method_decorator(csrf_exempt)
@@ -255,6 +334,89 @@ class AdminUserViewSet(viewsets.ModelViewSet):
             )
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
+    @action(detail=False, methods=['post'], url_path='import')
+    def bulk_import(self, request):
+        """
+        Import users from an uploaded CSV or JSONL file (multipart field
+        'file'). Columns: email, full_name, password, is_staff, is_active, bio.
+        invite=true creates accounts without passwords and returns one-time
+        invite tokens; dry_run=true only validates. Files with passwords over
+        USER_IMPORT_ASYNC_BYTES (or async=true) are imported in an AdminJob
+        and answer 202 with the job, since hashing dominates the cost.
+        """
+        import os
+        import shutil
+        import tempfile
+        from adminapp.jobs import start_job
+        from adminapp.user_import import FORMATS, import_users
+        
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response(
+                {'error': 'Upload the file as multipart field "file"'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        file_format = request.data.get('file_format') or (
+            'jsonl' if upload.name.lower().endswith(('.jsonl', '.ndjson')) else 'csv'
+        )
+        if file_format not in FORMATS:
+            return Response(
+                {'error': f'file_format must be one of: {", ".join(FORMATS)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        invite = str(request.data.get('invite', '')).lower() == 'true'
+        dry_run = str(request.data.get('dry_run', '')).lower() == 'true'
+        
+        def log_import(report, job=None):
+            details = {'created': report.created, 'failed': report.failed,
+                       'total_rows': report.total, 'invite': invite}
+            if job is not None:
+                details['job_id'] = str(job.pk)
+            AdminAuditLogger.log_action(
+                admin_user=request.user,
+                action='users_bulk_imported',
+                model_name='User',
+                details=details,
+                request=request
+            )
+        
+        run_async = upload.size > getattr(settings, 'USER_IMPORT_ASYNC_BYTES', 64 * 1024)
+        if not (invite or dry_run) and (run_async or str(request.data.get('async', '')).lower() == 'true'):
+            # The upload is gone once the response is sent, so the job reads a copy
+            with tempfile.NamedTemporaryFile(suffix=f'.{file_format}', delete=False) as copy:
+                shutil.copyfileobj(upload.file, copy)
+            
+            def execute(progress):
+                try:
+                    with open(copy.name, 'rb') as stream:
+                        report = import_users(stream, file_format, created_by=request.user)
+                finally:
+                    os.unlink(copy.name)
+                log_import(report, progress.job)
+                return report.as_dict()
+            
+            job = start_job('users_bulk_imported', execute, created_by=request.user)
+            job.refresh_from_db()
+            return Response({
+                'message': 'Importing users in the background',
+                'job': AdminJobSerializer(job).data,
+            }, status=status.HTTP_202_ACCEPTED)
+        
+        try:
+            report = import_users(
+                upload.file, file_format, invite=invite, dry_run=dry_run,
+                created_by=request.user
+            )
+        except UnicodeDecodeError:
+            return Response({'error': 'File must be UTF-8 encoded'}, status=status.HTTP_400_BAD_REQUEST)
+        except csv.Error as e:
+            return Response({'error': f'Malformed CSV: {e}'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if not dry_run:
+            log_import(report)
+        
+        return Response(report.as_dict(), status=status.HTTP_200_OK)
+    
     @action(detail=True, methods=['post'])
     def activate(self, request, pk=None):
         """Activate a user account"""
@@ -317,7 +479,11 @@ class AdminUserViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['get'])
     def stats(self, request):
-        """Get user statistics"""
+        """Get user statistics (cached for ADMIN_STATS_CACHE_TTL seconds)"""
+        return Response(cached_query('admin_stats', ('users',), self.compute_stats, ttl=ADMIN_STATS_CACHE_TTL))
+    
+    @staticmethod
+    def compute_stats():
         from django.utils import timezone
         from datetime import timedelta
         
@@ -329,9 +495,8 @@ class AdminUserViewSet(viewsets.ModelViewSet):
         today = timezone.now().date()
         new_users_today = User.objects.filter(created_at__date=today).count()
         
-        # New users this week
-        week_ago = timezone.now() - timedelta(days=7)
-        new_users_week = User.objects.filter(created_at__gte=week_ago).count()
+        # New users this week (daily rollups + live today)
+        new_users_week = metric_total('signups', today - timedelta(days=7), today)
         
         # Total learning hours
         from base.models import UserLearningStats
@@ -351,7 +516,7 @@ class AdminUserViewSet(viewsets.ModelViewSet):
                 'courses_completed': stats.total_courses_completed,
             })
         
-        return Response({
+        return {
             'total_users': total_users,
             'active_users': active_users,
             'admin_users': admin_users,
@@ -359,106 +524,49 @@ class AdminUserViewSet(viewsets.ModelViewSet):
             'new_users_week': new_users_week,
             'total_learning_hours': total_learning_hours,
             'top_learners': top_learners_data,
-        })
+        }
+    
+    def destroy(self, request, pk=None):
+        """Hard delete: the account is hidden at once and purged in the background"""
+        get_object_or_404(User.objects.filter(pending_delete=False), pk=pk)
+        return schedule_hard_delete(request, User, [pk], 'user_hard_deleted', 'user')
     
     @action(detail=False, methods=['post'])
     def bulk_activate(self, request):
         """Activate multiple users"""
-        user_ids = request.data.get('user_ids', [])
-        
-        if not user_ids:
-            return Response(
-                {'error': 'No user IDs provided'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        users = User.objects.filter(id__in=user_ids)
-        updated_count = users.update(is_active=True)
-        
-        AdminAuditLogger.log_action(
-            admin_user=request.user,
-            action='users_bulk_activated',
-            model_name='User',
-            details={
-                'count': updated_count,
-                'user_ids': user_ids,
-            },
-            request=request
+        return run_bulk_action(
+            request, BulkOperation(User, update_rows(User, is_active=True)),
+            request.data.get('user_ids', []),
+            action='users_bulk_activated', model_name='User', noun='user', verb='activated',
+            count_key='activated_count', ids_key='user_ids'
         )
-        
-        return Response({
-            'message': f'Successfully activated {updated_count} users',
-            'activated_count': updated_count
-        })
     
     @action(detail=False, methods=['post'])
     def bulk_deactivate(self, request):
-        """Deactivate multiple users"""
-        user_ids = request.data.get('user_ids', [])
-        
-        if not user_ids:
-            return Response(
-                {'error': 'No user IDs provided'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        users = User.objects.filter(id__in=user_ids)
-        updated_count = users.update(is_active=False)
-        
-        # Invalidate all active sessions for deactivated users
-        UserSession.objects.filter(user__in=users, is_active=True).update(is_active=False)
-        
-        AdminAuditLogger.log_action(
-            admin_user=request.user,
-            action='users_bulk_deactivated',
-            model_name='User',
-            details={
-                'count': updated_count,
-                'user_ids': user_ids,
-            },
-            request=request
+        """Deactivate multiple users and end their sessions"""
+        return run_bulk_action(
+            request, BulkOperation(User, deactivate_users),
+            request.data.get('user_ids', []),
+            action='users_bulk_deactivated', model_name='User', noun='user', verb='deactivated',
+            count_key='deactivated_count', ids_key='user_ids'
         )
-        
-        return Response({
-            'message': f'Successfully deactivated {updated_count} users',
-            'deactivated_count': updated_count
-        })
     
     @action(detail=False, methods=['delete'])
     def bulk_delete(self, request):
-        """Delete multiple users"""
-        user_ids = request.data.get('user_ids', [])
-        
-        if not user_ids:
-            return Response(
-                {'error': 'No user IDs provided'},
-                status=status.HTTP_400_BAD_REQUEST
+        """
+        Delete multiple users. Soft delete (deactivate and end sessions)
+        unless "hard": true, which removes them and their data in a job.
+        """
+        if str(request.data.get('hard', '')).lower() == 'true':
+            return schedule_hard_delete(
+                request, User, request.data.get('user_ids', []), 'users_hard_deleted', 'user'
             )
-        
-        users = User.objects.filter(id__in=user_ids)
-        deleted_count = users.count()
-        
-        # Soft delete (deactivate) instead of actual delete
-        users.update(is_active=False)
-        
-        # Invalidate all sessions
-        UserSession.objects.filter(user__in=users, is_active=True).update(is_active=False)
-        
-        AdminAuditLogger.log_action(
-            admin_user=request.user,
-            action='users_bulk_deleted',
-            model_name='User',
-            details={
-                'count': deleted_count,
-                'user_ids': user_ids,
-            },
-            request=request
+        return run_bulk_action(
+            request, BulkOperation(User, deactivate_users),
+            request.data.get('user_ids', []),
+            action='users_bulk_deleted', model_name='User', noun='user', verb='deleted',
+            count_key='deleted_count', ids_key='user_ids'
         )
-        
-        return Response({
-            'message': f'Successfully deleted {deleted_count} users',
-            'deleted_count': deleted_count
-        })
     
     @action(detail=False, methods=['post'])
     def send_welcome(self, request):
@@ -506,6 +614,13 @@ class AdminCourseViewSet(viewsets.ModelViewSet):
     authentication_classes = [CsrfExemptSessionAuthentication, BasicAuthentication]
     permission_classes = [IsAuthenticated, IsAdminUser]
     queryset = Course.objects.all().order_by('-created_at')
+    cursor_pagination = CursorPagination(['-created_at', '-id'])
+    
+    def get_queryset(self):
+        queryset = super().get_queryset().filter(pending_delete=False)
+        if self.action in ['list', 'retrieve']:
+            queryset = with_snapshot_stats(queryset.with_module_count()).with_approval()
+        return queryset
     
     def get_serializer_class(self):
         if self.action in ['create', 'update', 'partial_update']:
@@ -514,12 +629,6 @@ class AdminCourseViewSet(viewsets.ModelViewSet):
     
     def list(self, request):
         """List courses with statistics"""
-        print(f"=== AdminCourseViewSet.list() ===")
-        print(f"Request user: {request.user}")
-        print(f"User email: {request.user.email if request.user else 'No user'}")
-        print(f"Is authenticated: {request.user.is_authenticated if request.user else False}")
-        print(f"Authorization header: {request.headers.get('Authorization', 'No header')}")
-        
         queryset = self.filter_queryset(self.get_queryset())
         
         # Apply filters
@@ -536,64 +645,22 @@ class AdminCourseViewSet(viewsets.ModelViewSet):
             )
         
         # Pagination
-        page = request.query_params.get('page', 1)
-        per_page = request.query_params.get('per_page', 20)
+        page = self.cursor_pagination.paginate(queryset, request.query_params)
         
-        paginator = Paginator(queryset, per_page)
-        page_obj = paginator.get_page(page)
+        # Stats come from the snapshot/module-count annotations, not a query per course
+        serializer = CourseDetailSerializer(page.rows, many=True)
         
-        # Calculate stats for each course
-        courses_with_stats = []
-        for course in page_obj:
-            # Get enrolled students count
-            enrolled_students = UserCourseProgress.objects.filter(course=course).count()
-            
-            # Get modules count
-            modules_count = CourseModule.objects.filter(course=course).count()
-            
-            # Calculate completion rate
-            total_enrolled = enrolled_students
-            completed = UserCourseProgress.objects.filter(course=course, is_completed=True).count()
-            completion_rate = (completed / total_enrolled * 100) if total_enrolled > 0 else 0
-            
-            course_data = {
-                'id': str(course.id),
-                'title': course.title,
-                'description': course.description,
-                'category': course.category,
-                'difficulty': course.difficulty,
-                'instructor': course.instructor,
-                'duration_minutes': course.duration_minutes,
-                'thumbnail': course.thumbnail,
-                'is_active': course.is_active,
-                'created_at': course.created_at,
-                'updated_at': course.updated_at,
-                'enrolled_students': enrolled_students,
-                'modules_count': modules_count,
-                'completion_rate': round(completion_rate, 1)
-            }
-            courses_with_stats.append(course_data)
-        
-        return Response({
-            'courses': courses_with_stats,
-            'page': page_obj.number,
-            'total_pages': paginator.num_pages,
-            'total_courses': paginator.count,
-            'per_page': per_page
-        })
+        return Response(page.data('courses', serializer.data, 'total_courses'))
     
     def create(self, request):
         """Create a new course"""
-        print(f"=== AdminCourseViewSet.create() ===")
-        print(f"Request user: {request.user.email}")
-        print(f"Request data: {request.data}")
-        
         serializer = self.get_serializer(data=request.data)
         if serializer.is_valid():
-            print("Serializer is valid")
             try:
                 course = serializer.save()
-                print(f"Course created: {course.title}")
+                logger.info('Course created', extra={
+                    'course_id': str(course.id), 'user_id': str(request.user.pk)
+                })
                 
                 # Log the action
                 AdminAuditLogger.log_action(
@@ -613,15 +680,13 @@ class AdminCourseViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_201_CREATED
                 )
             except Exception as e:
-                print(f"Error creating course: {str(e)}")
-                import traceback
-                traceback.print_exc()
+                logger.exception('Failed to create course')
                 return Response(
                     {'error': f'Failed to create course: {str(e)}'},
                     status=status.HTTP_500_INTERNAL_SERVER_ERROR
                 )
         else:
-            print(f"Serializer errors: {serializer.errors}")
+            logger.info('Invalid course payload', extra={'errors': serializer.errors})
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
     # ... rest of your existing actions ...
@@ -683,178 +748,207 @@ class AdminCourseViewSet(viewsets.ModelViewSet):
             status=status.HTTP_200_OK
         )
 
+    def destroy(self, request, pk=None):
+        """Hard delete: the course is hidden at once and purged in the background"""
+        get_object_or_404(Course.objects.filter(pending_delete=False), pk=pk)
+        return schedule_hard_delete(request, Course, [pk], 'course_hard_deleted', 'course')
+    
     @action(detail=False, methods=['post'])
     def bulk_activate(self, request):
         """Activate multiple courses"""
-        course_ids = request.data.get('course_ids', [])
-        
-        if not course_ids:
-            return Response(
-                {'error': 'No course IDs provided'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        courses = Course.objects.filter(id__in=course_ids)
-        updated_count = courses.update(is_active=True)
-        
-        # Log the action
-        AdminAuditLogger.log_action(
-            admin_user=request.user,
-            action='courses_bulk_activated',
-            model_name='Course',
-            details={
-                'count': updated_count,
-                'course_ids': course_ids,
-            },
-            request=request
+        return run_bulk_action(
+            request, BulkOperation(Course, update_rows(Course, is_active=True)),
+            request.data.get('course_ids', []),
+            action='courses_bulk_activated', model_name='Course', noun='course', verb='activated',
+            count_key='activated_count', ids_key='course_ids'
         )
-        
-        return Response({
-            'message': f'Successfully activated {updated_count} courses',
-            'activated_count': updated_count
-        })
     
     @action(detail=False, methods=['post'])
     def bulk_deactivate(self, request):
         """Deactivate multiple courses"""
-        course_ids = request.data.get('course_ids', [])
-        
-        if not course_ids:
-            return Response(
-                {'error': 'No course IDs provided'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        courses = Course.objects.filter(id__in=course_ids)
-        updated_count = courses.update(is_active=False)
-        
-        # Log the action
-        AdminAuditLogger.log_action(
-            admin_user=request.user,
-            action='courses_bulk_deactivated',
-            model_name='Course',
-            details={
-                'count': updated_count,
-                'course_ids': course_ids,
-            },
-            request=request
+        return run_bulk_action(
+            request, BulkOperation(Course, update_rows(Course, is_active=False)),
+            request.data.get('course_ids', []),
+            action='courses_bulk_deactivated', model_name='Course', noun='course', verb='deactivated',
+            count_key='deactivated_count', ids_key='course_ids'
         )
-        
-        return Response({
-            'message': f'Successfully deactivated {updated_count} courses',
-            'deactivated_count': updated_count
-        })
     
     @action(detail=False, methods=['delete'])
     def bulk_delete(self, request):
-        """Delete multiple courses (soft delete)"""
-        course_ids = request.data.get('course_ids', [])
-        
-        if not course_ids:
-            return Response(
-                {'error': 'No course IDs provided'},
-                status=status.HTTP_400_BAD_REQUEST
+        """
+        Delete multiple courses. Soft delete (deactivate) unless "hard": true,
+        which removes them and everything under them in a job.
+        """
+        if str(request.data.get('hard', '')).lower() == 'true':
+            return schedule_hard_delete(
+                request, Course, request.data.get('course_ids', []), 'courses_hard_deleted', 'course'
             )
+        return run_bulk_action(
+            request, BulkOperation(Course, update_rows(Course, is_active=False)),
+            request.data.get('course_ids', []),
+            action='courses_bulk_deleted', model_name='Course', noun='course', verb='deleted',
+            count_key='deleted_count', ids_key='course_ids'
+        )
+
+# ==================== System Management Views ====================
+class AuditLogView(APIView):
+    permission_classes = [IsSuperAdmin]
+    cursor_pagination = CursorPagination(['-created_at', '-id'], default_page_size=50)
+    
+    def get(self, request):
+        """Get audit logs with filtering"""
+        from adminapp.audit import filter_audit_logs
         
-        # Soft delete by deactivating
-        courses = Course.objects.filter(id__in=course_ids)
-        deleted_count = courses.count()
-        courses.update(is_active=False)
+        logs = AdminAuditLog.objects.select_related('admin_user')
         
-        # Log the action
-        AdminAuditLogger.log_action(
-            admin_user=request.user,
-            action='courses_bulk_deleted',
-            model_name='Course',
-            details={
-                'count': deleted_count,
-                'course_ids': course_ids,
-            },
-            request=request
-        )
+        # Apply filters
+        try:
+            logs = filter_audit_logs(logs, request.query_params)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
-        return Response({
-            'message': f'Successfully deleted {deleted_count} courses',
-            'deleted_count': deleted_count
-        })
+        # Pagination
+        page = self.cursor_pagination.paginate(logs, request.query_params)
+        serializer = AuditLogSerializer(page.rows, many=True)
+        
+        return Response(page.data('logs', serializer.data, 'total_logs'))
 
-# ==================== System Management Views ====================
-class SystemConfigView(APIView):
-    authentication_classes = [SessionAuthentication, BasicAuthentication]
+class AuditLogExportView(APIView):
     permission_classes = [IsSuperAdmin]
     
     def get(self, request):
-        """Get all system configurations"""
-        configs = SystemConfig.objects.all()
-        serializer = SystemConfigSerializer(configs, many=True)
-        return Response(serializer.data)
+        """
+        Stream audit logs as JSON lines, oldest first, with the same filters
+        as AuditLogView. ?include_archived=1 streams matching rows from the
+        monthly archives before the live table. Same rows as the audit-logs
+        dataset of DataExportView.
+        """
+        from django.http import StreamingHttpResponse
+        from adminapp.exports import export_stream
+        
+        try:
+            stream = export_stream('audit-logs', request.query_params, 'jsonl')
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        response = StreamingHttpResponse(stream, content_type='application/x-ndjson')
+        response['Content-Disposition'] = 'attachment; filename="audit-logs.jsonl"'
+        return response
+
+class DataExportView(APIView):
+    permission_classes = [IsAdminUser]
     
-    def put(self, request):
-        """Update system configurations"""
-        configs_data = request.data
+    def get(self, request, dataset):
+        """
+        Stream a dataset (users, enrollments, module-progress, audit-logs) as
+        ?file_format=csv (default) or jsonl; ?gzip=1 compresses on the fly.
+        Other query params are the dataset's filters.
+        """
+        from django.http import StreamingHttpResponse
+        from adminapp.exports import DATASETS, FORMATS, export_stream, export_filename
+        
+        if dataset not in DATASETS:
+            return Response(
+                {'error': f'Unknown export. Choose from: {", ".join(DATASETS)}'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        if DATASETS[dataset].superadmin_only and not request.user.is_superuser:
+            return Response(
+                {'error': 'Only super admins can export this data'},
+                status=status.HTTP_403_FORBIDDEN
+            )
         
-        for key, value in configs_data.items():
-            config, created = SystemConfig.objects.update_or_create(
-                key=key,
-                defaults={
-                    'value': value,
-                    'updated_by': request.user
-                }
+        file_format = request.query_params.get('file_format', 'csv')
+        if file_format not in FORMATS:
+            return Response(
+                {'error': f'file_format must be one of: {", ".join(FORMATS)}'},
+                status=status.HTTP_400_BAD_REQUEST
             )
+        compress = request.query_params.get('gzip') == '1'
+        
+        try:
+            stream = export_stream(dataset, request.query_params, file_format, compress)
+        except (ValueError, ValidationError):
+            return Response({'error': 'Invalid filter value'}, status=status.HTTP_400_BAD_REQUEST)
         
         AdminAuditLogger.log_action(
             admin_user=request.user,
-            action='system_config_updated',
-            details={'updated_keys': list(configs_data.keys())},
+            action='data_exported',
+            model_name=dataset,
+            details={'file_format': file_format, 'gzip': compress,
+                     'filters': {k: v for k, v in request.query_params.items()
+                                 if k not in ('file_format', 'gzip')}},
             request=request
         )
         
-        return Response(
-            {'message': 'System configurations updated successfully'},
-            status=status.HTTP_200_OK
+        content_type = 'text/csv' if file_format == 'csv' else 'application/x-ndjson'
+        response = StreamingHttpResponse(
+            stream, content_type='application/gzip' if compress else content_type
         )
+        response['Content-Disposition'] = (
+            f'attachment; filename="{export_filename(dataset, file_format, compress)}"'
+        )
+        return response
 
-class AuditLogView(APIView):
-    permission_classes = [IsSuperAdmin]
+# ==================== Admin Jobs ====================
+class AdminJobView(APIView):
+    permission_classes = [IsAdminUser]
     
-    def get(self, request):
-        """Get audit logs with filtering"""
-        logs = AdminAuditLog.objects.all().order_by('-created_at')
-        
-        # Apply filters
-        admin_user_id = request.query_params.get('admin_user_id')
-        action = request.query_params.get('action')
-        model_name = request.query_params.get('model_name')
-        start_date = request.query_params.get('start_date')
-        end_date = request.query_params.get('end_date')
-        
-        if admin_user_id:
-            logs = logs.filter(admin_user_id=admin_user_id)
-        if action:
-            logs = logs.filter(action=action)
-        if model_name:
-            logs = logs.filter(model_name=model_name)
-        if start_date:
-            logs = logs.filter(created_at__date__gte=start_date)
-        if end_date:
-            logs = logs.filter(created_at__date__lte=end_date)
+    def get(self, request, pk):
+        """Status and progress of a background admin job"""
+        from adminapp.jobs import fail_orphaned_jobs
+        
+        job = get_object_or_404(AdminJob, pk=pk)
+        if fail_orphaned_jobs([job]):
+            job.refresh_from_db()
+        return Response(AdminJobSerializer(job).data)
+
+# ==================== Bulk Enrollment ====================
+class BulkEnrollmentView(APIView):
+    permission_classes = [IsAdminUser]
+    
+    def post(self, request):
+        """
+        Enroll user_ids into course_ids, or into every course of
+        learning_path_id. Already-enrolled pairs are left untouched; the
+        response counts new vs existing enrollments per course.
+        """
+        from adminapp.enrollment import bulk_enroll
+        
+        user_ids = request.data.get('user_ids')
+        course_ids = request.data.get('course_ids')
+        learning_path_id = request.data.get('learning_path_id')
+        if not isinstance(user_ids, list) or not user_ids:
+            return Response({'error': 'user_ids must be a non-empty list'}, status=status.HTTP_400_BAD_REQUEST)
+        if bool(course_ids) == bool(learning_path_id):
+            return Response(
+                {'error': 'Provide either course_ids or learning_path_id'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if course_ids is not None and not isinstance(course_ids, list):
+            return Response({'error': 'course_ids must be a list'}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Pagination
-        page = request.query_params.get('page', 1)
-        per_page = request.query_params.get('per_page', 50)
+        learning_path = None
+        if learning_path_id:
+            try:
+                learning_path = LearningPath.objects.get(id=learning_path_id)
+            except (LearningPath.DoesNotExist, ValidationError):
+                return Response({'error': 'Learning path not found'}, status=status.HTTP_404_NOT_FOUND)
         
-        paginator = Paginator(logs, per_page)
-        page_obj = paginator.get_page(page)
+        result = bulk_enroll(user_ids, course_ids=course_ids, learning_path=learning_path)
         
-        serializer = AuditLogSerializer(page_obj, many=True)
+        AdminAuditLogger.log_action(
+            admin_user=request.user,
+            action='users_bulk_enrolled',
+            model_name='UserCourseProgress',
+            details={'users': result['users'], 'created': result['created'],
+                     'existing': result['existing'],
+                     'course_ids': [course['course_id'] for course in result['per_course']],
+                     'learning_path_id': str(learning_path.id) if learning_path else None},
+            request=request
+        )
         
-        return Response({
-            'logs': serializer.data,
-            'page': page_obj.number,
-            'total_pages': paginator.num_pages,
-            'total_logs': paginator.count,
-            'per_page': per_page
-        })
+        return Response(result, status=status.HTTP_200_OK)
 
 # ==================== Analytics Views ====================
 class AnalyticsView(APIView):
@@ -863,34 +957,43 @@ class AnalyticsView(APIView):
     
     def get(self, request):
         """Get analytics data"""
-        from datetime import datetime, timedelta
+        from datetime import date, timedelta
         
-        # Get date range
-        end_date = timezone.now().date()
-        start_date = end_date - timedelta(days=30)
-        
-        # User growth data
-        user_growth = []
-        current_date = start_date
-        while current_date <= end_date:
-            count = User.objects.filter(
-                created_at__date__lte=current_date
-            ).count()
-            user_growth.append({
-                'date': current_date.isoformat(),
-                'count': count
-            })
-            current_date += timedelta(days=1)
+        # Date range and bucket size (defaults: last 30 days, daily)
+        try:
+            end_date = date.fromisoformat(
+                request.query_params.get('end') or timezone.now().date().isoformat()
+            )
+            start_param = request.query_params.get('start')
+            start_date = date.fromisoformat(start_param) if start_param else end_date - timedelta(days=30)
+            granularity = request.query_params.get('granularity', 'day')
+            
+            # User growth: cumulative signups per bucket
+            user_growth = cumulative_series(
+                'user_signups', User.objects.all(), 'created_at',
+                start_date, end_date, granularity
+            )
+            
+            # Active users by bucket (last 7 days unless a range was requested).
+            # last_login moves forward on every login, so closed buckets are
+            # only cached for an hour instead of a day.
+            active_start = start_date if start_param else end_date - timedelta(days=7)
+            active_users = time_series(
+                'active_users', User.objects.all(), 'last_login',
+                active_start, end_date, granularity, closed_bucket_timeout=60 * 60
+            )
+            
+            # Platform activity (signups, logins, enrollments, ...) from daily rollups
+            platform_metrics = rollup_series(start_date, end_date, granularity)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
         # Course enrollment data
         course_enrollment = []
-        courses = Course.objects.filter(is_active=True)[:10]
+        courses = with_snapshot_stats(Course.objects.filter(is_active=True))[:10]
         for course in courses:
-            enrolled = UserCourseProgress.objects.filter(course=course).count()
-            completed = UserCourseProgress.objects.filter(
-                course=course, 
-                is_completed=True
-            ).count()
+            enrolled = course.enrolled_count
+            completed = course.completed_count
             course_enrollment.append({
                 'course_id': str(course.id),
                 'course_title': course.title,
@@ -899,26 +1002,15 @@ class AnalyticsView(APIView):
                 'completion_rate': (completed / enrolled * 100) if enrolled > 0 else 0
             })
         
-        # Active users by day
-        active_users = []
-        current_date = end_date - timedelta(days=7)
-        while current_date <= end_date:
-            count = User.objects.filter(
-                last_login__date=current_date
-            ).count()
-            active_users.append({
-                'date': current_date.isoformat(),
-                'count': count
-            })
-            current_date += timedelta(days=1)
-        
         return Response({
             'user_growth': user_growth,
             'course_enrollment': course_enrollment,
             'active_users': active_users,
+            'platform_metrics': platform_metrics,
             'time_range': {
                 'start_date': start_date.isoformat(),
-                'end_date': end_date.isoformat()
+                'end_date': end_date.isoformat(),
+                'granularity': granularity
             }
         })
 
@@ -948,10 +1040,6 @@ class AdminCourseModuleViewSet(viewsets.ModelViewSet):
     
     def list(self, request, course_pk=None):
         """List all modules for a specific course"""
-        print(f"=== AdminCourseModuleViewSet.list() ===")
-        print(f"Course ID: {course_pk}")
-        print(f"Request user: {request.user.email}")
-        
         try:
             course = Course.objects.get(id=course_pk)
         except Course.DoesNotExist:
@@ -970,16 +1058,11 @@ class AdminCourseModuleViewSet(viewsets.ModelViewSet):
                 'description': course.description,
             },
             'modules': serializer.data,
-            'total_modules': modules.count(),
+            'total_modules': len(serializer.data),
         })
     
     def create(self, request, course_pk=None):
         """Create a new module for a course"""
-        print(f"=== AdminCourseModuleViewSet.create() ===")
-        print(f"Course ID: {course_pk}")
-        print(f"Request user: {request.user.email}")
-        print(f"Request data: {request.data}")
-        
         try:
             course = Course.objects.get(id=course_pk)
         except Course.DoesNotExist:
@@ -994,8 +1077,8 @@ class AdminCourseModuleViewSet(viewsets.ModelViewSet):
         
         # Set default order if not provided
         if 'order' not in data:
-            last_module = CourseModule.objects.filter(course=course).order_by('-order').first()
-            data['order'] = (last_module.order + 1) if last_module else 1
+            from adminapp.module_order import next_order
+            data['order'] = next_order(course.id)
         
         serializer = self.get_serializer(data=data)
         if serializer.is_valid():
@@ -1019,8 +1102,35 @@ class AdminCourseModuleViewSet(viewsets.ModelViewSet):
                 AdminCourseModuleSerializer(module).data,
                 status=status.HTTP_201_CREATED
             )
-        print(f"Serializer errors: {serializer.errors}")
+        logger.info('Invalid module payload', extra={
+            'course_id': course_pk, 'errors': serializer.errors
+        })
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    @action(detail=False, methods=['post'])
+    def reorder(self, request, course_pk=None):
+        """Set the full module order: {"module_ids": [...]} lists every module of the course once"""
+        from adminapp.module_order import OrderError, set_order
+        
+        course = get_object_or_404(Course, pk=course_pk)
+        module_ids = request.data.get('module_ids')
+        if not isinstance(module_ids, list):
+            return Response({'error': 'module_ids must be a list'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            changes = set_order(course.id, module_ids)
+        except OrderError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        AdminAuditLogger.log_action(
+            admin_user=request.user,
+            action='modules_reordered',
+            model_name='CourseModule',
+            details={'course_title': course.title, 'modules_moved': len(changes)},
+            request=request
+        )
+        
+        serializer = AdminCourseModuleSerializer(self.get_queryset(), many=True)
+        return Response({'modules': serializer.data, 'modules_moved': len(changes)})
 
 # ==================== Course Management Enhanced Views ====================
 class AdminCourseStatsView(APIView):
@@ -1028,7 +1138,11 @@ class AdminCourseStatsView(APIView):
     permission_classes = [IsAdminUser]
     
     def get(self, request):
-        """Get course statistics for admin dashboard"""
+        """Get course statistics for admin dashboard (cached for ADMIN_STATS_CACHE_TTL seconds)"""
+        return Response(cached_query('admin_stats', ('courses',), self.compute, ttl=ADMIN_STATS_CACHE_TTL))
+    
+    @staticmethod
+    def compute():
         from datetime import datetime, timedelta
         
         today = timezone.now().date()
@@ -1041,25 +1155,25 @@ class AdminCourseStatsView(APIView):
         # New courses in last 30 days
         new_courses = Course.objects.filter(created_at__date__gte=last_30_days).count()
         
-        # Course enrollment stats
-        course_enrollment = Course.objects.annotate(
-            enrolled_count=Count('user_progress')
+        # Course enrollment stats (precomputed in course_stats_snapshots)
+        course_enrollment = CourseStatsSnapshot.objects.select_related(
+            'course'
         ).order_by('-enrolled_count')[:10]
         
         enrollment_data = []
-        for course in course_enrollment:
+        for snapshot in course_enrollment:
             enrollment_data.append({
-                'id': str(course.id),
-                'title': course.title,
-                'enrolled': course.enrolled_count,
-                'category': course.category,
+                'id': str(snapshot.course.id),
+                'title': snapshot.course.title,
+                'enrolled': snapshot.enrolled_count,
+                'category': snapshot.course.category,
             })
         
         # Course completion stats
         completion_stats = []
-        for course in Course.objects.all()[:10]:
-            total_enrolled = UserCourseProgress.objects.filter(course=course).count()
-            completed = UserCourseProgress.objects.filter(course=course, is_completed=True).count()
+        for course in with_snapshot_stats(Course.objects.all())[:10]:
+            total_enrolled = course.enrolled_count
+            completed = course.completed_count
             completion_rate = (completed / total_enrolled * 100) if total_enrolled > 0 else 0
             
             completion_stats.append({
@@ -1070,19 +1184,21 @@ class AdminCourseStatsView(APIView):
                 'completion_rate': round(completion_rate, 1)
             })
         
-        return Response({
+        return {
             'total_courses': total_courses,
             'active_courses': active_courses,
             'new_courses': new_courses,
             'top_enrolled_courses': enrollment_data,
             'completion_stats': completion_stats,
-        })
+        }
 
 class AdminModuleViewSet(viewsets.ModelViewSet):
     authentication_classes = [SessionAuthentication, BasicAuthentication]
     permission_classes = [IsAdminUser]
     queryset = CourseModule.objects.all().select_related('course').order_by('course', 'order')
     serializer_class = AdminCourseModuleSerializer
+    # (course, order) is unique, so it is a complete keyset on its own
+    cursor_pagination = CursorPagination(['course_id', 'order'])
     
     def get_serializer_class(self):
         if self.action in ['create', 'update', 'partial_update']:
@@ -1101,8 +1217,10 @@ class AdminModuleViewSet(viewsets.ModelViewSet):
         
         if course_id:
             queryset = queryset.filter(course_id=course_id)
-        if content_type:
-            queryset = queryset.filter(content_type=content_type)
+        if content_type in ('video', 'text'):
+            # Modules have no content_type column: a video URL makes a video module
+            has_video = Q(video_url__isnull=False) & ~Q(video_url='')
+            queryset = queryset.filter(has_video if content_type == 'video' else ~has_video)
         if is_active is not None:
             queryset = queryset.filter(is_active=is_active.lower() == 'true')
         if search:
@@ -1112,21 +1230,10 @@ class AdminModuleViewSet(viewsets.ModelViewSet):
             )
         
         # Pagination
-        page = request.query_params.get('page', 1)
-        per_page = request.query_params.get('per_page', 20)
-        
-        paginator = Paginator(queryset, per_page)
-        page_obj = paginator.get_page(page)
+        page = self.cursor_pagination.paginate(queryset, request.query_params)
+        serializer = self.get_serializer(page.rows, many=True)
         
-        serializer = self.get_serializer(page_obj, many=True)
-        
-        return Response({
-            'modules': serializer.data,
-            'page': page_obj.number,
-            'total_pages': paginator.num_pages,
-            'total_modules': paginator.count,
-            'per_page': per_page
-        })
+        return Response(page.data('modules', serializer.data, 'total_modules'))
     
     def create(self, request):
         """Create a new module"""
@@ -1154,30 +1261,31 @@ class AdminModuleViewSet(viewsets.ModelViewSet):
     
     @action(detail=True, methods=['post'])
     def reorder(self, request, pk=None):
-        """Reorder module position"""
+        """
+        Move a module to {"position": n} (1-based), or one step with
+        {"direction": "up" | "down"}. Modules in between shift in the same
+        transaction.
+        """
+        from adminapp.module_order import move_module
+        
         module = self.get_object()
         direction = request.data.get('direction')
+        position = request.data.get('position')
+        
+        if position is None:
+            if direction not in ('up', 'down'):
+                return Response(
+                    {'error': 'Provide position or direction (up/down)'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            current = CourseModule.objects.filter(course_id=module.course_id, order__lt=module.order).count() + 1
+            position = current - 1 if direction == 'up' else current + 1
+        try:
+            position = int(position)
+        except (TypeError, ValueError):
+            return Response({'error': 'position must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
         
-        if direction == 'up' and module.order > 1:
-            # Swap with module above
-            prev_module = CourseModule.objects.filter(
-                course=module.course,
-                order=module.order - 1
-            ).first()
-            if prev_module:
-                prev_module.order, module.order = module.order, prev_module.order
-                prev_module.save()
-                module.save()
-        elif direction == 'down':
-            # Swap with module below
-            next_module = CourseModule.objects.filter(
-                course=module.course,
-                order=module.order + 1
-            ).first()
-            if next_module:
-                next_module.order, module.order = module.order, next_module.order
-                next_module.save()
-                module.save()
+        changes = move_module(module, position)
         
         AdminAuditLogger.log_action(
             admin_user=request.user,
@@ -1187,6 +1295,7 @@ class AdminModuleViewSet(viewsets.ModelViewSet):
             details={
                 'direction': direction,
                 'new_order': module.order,
+                'modules_moved': len(changes),
             },
             request=request
         )
@@ -1199,93 +1308,32 @@ class AdminModuleViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['post'])
     def bulk_activate(self, request):
         """Activate multiple modules"""
-        module_ids = request.data.get('module_ids', [])
-        
-        if not module_ids:
-            return Response(
-                {'error': 'No module IDs provided'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        modules = CourseModule.objects.filter(id__in=module_ids)
-        updated_count = modules.update(is_active=True)
-        
-        AdminAuditLogger.log_action(
-            admin_user=request.user,
-            action='modules_bulk_activated',
-            model_name='CourseModule',
-            details={
-                'count': updated_count,
-                'module_ids': module_ids,
-            },
-            request=request
+        return run_bulk_action(
+            request, BulkOperation(CourseModule, update_rows(CourseModule, is_active=True)),
+            request.data.get('module_ids', []),
+            action='modules_bulk_activated', model_name='CourseModule', noun='module', verb='activated',
+            count_key='activated_count', ids_key='module_ids'
         )
-        
-        return Response({
-            'message': f'Successfully activated {updated_count} modules',
-            'activated_count': updated_count
-        })
     
     @action(detail=False, methods=['post'])
     def bulk_deactivate(self, request):
         """Deactivate multiple modules"""
-        module_ids = request.data.get('module_ids', [])
-        
-        if not module_ids:
-            return Response(
-                {'error': 'No module IDs provided'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        modules = CourseModule.objects.filter(id__in=module_ids)
-        updated_count = modules.update(is_active=False)
-        
-        AdminAuditLogger.log_action(
-            admin_user=request.user,
-            action='modules_bulk_deactivated',
-            model_name='CourseModule',
-            details={
-                'count': updated_count,
-                'module_ids': module_ids,
-            },
-            request=request
+        return run_bulk_action(
+            request, BulkOperation(CourseModule, update_rows(CourseModule, is_active=False)),
+            request.data.get('module_ids', []),
+            action='modules_bulk_deactivated', model_name='CourseModule', noun='module', verb='deactivated',
+            count_key='deactivated_count', ids_key='module_ids'
         )
-        
-        return Response({
-            'message': f'Successfully deactivated {updated_count} modules',
-            'deactivated_count': updated_count
-        })
     
     @action(detail=False, methods=['delete'])
     def bulk_delete(self, request):
         """Delete multiple modules"""
-        module_ids = request.data.get('module_ids', [])
-        
-        if not module_ids:
-            return Response(
-                {'error': 'No module IDs provided'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        modules = CourseModule.objects.filter(id__in=module_ids)
-        deleted_count = modules.count()
-        modules.delete()
-        
-        AdminAuditLogger.log_action(
-            admin_user=request.user,
-            action='modules_bulk_deleted',
-            model_name='CourseModule',
-            details={
-                'count': deleted_count,
-                'module_ids': module_ids,
-            },
-            request=request
+        return run_bulk_action(
+            request, BulkOperation(CourseModule, delete_rows(CourseModule)),
+            request.data.get('module_ids', []),
+            action='modules_bulk_deleted', model_name='CourseModule', noun='module', verb='deleted',
+            count_key='deleted_count', ids_key='module_ids'
         )
-        
-        return Response({
-            'message': f'Successfully deleted {deleted_count} modules',
-            'deleted_count': deleted_count
-        })
 
 
 class ModuleStatsView(APIView):
@@ -1293,7 +1341,11 @@ class ModuleStatsView(APIView):
     permission_classes = [IsAdminUser]
     
     def get(self, request):
-        """Get module statistics"""
+        """Get module statistics (cached for ADMIN_STATS_CACHE_TTL seconds)"""
+        return Response(cached_query('admin_stats', ('modules',), self.compute, ttl=ADMIN_STATS_CACHE_TTL))
+    
+    @staticmethod
+    def compute():
         total_modules = CourseModule.objects.count()
         active_modules = CourseModule.objects.filter(is_active=True).count()
         
@@ -1302,21 +1354,16 @@ class ModuleStatsView(APIView):
             total_duration=Sum('duration_minutes')
         )['total_duration'] or 0
         
-        # Modules by content type
-        modules_by_type = CourseModule.objects.values('content_type').annotate(
-            count=Count('id')
-        )
-        
-        type_stats = {}
-        for item in modules_by_type:
-            type_stats[item['content_type']] = item['count']
+        # Modules by content type (video when a video URL is set, text otherwise)
+        video_modules = CourseModule.objects.filter(video_url__isnull=False).exclude(video_url='').count()
+        type_stats = {'video': video_modules, 'text': total_modules - video_modules}
         
-        return Response({
+        return {
             'total_modules': total_modules,
             'active_modules': active_modules,
             'total_duration': total_duration,
             'modules_by_type': type_stats,
-        })
+        }
 
 from base.models import Discussion, CommunityEvent, EventAttendance
 from django.db.models import Count, Q
@@ -1327,6 +1374,7 @@ class DiscussionViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAdminUser]
     queryset = Discussion.objects.all().select_related('author', 'course').order_by('-created_at')
     serializer_class = DiscussionSerializer
+    cursor_pagination = CursorPagination(['-created_at', '-id'])
     
     def list(self, request):
         """List discussions with filtering"""
@@ -1352,21 +1400,10 @@ class DiscussionViewSet(viewsets.ModelViewSet):
             )
         
         # Pagination
-        page = request.query_params.get('page', 1)
-        per_page = request.query_params.get('per_page', 20)
-        
-        paginator = Paginator(queryset, per_page)
-        page_obj = paginator.get_page(page)
-        
-        serializer = self.get_serializer(page_obj, many=True)
+        page = self.cursor_pagination.paginate(queryset, request.query_params)
+        serializer = self.get_serializer(page.rows, many=True)
         
-        return Response({
-            'discussions': serializer.data,
-            'page': page_obj.number,
-            'total_pages': paginator.num_pages,
-            'total_discussions': paginator.count,
-            'per_page': per_page
-        })
+        return Response(page.data('discussions', serializer.data, 'total_discussions'))
     
     @action(detail=True, methods=['post'])
     def flag(self, request, pk=None):
@@ -1408,63 +1445,31 @@ class DiscussionViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['delete'])
     def bulk_delete(self, request):
         """Delete multiple discussions"""
-        discussion_ids = request.data.get('ids', [])
-        
-        if not discussion_ids:
-            return Response(
-                {'error': 'No discussion IDs provided'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        discussions = Discussion.objects.filter(id__in=discussion_ids)
-        deleted_count = discussions.count()
-        discussions.delete()
-        
-        AdminAuditLogger.log_action(
-            admin_user=request.user,
-            action='discussions_bulk_deleted',
-            model_name='Discussion',
-            details={'count': deleted_count},
-            request=request
+        return run_bulk_action(
+            request, BulkOperation(Discussion, delete_rows(Discussion)),
+            request.data.get('ids', []),
+            action='discussions_bulk_deleted', model_name='Discussion', noun='discussion', verb='deleted',
+            count_key='deleted_count'
         )
-        
-        return Response({
-            'message': f'Successfully deleted {deleted_count} discussions',
-            'deleted_count': deleted_count
-        })
     
     @action(detail=False, methods=['post'])
     def bulk_approve(self, request):
         """Approve multiple discussions"""
-        discussion_ids = request.data.get('ids', [])
-        
-        if not discussion_ids:
-            return Response(
-                {'error': 'No discussion IDs provided'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        discussions = Discussion.objects.filter(id__in=discussion_ids)
-        updated_count = discussions.update(is_flagged=False, status='active')
-        
-        AdminAuditLogger.log_action(
-            admin_user=request.user,
-            action='discussions_bulk_approved',
-            model_name='Discussion',
-            details={'count': updated_count},
-            request=request
+        return run_bulk_action(
+            request, BulkOperation(Discussion, update_rows(Discussion, is_flagged=False, status='active')),
+            request.data.get('ids', []),
+            action='discussions_bulk_approved', model_name='Discussion', noun='discussion', verb='approved',
+            count_key='approved_count'
         )
-        
-        return Response({
-            'message': f'Successfully approved {updated_count} discussions',
-            'approved_count': updated_count
-        })
 
 class CommunityEventViewSet(viewsets.ModelViewSet):
     authentication_classes = [SessionAuthentication, BasicAuthentication]
     permission_classes = [IsAdminUser]
-    queryset = CommunityEvent.objects.all().select_related('host').order_by('start_date')
+    queryset = CommunityEvent.objects.all().select_related('host').annotate(
+        attendees_count=Count('attendees')
+    ).order_by('start_date')
     serializer_class = CommunityEventSerializer
+    cursor_pagination = CursorPagination(['start_date', 'id'])
     
     def list(self, request):
         """List community events with filtering"""
@@ -1487,49 +1492,20 @@ class CommunityEventViewSet(viewsets.ModelViewSet):
             )
         
         # Pagination
-        page = request.query_params.get('page', 1)
-        per_page = request.query_params.get('per_page', 20)
+        page = self.cursor_pagination.paginate(queryset, request.query_params)
+        serializer = self.get_serializer(page.rows, many=True)
         
-        paginator = Paginator(queryset, per_page)
-        page_obj = paginator.get_page(page)
-        
-        serializer = self.get_serializer(page_obj, many=True)
-        
-        return Response({
-            'events': serializer.data,
-            'page': page_obj.number,
-            'total_pages': paginator.num_pages,
-            'total_events': paginator.count,
-            'per_page': per_page
-        })
+        return Response(page.data('events', serializer.data, 'total_events'))
     
     @action(detail=False, methods=['delete'])
     def bulk_delete(self, request):
         """Delete multiple events"""
-        event_ids = request.data.get('ids', [])
-        
-        if not event_ids:
-            return Response(
-                {'error': 'No event IDs provided'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        events = CommunityEvent.objects.filter(id__in=event_ids)
-        deleted_count = events.count()
-        events.delete()
-        
-        AdminAuditLogger.log_action(
-            admin_user=request.user,
-            action='events_bulk_deleted',
-            model_name='CommunityEvent',
-            details={'count': deleted_count},
-            request=request
+        return run_bulk_action(
+            request, BulkOperation(CommunityEvent, delete_rows(CommunityEvent)),
+            request.data.get('ids', []),
+            action='events_bulk_deleted', model_name='CommunityEvent', noun='event', verb='deleted',
+            count_key='deleted_count'
         )
-        
-        return Response({
-            'message': f'Successfully deleted {deleted_count} events',
-            'deleted_count': deleted_count
-        })
 
 class CommunityStatsView(APIView):
     authentication_classes = [SessionAuthentication, BasicAuthentication]
@@ -1578,9 +1554,7 @@ class CommunityStatsView(APIView):
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from django.db import connection
 from django.db.models import Count
-import psutil
 import time
 from datetime import datetime, timedelta
 
@@ -1595,7 +1569,14 @@ class SystemConfigView(APIView):
         return Response(serializer.data)
     
     def put(self, request):
-        """Update system configurations"""
+        """
+        Update system configurations from {key: value}. Every value is
+        validated first; then all of them are written in one transaction, or
+        none if any key is unknown or invalid.
+        """
+        from django.db import transaction
+        from adminapp.config import normalize
+        
         configs_data = request.data
         
         if not isinstance(configs_data, dict):
@@ -1604,33 +1585,22 @@ class SystemConfigView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        updated_configs = []
+        configs = SystemConfig.objects.in_bulk(list(configs_data), field_name='key')
         errors = []
+        now = timezone.now()
         
         for key, value in configs_data.items():
-            try:
-                config = SystemConfig.objects.get(key=key)
-                
-                # Validate based on data type
-                if config.data_type == 'boolean':
-                    if str(value).lower() not in ['true', 'false', '1', '0']:
-                        errors.append(f'{key}: Invalid boolean value')
-                        continue
-                    value = 'true' if str(value).lower() in ['true', '1'] else 'false'
-                elif config.data_type == 'integer':
-                    try:
-                        value = str(int(value))
-                    except ValueError:
-                        errors.append(f'{key}: Must be an integer')
-                        continue
-                
-                config.value = str(value)
-                config.updated_by = request.user
-                config.save()
-                updated_configs.append(key)
-                
-            except SystemConfig.DoesNotExist:
+            config = configs.get(key)
+            if config is None:
                 errors.append(f'{key}: Configuration key not found')
+                continue
+            try:
+                config.value = normalize(value, config.data_type)
+            except ValueError as error:
+                errors.append(f'{key}: {error}')
+                continue
+            config.updated_by = request.user
+            config.updated_at = now
         
         if errors:
             return Response(
@@ -1638,6 +1608,12 @@ class SystemConfigView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
+        updated_configs = list(configs_data)
+        if updated_configs:
+            with transaction.atomic():
+                SystemConfig.objects.bulk_update(configs.values(), ['value', 'updated_by', 'updated_at'])
+                bump_generation()
+        
         # Log the action
         AdminAuditLogger.log_action(
             admin_user=request.user,
@@ -1656,52 +1632,87 @@ class SystemHealthView(APIView):
     permission_classes = [IsSuperAdmin]
     
     def get(self, request):
-        """Get system health information"""
-        try:
-            # Check database connection
-            with connection.cursor() as cursor:
-                cursor.execute("SELECT 1")
-                database_status = 'connected'
-        except Exception as e:
-            database_status = f'error: {str(e)}'
-        
-        # Check disk usage
-        try:
-            disk_usage = psutil.disk_usage('/')
-            storage_usage = round((disk_usage.used / disk_usage.total) * 100, 2)
-        except Exception:
-            storage_usage = 0.0
-        
-        # Check CPU and memory
+        """
+        Latest health sample plus recent history, served from the background
+        sampler's memory (adminapp.health): no blocking CPU measurement and no
+        database writes. ?history=N limits the history (default 60, 0 = none).
+        """
+        from adminapp.health import get_sampler
+        from adminapp.audit import get_pipeline
+        from adminapp.metrics import api_summary
+        from base.cache import stats as cache_stats
+        
+        sampler = get_sampler()
+        # Without the sampler thread (tests) sample inline once the latest one is stale
+        latest = sampler.latest(max_age=None if sampler.running else sampler.interval)
         try:
-            cpu_percent = psutil.cpu_percent(interval=1)
-            memory = psutil.virtual_memory()
-        except Exception:
-            cpu_percent = 0
-            memory = None
-        
-        # Get active users (users who logged in last 5 minutes)
-        from django.utils import timezone
-        from base.models import User
-        active_users = User.objects.filter(
-            last_login__gte=timezone.now() - timedelta(minutes=5)
-        ).count()
+            history = max(int(request.query_params.get('history', 60)), 0)
+        except ValueError:
+            history = 60
+        
+        api = api_summary()
+        data = {
+            **latest,
+            'created_at': latest['sampled_at'],  # id and created_at kept from the SystemHealth row format
+            'uptime': sampler.availability(),
+            'api_response_time': api['overall']['mean_ms'],
+            'api': api,
+            'last_backup': None,
+            'process_uptime_seconds': round(time.time() - sampler.started_at),
+            'sampler': {'running': sampler.running, 'interval_seconds': sampler.interval},
+            'history': sampler.history(history),
+            'audit_log': get_pipeline().metrics(),
+            'cache': cache_stats(),
+        }
+        return Response(data)
+
+class SystemMetricsView(APIView):
+    authentication_classes = [SessionAuthentication, BasicAuthentication]
+    permission_classes = [IsSuperAdmin]
+    
+    def get(self, request):
+        """Per-route request metrics of all workers in Prometheus text format"""
+        from django.http import HttpResponse
+        from adminapp.metrics import prometheus_text
         
-        # Get latest health record or create new one
-        from adminapp.models import SystemHealth
-        
-        health = SystemHealth.objects.create(
-            status='healthy',
-            uptime=100.0,  # You would calculate this from uptime monitoring
-            database_status=database_status,
-            storage_usage=storage_usage,
-            active_users=active_users,
-            api_response_time=0.0,  # Calculate from API monitoring
-            last_backup=None  # Set this from backup system
-        )
+        return HttpResponse(prometheus_text(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+class SQLProfileView(APIView):
+    authentication_classes = [SessionAuthentication, BasicAuthentication]
+    permission_classes = [IsSuperAdmin]
+    
+    def get(self, request, pk=None):
+        """
+        Recent SQL profiles of this worker, newest first. ?flagged=true keeps
+        only requests with likely N+1 queries; the list omits each profile's
+        query groups, which the detail view (system/sql-profiles/<id>/) returns.
+        """
+        from adminapp.profiler import store
+        
+        if pk is not None:
+            profile = store.get(str(pk))
+            if profile is None:
+                return Response({'error': 'Profile not found'}, status=status.HTTP_404_NOT_FOUND)
+            return Response(profile)
+        
+        flagged = request.query_params.get('flagged', '').lower() in ('1', 'true', 'yes')
+        profiles = [
+            {key: value for key, value in profile.items() if key != 'groups'}
+            for profile in store.list(flagged_only=flagged)
+        ]
+        return Response({
+            'enabled': getattr(settings, 'SQL_PROFILER_ENABLED', False),
+            'header': getattr(settings, 'SQL_PROFILER_HEADER', 'X-Profile-SQL'),
+            'count': len(profiles),
+            'results': profiles,
+        })
+    
+    def delete(self, request, pk=None):
+        """Clear the stored profiles"""
+        from adminapp.profiler import store
         
-        serializer = SystemHealthSerializer(health)
-        return Response(serializer.data)
+        store.clear()
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
 class SettingCategoriesView(APIView):
     authentication_classes = [SessionAuthentication, BasicAuthentication]
@@ -1745,28 +1756,33 @@ class ResetConfigDefaultsView(APIView):
     permission_classes = [IsSuperAdmin]
     
     def post(self, request):
-        """Reset all configurations to default values"""
+        """Reset all configurations to default values (missing ones are created) in one transaction"""
+        from django.db import transaction
         from adminapp.default_configs import DEFAULT_CONFIGS
         
-        updated_count = 0
-        for key, default_config in DEFAULT_CONFIGS.items():
-            try:
-                config = SystemConfig.objects.get(key=key)
-                config.value = default_config['value']
-                config.updated_by = request.user
-                config.save()
-                updated_count += 1
-            except SystemConfig.DoesNotExist:
-                # Create missing config
-                SystemConfig.objects.create(
-                    key=key,
-                    value=default_config['value'],
-                    description=default_config['description'],
-                    category=default_config['category'],
-                    data_type=default_config['data_type'],
-                    updated_by=request.user
-                )
-                updated_count += 1
+        now = timezone.now()
+        with transaction.atomic():
+            existing = SystemConfig.objects.in_bulk(list(DEFAULT_CONFIGS), field_name='key')
+            missing = []
+            for key, default_config in DEFAULT_CONFIGS.items():
+                config = existing.get(key)
+                if config is None:
+                    missing.append(SystemConfig(
+                        key=key,
+                        value=default_config['value'],
+                        description=default_config['description'],
+                        category=default_config['category'],
+                        data_type=default_config['data_type'],
+                        updated_by=request.user
+                    ))
+                else:
+                    config.value = default_config['value']
+                    config.updated_by = request.user
+                    config.updated_at = now
+            SystemConfig.objects.bulk_update(existing.values(), ['value', 'updated_by', 'updated_at'])
+            SystemConfig.objects.bulk_create(missing)
+            bump_generation()
+        updated_count = len(DEFAULT_CONFIGS)
         
         # Log the action
         AdminAuditLogger.log_action(
@@ -1783,6 +1799,7 @@ class ResetConfigDefaultsView(APIView):
 class SystemLogsView(APIView):
     authentication_classes = [SessionAuthentication, BasicAuthentication]
     permission_classes = [IsSuperAdmin]
+    cursor_pagination = CursorPagination(['-created_at', '-id'], default_page_size=50)
     
     def get(self, request):
         """Get system logs with filtering"""
@@ -1802,27 +1819,24 @@ class SystemLogsView(APIView):
             logs = logs.filter(category=category)
         if user_id:
             logs = logs.filter(user_id=user_id)
-        if start_date:
-            logs = logs.filter(created_at__date__gte=start_date)
-        if end_date:
-            logs = logs.filter(created_at__date__lte=end_date)
+        try:
+            # created_at ranges rather than __date so the indexes apply
+            from adminapp.analytics import day_start
+            if start_date:
+                logs = logs.filter(created_at__gte=day_start(date.fromisoformat(start_date)))
+            if end_date:
+                next_day = date.fromisoformat(end_date) + timedelta(days=1)
+                logs = logs.filter(created_at__lt=day_start(next_day))
+        except ValueError:
+            return Response(
+                {'error': 'Dates must be formatted as YYYY-MM-DD'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         if search:
             logs = logs.filter(message__icontains=search)
         
         # Pagination
-        from django.core.paginator import Paginator
-        page = request.query_params.get('page', 1)
-        per_page = request.query_params.get('per_page', 50)
+        page = self.cursor_pagination.paginate(logs, request.query_params)
+        serializer = SystemLogSerializer(page.rows, many=True)
         
-        paginator = Paginator(logs, per_page)
-        page_obj = paginator.get_page(page)
-        
-        serializer = SystemLogSerializer(page_obj, many=True)
-        
-        return Response({
-            'logs': serializer.data,
-            'page': page_obj.number,
-            'total_pages': paginator.num_pages,
-            'total_logs': paginator.count,
-            'per_page': per_page
-        })
\ No newline at end of file
+        return Response(page.data('logs', serializer.data, 'total_logs'))
\ No newline at end of file
@@ -0,0 +1,261 @@
+# base/cache.py
+"""
+Cache-aside helpers on top of Django's default cache.
+
+cached_query(namespace, parts, compute) returns the cached result of
+compute(), or computes and stores it:
+
+- Keys are versioned per namespace ("catalog", "admin_stats"...). The
+  version lives in the cache itself, so invalidate(namespace) is one
+  increment: every worker's next read misses and old entries just expire.
+- TTLs are jittered (±CACHE_TTL_JITTER) so entries written together do not
+  all expire in the same second.
+- With stale_ttl, an entry older than `ttl` is still served for up to
+  `stale_ttl` more seconds while the one caller that takes a cache.add()
+  refresh lock recomputes it (stale-while-revalidate). refresh=True
+  recomputes and stores regardless.
+- Misses are coalesced (single flight): within a process, concurrent callers
+  for one key wait for the first caller's result; across workers (Redis
+  only), a short-lived cache.add() lock lets one worker compute while the
+  others poll for its result, up to CACHE_LOCK_WAIT seconds, before
+  computing themselves.
+- Hits, misses, coalesced waits and compute time are counted per namespace
+  (stats()), and SystemHealthView reports them.
+
+The backend comes from settings.CACHES. Versions, locks and entries are only
+shared between worker processes with Redis, whose add() and incr() are
+atomic. The default in-process cache (locmem) keeps all of this per worker,
+so with several workers and no Redis an invalidation reaches only the worker
+that made the write until the other workers' entries expire. The file cache
+is no better: its add() and incr() are read-modify-write on a file. Write
+paths that bypass model signals (bulk updates, raw deletes) call
+invalidate_model().
+"""
+import hashlib
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+MISSING = object()
+
+# Which namespaces hold data derived from each model. 'course' covers every
+# course's detail and 'progress' every learner's progress; writes that know
+# the row (model signals) invalidate just that course or learner through
+# MODEL_TAGS instead.
+PROGRESS_MODELS = ('UserCourseProgress', 'UserModuleProgress', 'Certificate', 'UserLearningStats',
+                   'UserAILabProgress', 'UserAchievement')
+MODEL_NAMESPACES = {
+    'Course': ('catalog', 'course', 'admin_stats'),
+    'CourseModule': ('course', 'modules', 'admin_stats'),
+    'LearningPath': ('catalog',),
+    'PathCourse': ('catalog',),
+    'Mentor': ('community',),
+    'Discussion': ('community',),
+    'CommunityEvent': ('community',),
+    'EventRegistration': ('community',),
+    'AILab': ('labs',),
+    'Achievement': ('achievements',),
+    'User': ('analytics',),  # Bulk imports and hard deletes rewrite signup history
+    **{name: ('progress',) for name in PROGRESS_MODELS},
+}
+MODEL_TAGS = {
+    'Course': ('catalog', 'admin_stats', 'course:{pk}'),
+    'CourseModule': ('modules', 'admin_stats', 'course:{course_id}'),
+    **{name: ('progress:{user_id}',) for name in PROGRESS_MODELS},
+}
+
+
+# ----- metrics -----
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def _count(namespace, field, amount=1):
+    with _stats_lock:
+        counters = _stats.get(namespace)
+        if counters is None:
+            counters = _stats[namespace] = {'hits': 0, 'misses': 0, 'coalesced': 0,
+                                            'computes': 0, 'compute_ms': 0.0, 'errors': 0}
+        counters[field] = counters.get(field, 0) + amount
+
+
+def stats():
+    """{namespace: counters + hit_rate} for this process"""
+    with _stats_lock:
+        snapshot = {namespace: dict(counters) for namespace, counters in _stats.items()}
+    for counters in snapshot.values():
+        lookups = counters['hits'] + counters['misses']
+        counters['hit_rate'] = round(counters['hits'] / lookups, 4) if lookups else 0.0
+        counters['compute_ms'] = round(counters['compute_ms'], 2)
+    return snapshot
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+# ----- versioned keys -----
+def _version_key(namespace):
+    return f'cache:version:{namespace}'
+
+
+def get_version(namespace):
+    version = cache.get(_version_key(namespace))
+    if version is None:
+        # Seeded from the clock, so a version lost to eviction is practically never handed out again
+        cache.add(_version_key(namespace), _new_version(), timeout=None)
+        version = cache.get(_version_key(namespace), 0)
+    return version
+
+
+def _new_version():
+    return int(time.time() * 1000)
+
+
+def get_versions(namespaces):
+    """{namespace: version} in one cache round-trip"""
+    keys = {_version_key(namespace): namespace for namespace in namespaces}
+    found = cache.get_many(keys)
+    versions = {keys[key]: version for key, version in found.items()}
+    for namespace in set(namespaces) - set(versions):
+        versions[namespace] = get_version(namespace)
+    return versions
+
+
+def invalidate(*namespaces):
+    """Make every cached entry of these namespaces unreachable, in all workers"""
+    for namespace in namespaces:
+        try:
+            cache.incr(_version_key(namespace))
+        except ValueError:
+            # No version yet (or it was evicted): any new value changes the keys
+            cache.set(_version_key(namespace), _new_version(), timeout=None)
+
+
+def invalidate_model(model):
+    """Invalidate the namespaces derived from `model` (a class or its name)"""
+    name = model if isinstance(model, str) else model.__name__
+    namespaces = MODEL_NAMESPACES.get(name)
+    if namespaces:
+        invalidate(*namespaces)
+
+
+def invalidate_instance(instance):
+    """Invalidate what one saved or deleted row affects (MODEL_TAGS, else its model's namespaces)"""
+    model = type(instance)
+    tags = MODEL_TAGS.get(model.__name__)
+    if tags is None:
+        invalidate_model(model)
+    else:
+        invalidate(*(tag.format(pk=instance.pk, **vars(instance)) for tag in tags))
+
+
+def make_key(namespace, parts, version):
+    digest = hashlib.sha1(repr(parts).encode()).hexdigest()[:20]
+    return f'cache:{namespace}:v{version}:{digest}'
+
+
+def jittered(ttl):
+    jitter = getattr(settings, 'CACHE_TTL_JITTER', 0.1)
+    return max(1, int(ttl * random.uniform(1 - jitter, 1 + jitter)))
+
+
+# ----- single flight -----
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = MISSING
+        self.error = None
+
+
+_flights = {}
+_flights_lock = threading.Lock()
+
+
+def _read(key):
+    entry = cache.get(key)
+    return MISSING if entry is None else entry['value']  # Wrapped, so None results are cached too
+
+
+def _store(namespace, key, compute, ttl, stale_ttl):
+    started = time.perf_counter()
+    value = compute()
+    _count(namespace, 'computes')
+    _count(namespace, 'compute_ms', (time.perf_counter() - started) * 1000)
+    entry = {'value': value, 'fresh_until': time.time() + ttl if stale_ttl else None}
+    cache.set(key, entry, timeout=jittered(ttl + stale_ttl))
+    return value
+
+
+def cached_query(namespace, parts, compute, ttl=60, stale_ttl=0, refresh=False):
+    """
+    compute()'s result for `parts` (anything with a stable repr) in
+    `namespace`, from the cache when possible. Results must be picklable.
+    """
+    key = make_key(namespace, parts, get_version(namespace))
+    if refresh:
+        _count(namespace, 'misses')
+        return _store(namespace, key, compute, ttl, stale_ttl)
+    entry = cache.get(key)
+    if entry is not None:
+        _count(namespace, 'hits')
+        fresh_until = entry.get('fresh_until')
+        if fresh_until is None or fresh_until > time.time():
+            return entry['value']
+        lock_key = f'{key}:refresh'
+        if not cache.add(lock_key, True, timeout=max(int(ttl), 30)):
+            return entry['value']  # Someone else is already refreshing
+        _count(namespace, 'stale')
+        try:
+            return _store(namespace, key, compute, ttl, stale_ttl)
+        finally:
+            cache.delete(lock_key)
+    _count(namespace, 'misses')
+
+    with _flights_lock:
+        flight = _flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = _flights[key] = _Flight()
+    if not leader:
+        _count(namespace, 'coalesced')
+        flight.done.wait(getattr(settings, 'CACHE_LOCK_WAIT', 2.0) * 2)
+        if flight.error is None and flight.value is not MISSING:
+            return flight.value
+        return compute()
+
+    try:
+        flight.value = _compute_once(namespace, key, compute, ttl, stale_ttl)
+        return flight.value
+    except Exception as error:
+        flight.error = error
+        _count(namespace, 'errors')
+        raise
+    finally:
+        flight.done.set()
+        with _flights_lock:
+            _flights.pop(key, None)
+
+
+def _compute_once(namespace, key, compute, ttl, stale_ttl):
+    """Compute under a cross-worker lock; if another worker holds it, wait briefly for its result"""
+    lock_key = f'{key}:lock'
+    wait = getattr(settings, 'CACHE_LOCK_WAIT', 2.0)
+    locked = cache.add(lock_key, True, timeout=max(int(wait * 5), 1))
+    if not locked:
+        deadline = time.monotonic() + wait
+        while time.monotonic() < deadline:
+            time.sleep(0.02)
+            value = _read(key)
+            if value is not MISSING:
+                _count(namespace, 'coalesced')
+                return value
+    try:
+        return _store(namespace, key, compute, ttl, stale_ttl)
+    finally:
+        if locked:
+            cache.delete(lock_key)
@@ -0,0 +1,62 @@
+# base/etags.py
+"""
+Weak ETags for per-user read endpoints, computed without running the view.
+
+    @conditional_etag('progress', 'progress:{user}', 'catalog')
+    @api_view(['GET'])
+    def user_courses(request):
+        ...
+
+The decorator goes above @api_view and only names what the response is
+derived from. ConditionalETagMiddleware (base.middleware) turns that into an
+ETag before the view runs: a digest of the view, the path, the user, the
+current versions of those base.cache tags and the SystemConfig generation.
+If the request's If-None-Match matches, it answers 304 at once, so a polling
+client that has not seen a change costs one cache lookup and no queries
+beyond authentication. Otherwise the view runs and the ETag is attached.
+
+The versions are bumped by base.signals when a row is saved or deleted
+('progress:<user id>' for that learner's progress, enrollments,
+certificates, labs and achievements) and by the bulk write paths through
+invalidate_model() ('progress' for everyone). The stamp is taken before the
+view reads anything, so a write that races a request leaves the client with
+an ETag that no longer matches, never a stale 304. Versions live in the
+cache and never expire, so the middleware only loads with CONDITIONAL_ETAGS,
+which defaults to on with Redis only; without it the views just run.
+
+Views cached with base.response_cache send strong ETags (a digest of the
+cached body) instead and are not marked here.
+"""
+import hashlib
+
+from django.utils.http import parse_etags
+
+from adminapp.config import system_config
+from base.cache import get_versions
+
+
+def conditional_etag(*tags):
+    """Mark a view for ConditionalETagMiddleware; tags may use {user} and URL kwargs"""
+    def decorator(view):
+        view.etag_tags = tags
+        return view
+    return decorator
+
+
+def compute_etag(request, view, tags, kwargs):
+    tags = [tag.format(user=request.user.pk, **kwargs) for tag in tags]
+    versions = get_versions(tags)
+    stamp = repr((
+        view.__module__, view.__name__, request.get_full_path(), str(request.user.pk),
+        sorted(versions.items()), system_config.generation,
+    ))
+    return f'W/"{hashlib.sha1(stamp.encode()).hexdigest()[:32]}"'
+
+
+def etag_matches(request, etag):
+    """Weak comparison against If-None-Match, as required for GET and HEAD"""
+    header = request.headers.get('If-None-Match')
+    if not header:
+        return False
+    opaque = etag.removeprefix('W/')
+    return any(tag == '*' or tag.removeprefix('W/') == opaque for tag in parse_etags(header))
@@ -1,4 +1,9 @@
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
 from django.utils.deprecation import MiddlewareMixin
+from .etags import compute_etag, etag_matches
 from .models import UserSession
 
 class JWTAuthenticationMiddleware(MiddlewareMixin):
@@ -18,6 +23,46 @@ class JWTAuthenticationMiddleware(MiddlewareMixin):
                 session = UserSession.objects.get(token=token, is_active=True)
                 if session.is_valid():
                     request.user = session.user
+                    # DRF's SessionAuthentication picks this user up and would demand a
+                    # CSRF token; a header token cannot be sent cross-site by a browser
+                    request._dont_enforce_csrf_checks = True
             except UserSession.DoesNotExist:
                 # Token not found or session invalid
-                pass
\ No newline at end of file
+                pass
+
+
+class ConditionalETagMiddleware(MiddlewareMixin):
+    """
+    Weak ETags and 304s for views marked with @conditional_etag (base.etags),
+    decided before the view runs. Goes after JWTAuthenticationMiddleware.
+    Unused unless CONDITIONAL_ETAGS: the tag versions must be shared by all workers.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'CONDITIONAL_ETAGS', False):
+            raise MiddlewareNotUsed('CONDITIONAL_ETAGS is off: the cache is not shared by the workers')
+        super().__init__(get_response)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        tags = getattr(view_func, 'etag_tags', None)
+        if tags is None or request.method not in ('GET', 'HEAD') or not getattr(request, 'user', None):
+            return None
+        etag = compute_etag(request, view_func, tags, view_kwargs)
+        if etag_matches(request, etag):
+            return self.add_validators(HttpResponseNotModified(), etag)
+        request._conditional_etag = etag
+        return None
+
+    def process_response(self, request, response):
+        etag = getattr(request, '_conditional_etag', None)
+        if etag and response.status_code == 200 and not response.has_header('ETag'):
+            self.add_validators(response, etag)
+        return response
+
+    @staticmethod
+    def add_validators(response, etag):
+        response['ETag'] = etag
+        # Private per-user data: clients keep it but must revalidate every time
+        response['Cache-Control'] = 'private, no-cache'
+        patch_vary_headers(response, ['Authorization'])
+        return response
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-19 05:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0010_coursemodule_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='communityevent',
+            index=models.Index(fields=['start_date', 'id'], name='event_start_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['-created_at', '-id'], name='courses_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='discussion',
+            index=models.Index(fields=['-created_at', '-id'], name='discussion_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['-created_at', '-id'], name='users_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-19 06:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0012_userinvite'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='pending_delete',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='pending_delete',
+            field=models.BooleanField(default=False),
+        ),
+    ]
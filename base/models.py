@@ -1,5 +1,8 @@
 from django.db import models
+from django.db.models.functions import Coalesce
 import uuid
+import hashlib
+import secrets
 from django.utils import timezone
 import bcrypt
 import jwt
@@ -39,6 +42,8 @@ class User(AbstractBaseUser, PermissionsMixin):
     # REQUIRED FOR DJANGO ADMIN
     is_staff = models.BooleanField(default=False)
     is_active = models.BooleanField(default=True)
+    # Set when an admin hard-deletes the account; a background job removes it (adminapp.deletion)
+    pending_delete = models.BooleanField(default=False)
     
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
@@ -76,7 +81,9 @@ class User(AbstractBaseUser, PermissionsMixin):
         payload = {
             'user_id': str(self.id),
             'email': self.email,
-            'exp': datetime.now() + timedelta(days=7)
+            'exp': datetime.now() + timedelta(days=7),
+            # Without it two logins in the same second get the same token
+            'jti': uuid.uuid4().hex,
         }
         return jwt.encode(payload, settings.SECRET_KEY, algorithm='HS256')
 
@@ -90,6 +97,10 @@ class User(AbstractBaseUser, PermissionsMixin):
 
     class Meta:
         db_table = 'users'
+        indexes = [
+            # Keyset order of the admin user list
+            models.Index(fields=['-created_at', '-id'], name='users_created_id_idx'),
+        ]
 
 class UserSession(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -128,6 +139,37 @@ class UserSession(models.Model):
             models.Index(fields=['user', 'is_active']),
         ]
 
+class CourseQuerySet(models.QuerySet):
+    def with_stats(self):
+        """Annotate enrolled_count, completed_count and modules_count without a query per course"""
+        return self.with_enrollment_counts().with_module_count()
+
+    def with_enrollment_counts(self):
+        progress = UserCourseProgress.objects.filter(course=models.OuterRef('pk'))
+        return self.annotate(
+            enrolled_count=_count_subquery(progress),
+            completed_count=_count_subquery(progress.filter(is_completed=True)),
+        )
+
+    def with_module_count(self):
+        modules = CourseModule.objects.filter(course=models.OuterRef('pk'))
+        return self.annotate(modules_count=_count_subquery(modules))
+
+    def with_approval(self):
+        """Join the admin approval row so approval_status needs no extra query"""
+        return self.select_related('courseapproval')
+
+
+def _count_subquery(queryset):
+    """Correlated COUNT(*) subquery for use in annotations"""
+    counted = queryset.order_by().values('course').annotate(
+        total=models.Count('pk')
+    ).values('total')
+    return Coalesce(
+        models.Subquery(counted, output_field=models.IntegerField()),
+        models.Value(0)
+    )
+
 class Course(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     title = models.CharField(max_length=255)
@@ -144,6 +186,9 @@ class Course(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
+    pending_delete = models.BooleanField(default=False)  # See adminapp.deletion
+
+    objects = CourseQuerySet.as_manager()
 
     def __str__(self):
         return self.title
@@ -153,6 +198,7 @@ class Course(models.Model):
         indexes = [
             models.Index(fields=['category', 'is_active']),
             models.Index(fields=['difficulty']),
+            models.Index(fields=['-created_at', '-id'], name='courses_created_id_idx'),
         ]
 
 class CourseModule(models.Model):
@@ -412,6 +458,11 @@ class Discussion(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     last_activity_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='discussion_created_id_idx'),
+        ]
+
 class DiscussionReply(models.Model):
     discussion = models.ForeignKey(Discussion, on_delete=models.CASCADE, related_name='replies')
     author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='discussion_replies')
@@ -448,6 +499,11 @@ class CommunityEvent(models.Model):
     meeting_link = models.URLField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['start_date', 'id'], name='event_start_id_idx'),
+        ]
+
 class EventAttendance(models.Model):
     event = models.ForeignKey(CommunityEvent, on_delete=models.CASCADE, related_name='attendees')
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='event_attendance')
@@ -462,4 +518,41 @@ class EventRegistration(models.Model):
 
     class Meta:
         db_table = 'event_registrations'
-        unique_together = ['event', 'user']
\ No newline at end of file
+        unique_together = ['event', 'user']
+
+
+class UserInvite(models.Model):
+    """
+    One-time token for an account created without a password (bulk import).
+    Only the SHA-256 of the token is stored; the raw token goes to the admin once.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='invite')
+    token_hash = models.CharField(max_length=64, unique=True)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True,
+                                   related_name='sent_invites')
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+    accepted_at = models.DateTimeField(null=True, blank=True)
+
+    @staticmethod
+    def hash_token(token):
+        return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+    @classmethod
+    def issue(cls, user, created_by=None, ttl=timedelta(days=14)):
+        """Unsaved invite plus its raw token (so callers can bulk_create)"""
+        token = secrets.token_urlsafe(32)
+        invite = cls(
+            user=user,
+            token_hash=cls.hash_token(token),
+            created_by=created_by,
+            expires_at=timezone.now() + ttl,
+        )
+        return invite, token
+
+    def is_valid(self):
+        return self.accepted_at is None and timezone.now() < self.expires_at
+
+    class Meta:
+        db_table = 'user_invites'
@@ -0,0 +1,203 @@
+# base/response_cache.py
+"""
+Response caching for DRF function views:
+
+    @api_view(['GET'])
+    @cache_response(ttl=300, tags=('course:{course_id}',))
+    def course_detail(request, course_id):
+        ...
+
+The decorator goes under @api_view, so authentication and permission checks
+still run on every request; only the view body is skipped. GET/HEAD
+responses with status 200 are cached, keyed by view, path and query string,
+and by user with vary_on_user=True.
+
+- An entry is fresh for `ttl` seconds, then served stale for up to
+  `stale_ttl` more while one caller (a cache.add() lock, across workers
+  with Redis) recomputes it on a background thread pool. With RESPONSE_CACHE_REFRESH_SYNC
+  (the test runner) the refresh runs before the stale copy is returned.
+- Tags are base.cache namespaces, formatted with the view's URL kwargs. An
+  entry remembers the tag versions it was computed under; once
+  base.cache.invalidate() bumps one of them the entry is a miss, never
+  served stale.
+- A refresh never touches the request that found the entry stale: it runs
+  the view on a copy rebuilt from the path, headers and user id.
+- Responses carry a strong ETag (digest of the data) and Last-Modified (when
+  the data last changed). A matching If-None-Match, or If-Modified-Since
+  when there is no If-None-Match, gets an empty 304.
+
+Per-user views that are not cached use base.etags instead, whose weak ETags
+come from tag versions so the 304 is decided before the view runs. Here the
+body is in the cache anyway, so its digest is the exact validator; that is
+why the two schemes differ. A view uses one or the other, never both.
+"""
+import hashlib
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections
+from django.test import RequestFactory
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date, parse_etags, parse_http_date_safe, quote_etag
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from base.cache import _count, get_versions, jittered, make_key
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'RESPONSE_CACHE_REFRESH_WORKERS', 4),
+                thread_name_prefix='response-cache',
+            )
+        return _executor
+
+
+def cache_response(ttl=60, stale_ttl=None, vary_on_user=False, tags=()):
+    """Cache a DRF function view's 200 responses; see the module docstring"""
+    stale_ttl = ttl if stale_ttl is None else stale_ttl
+
+    def decorator(view):
+        namespace = f'response:{view.__name__}'
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            view_tags = [tag.format(**kwargs) for tag in tags]
+            user = str(request.user.pk) if vary_on_user else None
+            key = make_key('response', (view.__module__, view.__name__, request.get_full_path(), user), 1)
+
+            entry = cache.get(key)
+            if entry is not None and entry['tags'] != get_versions(view_tags):
+                entry = None  # Invalidated: recompute rather than serve stale
+            if entry is None:
+                _count(namespace, 'misses')
+                entry, response = _compute(view, request, args, kwargs, key, view_tags, ttl, stale_ttl)
+                if entry is None:
+                    return response  # Not cacheable (errors, non-DRF responses)
+                state = 'MISS'
+            elif entry['fresh_until'] > time.time():
+                _count(namespace, 'hits')
+                state = 'HIT'
+            else:
+                _count(namespace, 'hits')
+                _count(namespace, 'stale')
+                _schedule_refresh(view, _snapshot(request), args, kwargs, key, view_tags, ttl, stale_ttl, namespace)
+                state = 'STALE'
+            return _respond(request, entry, state)
+
+        return wrapper
+
+    return decorator
+
+
+def _compute(view, request, args, kwargs, key, tags, ttl, stale_ttl):
+    """Run the view and cache its data; returns (entry or None, response)"""
+    versions = get_versions(tags)  # Before computing, so a write meanwhile leaves the entry stale
+    response = view(request, *args, **kwargs)
+    if not isinstance(response, Response) or response.status_code != status.HTTP_200_OK:
+        return None, response
+    encoded = json.dumps(response.data, cls=DjangoJSONEncoder, sort_keys=True).encode()
+    etag = quote_etag(hashlib.sha1(encoded).hexdigest())
+    now = time.time()
+    previous = cache.get(key)
+    entry = {
+        'data': response.data,
+        'etag': etag,
+        # Unchanged data keeps its date, so If-Modified-Since keeps matching across refreshes
+        'last_modified': previous['last_modified'] if previous and previous['etag'] == etag else int(now),
+        'fresh_until': now + ttl,
+        'tags': versions,
+    }
+    cache.set(key, entry, timeout=jittered(ttl + stale_ttl))
+    return entry, response
+
+
+def _snapshot(request):
+    """What a refresh needs to rebuild the request; the live one may be gone (or reused) by then"""
+    return {
+        'path': request.get_full_path(),
+        'secure': request.is_secure(),
+        'headers': {name: value for name, value in request.META.items() if name.startswith('HTTP_')},
+        'user': request.user.pk,
+    }
+
+
+def _rebuild(snapshot):
+    request = Request(RequestFactory().get(snapshot['path'], secure=snapshot['secure'], **snapshot['headers']))
+    user = None
+    if snapshot['user'] is not None:
+        user = get_user_model()._default_manager.filter(pk=snapshot['user']).first()
+    request.user = user or AnonymousUser()
+    return request
+
+
+def _schedule_refresh(view, snapshot, args, kwargs, key, tags, ttl, stale_ttl, namespace):
+    lock_key = f'{key}:refresh'
+    if not cache.add(lock_key, True, timeout=max(int(ttl), 30)):
+        return  # Someone else is already refreshing
+    _count(namespace, 'refreshes')
+    if getattr(settings, 'RESPONSE_CACHE_REFRESH_SYNC', False):
+        _refresh(view, snapshot, args, kwargs, key, tags, ttl, stale_ttl, lock_key, namespace)
+    else:
+        _get_executor().submit(_refresh_in_thread, view, snapshot, args, kwargs, key, tags, ttl,
+                               stale_ttl, lock_key, namespace)
+
+
+def _refresh(view, snapshot, args, kwargs, key, tags, ttl, stale_ttl, lock_key, namespace):
+    try:
+        _compute(view, _rebuild(snapshot), args, kwargs, key, tags, ttl, stale_ttl)
+    except Exception:
+        _count(namespace, 'errors')
+        logger.exception('Response cache refresh failed', extra={'view': namespace})
+    finally:
+        cache.delete(lock_key)
+
+
+def _refresh_in_thread(*args):
+    try:
+        _refresh(*args)
+    finally:
+        close_old_connections()
+
+
+def _not_modified(request, entry):
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match:
+        etags = parse_etags(if_none_match)
+        return '*' in etags or entry['etag'] in etags
+    since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+    return since is not None and entry['last_modified'] <= since
+
+
+def _respond(request, entry, state):
+    if _not_modified(request, entry):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = Response(entry['data'], status=status.HTTP_200_OK)
+    response['ETag'] = entry['etag']
+    response['Last-Modified'] = http_date(entry['last_modified'])
+    # Clients keep their copy but revalidate it, which costs a cache lookup and no body
+    response['Cache-Control'] = 'private, no-cache'
+    response['X-Cache'] = state
+    patch_vary_headers(response, ['Authorization'])
+    return response
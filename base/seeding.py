@@ -0,0 +1,257 @@
+# base/seeding.py
+"""
+Synthetic LMS data at realistic volumes, for query-budget tests and local
+load testing (manage.py seed_data).
+
+Everything is written with bulk_create in batches, so thousands of users and
+tens of thousands of progress rows take seconds. bulk_create skips signals:
+callers that rely on derived tables (course stats snapshots, daily rollups)
+rebuild them afterwards.
+
+Seeded rows are recognisable so clear() can remove them again: users have
+@seed.example.com addresses and every other seeded title starts with "Seed ".
+"""
+import random
+import uuid
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from base.cache import invalidate_model
+
+from base.models import (
+    Achievement, AILab, Certificate, CommunityEvent, Course, CourseModule, Discussion,
+    DiscussionReply, EventRegistration, LearningPath, Mentor, PathCourse, User,
+    UserAchievement, UserAILabProgress, UserCourseProgress, UserLearningStats, UserModuleProgress,
+)
+
+SEED_DOMAIN = 'seed.example.com'
+SEED_PREFIX = 'Seed '
+SEED_PASSWORD = 'SeedPass123!'
+SEED_ADMIN_EMAIL = f'admin@{SEED_DOMAIN}'
+BATCH_SIZE = 500
+
+CATEGORIES = ['Machine Learning', 'Deep Learning', 'Data Science', 'NLP', 'Computer Vision', 'MLOps']
+DIFFICULTIES = ['beginner', 'intermediate', 'advanced']
+CRITERIA = [
+    ('courses_completed', 1), ('courses_completed', 5), ('modules_completed', 10),
+    ('modules_completed', 50), ('learning_hours', 10), ('streak_days', 7),
+    ('labs_completed', 1), ('certificates_earned', 1),
+]
+
+
+def seed(users=2000, courses=200, modules_per_course=8, enrollments_per_user=4,
+         labs=20, paths=10, discussions=300, events=30, random_seed=42, log=None,
+         password=SEED_PASSWORD):
+    """
+    Create a full data set and return how many rows of each kind were written.
+    Users, and the superuser SEED_ADMIN_EMAIL, get `password`.
+    `log`, if given, is called with progress lines.
+    """
+    rng = random.Random(random_seed)
+    now = timezone.now()
+    counts = {}
+
+    def report(label, rows):
+        counts[label] = len(rows)
+        if log:
+            log(f'  {label}: {len(rows)}')
+
+    with transaction.atomic():
+        # One hash for everyone: hashing thousands of passwords would dominate the run
+        template = User(email=f'template@{SEED_DOMAIN}')
+        template.set_password(password)
+        learners = [
+            User(
+                email=f'learner{index}@{SEED_DOMAIN}',
+                full_name=f'Seed Learner {index}',
+                password=template.password,
+                password_hash=template.password_hash,
+                last_login=now - timedelta(minutes=rng.randint(0, 60 * 24 * 30)),
+            )
+            for index in range(users)
+        ]
+        User.objects.bulk_create(learners, batch_size=BATCH_SIZE)
+        report('users', learners)
+        User.objects.create(email=SEED_ADMIN_EMAIL, full_name='Seed Admin', password=template.password,
+                            password_hash=template.password_hash, is_staff=True, is_superuser=True)
+
+        course_rows = [
+            Course(
+                title=f'{SEED_PREFIX}Course {index}',
+                description=f'Seeded course {index}',
+                category=rng.choice(CATEGORIES),
+                difficulty=rng.choice(DIFFICULTIES),
+                instructor='Seed Instructor',
+                duration_minutes=modules_per_course * 30,
+            )
+            for index in range(courses)
+        ]
+        Course.objects.bulk_create(course_rows, batch_size=BATCH_SIZE)
+        report('courses', course_rows)
+
+        modules = {}
+        module_rows = []
+        for course in course_rows:
+            modules[course.id] = [
+                CourseModule(course=course, title=f'{SEED_PREFIX}Module {order}', order=order,
+                             duration_minutes=30, content='Seeded module content')
+                for order in range(1, modules_per_course + 1)
+            ]
+            module_rows += modules[course.id]
+        CourseModule.objects.bulk_create(module_rows, batch_size=BATCH_SIZE)
+        report('modules', module_rows)
+
+        path_rows = [
+            LearningPath(title=f'{SEED_PREFIX}Path {index}', description='Seeded learning path',
+                         icon_name='brain', color='google-blue', difficulty=rng.choice(DIFFICULTIES),
+                         estimated_duration_hours=20)
+            for index in range(paths)
+        ]
+        LearningPath.objects.bulk_create(path_rows, batch_size=BATCH_SIZE)
+        PathCourse.objects.bulk_create([
+            PathCourse(learning_path=path, course=course, order=order)
+            for path in path_rows
+            for order, course in enumerate(rng.sample(course_rows, min(5, len(course_rows))), start=1)
+        ], batch_size=BATCH_SIZE)
+        report('learning_paths', path_rows)
+
+        enrollments, module_progress, certificates, stats = [], [], [], []
+        for user in learners:
+            completed_courses = completed_modules = minutes = 0
+            for course in rng.sample(course_rows, min(enrollments_per_user, len(course_rows))):
+                done = rng.randint(0, modules_per_course)
+                finished = bool(modules_per_course) and done == modules_per_course
+                enrollments.append(UserCourseProgress(
+                    user=user, course=course, completed_modules_count=done,
+                    total_modules_count=modules_per_course,
+                    progress_percentage=done * 100 / modules_per_course if modules_per_course else 0.0,
+                    is_completed=finished, completed_at=now if finished else None,
+                ))
+                for module in modules[course.id][:done]:
+                    spent = rng.randint(5, 60)
+                    minutes += spent
+                    module_progress.append(UserModuleProgress(
+                        user=user, module=module, is_completed=True, completed_at=now,
+                        time_spent_minutes=spent,
+                    ))
+                completed_modules += done
+                if finished:
+                    completed_courses += 1
+                    certificates.append(Certificate(user=user, course=course,
+                                                    certificate_id=f'SEED-{uuid.uuid4().hex[:16]}'))
+            stats.append(UserLearningStats(
+                user=user, total_learning_hours=minutes / 60, total_courses_completed=completed_courses,
+                total_modules_completed=completed_modules, total_certificates_earned=completed_courses,
+                streak_days=rng.randint(0, 30), last_learning_date=now.date(),
+            ))
+        UserCourseProgress.objects.bulk_create(enrollments, batch_size=BATCH_SIZE)
+        UserModuleProgress.objects.bulk_create(module_progress, batch_size=BATCH_SIZE)
+        Certificate.objects.bulk_create(certificates, batch_size=BATCH_SIZE)
+        UserLearningStats.objects.bulk_create(stats, batch_size=BATCH_SIZE)
+        report('enrollments', enrollments)
+        report('module_progress', module_progress)
+        report('certificates', certificates)
+
+        lab_rows = [
+            AILab(title=f'{SEED_PREFIX}Lab {index}', description='Seeded lab',
+                  difficulty=rng.choice(['Beginner', 'Intermediate', 'Advanced']),
+                  prerequisites=[str(rng.choice(course_rows).id)] if index % 2 and course_rows else [])
+            for index in range(labs)
+        ]
+        AILab.objects.bulk_create(lab_rows, batch_size=BATCH_SIZE)
+        lab_progress = [
+            UserAILabProgress(user=user, lab=lab, status=rng.choice(['in-progress', 'completed']),
+                              attempts=1, score=rng.randint(40, 100))
+            for user in rng.sample(learners, len(learners) // 4)
+            for lab in rng.sample(lab_rows, min(2, len(lab_rows)))
+        ]
+        UserAILabProgress.objects.bulk_create(lab_progress, batch_size=BATCH_SIZE)
+        report('ai_labs', lab_rows)
+        report('ai_lab_progress', lab_progress)
+
+        achievements = [
+            Achievement(title=f'{SEED_PREFIX}{criteria} {threshold}', description='Seeded achievement',
+                        criteria_type=criteria, criteria_threshold=threshold)
+            for criteria, threshold in CRITERIA
+        ]
+        Achievement.objects.bulk_create(achievements, batch_size=BATCH_SIZE)
+        UserAchievement.objects.bulk_create([
+            UserAchievement(user=user, achievement=achievements[0])
+            for user, stat in zip(learners, stats) if stat.total_courses_completed
+        ], batch_size=BATCH_SIZE, ignore_conflicts=True)
+        report('achievements', achievements)
+
+        mentors = [
+            Mentor(user=user, role='Mentor', expertise=rng.sample(CATEGORIES, 2), bio='Seeded mentor',
+                   rating=round(rng.uniform(3, 5), 1), sessions_completed=rng.randint(0, 200))
+            for user in learners[:max(users // 100, 1)] if learners
+        ]
+        Mentor.objects.bulk_create(mentors, batch_size=BATCH_SIZE)
+        report('mentors', mentors)
+
+        discussion_rows = [
+            Discussion(title=f'{SEED_PREFIX}Discussion {index}', content='Seeded discussion',
+                       author=rng.choice(learners), course=rng.choice(course_rows) if course_rows else None,
+                       status=rng.choice(['active'] * 8 + ['locked', 'archived']),
+                       replies_count=3, views_count=rng.randint(0, 500), likes_count=rng.randint(0, 50))
+            for index in range(discussions if learners else 0)
+        ]
+        Discussion.objects.bulk_create(discussion_rows, batch_size=BATCH_SIZE)
+        DiscussionReply.objects.bulk_create([
+            DiscussionReply(discussion=discussion, author=rng.choice(learners), content='Seeded reply')
+            for discussion in discussion_rows for _ in range(3)
+        ], batch_size=BATCH_SIZE)
+        report('discussions', discussion_rows)
+
+        event_rows = [
+            CommunityEvent(title=f'{SEED_PREFIX}Event {index}', description='Seeded event',
+                           event_type=rng.choice(CommunityEvent.EVENT_TYPES)[0],
+                           start_date=now + timedelta(days=index - events // 3, hours=rng.randint(8, 18)),
+                           end_date=now + timedelta(days=index - events // 3, hours=20),
+                           host=rng.choice(learners), max_attendees=100, is_virtual=bool(index % 2),
+                           status='upcoming' if index >= events // 3 else 'completed')
+            for index in range(events if learners else 0)
+        ]
+        CommunityEvent.objects.bulk_create(event_rows, batch_size=BATCH_SIZE)
+        registrations = [
+            EventRegistration(event=event, user=user)
+            for event in event_rows for user in rng.sample(learners, min(40, len(learners)))
+        ]
+        EventRegistration.objects.bulk_create(registrations, batch_size=BATCH_SIZE)
+        report('events', event_rows)
+        report('event_registrations', registrations)
+
+    invalidate_seeded()
+    return counts
+
+
+def clear():
+    """
+    Delete everything seed() created (and whatever cascades from it). Returns
+    the number of rows deleted per model.
+    """
+    deleted = {}
+    with transaction.atomic():
+        for queryset in (
+            User.objects.filter(email__endswith=f'@{SEED_DOMAIN}'),
+            Course.objects.filter(title__startswith=SEED_PREFIX),
+            LearningPath.objects.filter(title__startswith=SEED_PREFIX),
+            AILab.objects.filter(title__startswith=SEED_PREFIX),
+            Achievement.objects.filter(title__startswith=SEED_PREFIX),
+        ):
+            _, per_model = queryset.delete()
+            for label, count in per_model.items():
+                deleted[label] = deleted.get(label, 0) + count
+    invalidate_seeded()
+    return deleted
+
+
+def invalidate_seeded():
+    # bulk_create sends no signals, so cached entries and ETags would survive
+    for model in (User, Course, CourseModule, LearningPath, PathCourse,
+                  Mentor, Discussion, CommunityEvent, EventRegistration, AILab, Achievement,
+                  UserCourseProgress, UserModuleProgress, Certificate, UserLearningStats,
+                  UserAILabProgress, UserAchievement):
+        invalidate_model(model)
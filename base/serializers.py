@@ -57,6 +57,12 @@ class SignupSerializer(serializers.Serializer):
         user.save()
         return user
 
+class AcceptInviteSerializer(serializers.Serializer):
+    token = serializers.CharField(required=True)
+    password = serializers.CharField(required=True, write_only=True, min_length=8)
+    
+    validate_password = SignupSerializer.validate_password
+
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
@@ -0,0 +1,30 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from base.cache import invalidate_instance
+from base.models import (
+    Achievement, AILab, Certificate, CommunityEvent, Course, CourseModule, Discussion, EventRegistration,
+    LearningPath, Mentor, PathCourse, UserAchievement, UserAILabProgress, UserCourseProgress,
+    UserLearningStats, UserModuleProgress,
+)
+
+
+def invalidate_cached_queries(sender, instance, raw=False, **kwargs):
+    """Cached entries and ETags derived from this row are stale (see base.cache)"""
+    if raw:
+        return
+    invalidate_instance(instance)
+    # Again once committed: a read between the write and the commit saw the old rows under the new version
+    transaction.on_commit(lambda: invalidate_instance(instance))
+
+
+for model in (Course, CourseModule, LearningPath, PathCourse,
+              Mentor, Discussion, CommunityEvent, EventRegistration, AILab, Achievement):
+    post_save.connect(invalidate_cached_queries, sender=model, dispatch_uid=f'cache_{model.__name__}_save')
+    post_delete.connect(invalidate_cached_queries, sender=model, dispatch_uid=f'cache_{model.__name__}_delete')
+
+# Saves only: a delete receiver would stop cascades from fast-deleting these large tables.
+# Deletes come from user and course deletion, which invalidate 'progress' as a whole.
+for model in (UserCourseProgress, UserModuleProgress, Certificate, UserLearningStats,
+              UserAILabProgress, UserAchievement):
+    post_save.connect(invalidate_cached_queries, sender=model, dispatch_uid=f'cache_{model.__name__}_save')
@@ -1,3 +1,411 @@
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
 from django.test import TestCase
+from django.utils import timezone
+
+from adminapp.config import bump_generation, system_config
+from adminapp.models import SystemConfig
+from adminapp.tests import QueryBudgetMixin
+from base import cache as query_cache, seeding, urls as base_urls
+from base.models import (
+    Achievement, AILab, Certificate, CommunityEvent, Course, CourseModule, EventRegistration, User,
+    UserAchievement, UserCourseProgress, UserInvite, UserSession,
+)
+from base.views import CATALOG_CACHE_TTL
+
+
+class LearnerEndpointBudgetTests(QueryBudgetMixin, TestCase):
+    """
+    Every learner endpoint against seeded data at realistic volume (base.seeding).
+    Budgets are the exact counts today, including the authentication
+    middleware; a query per course, module or event blows through them.
+    """
+    SEED = dict(users=1500, courses=120, modules_per_course=6, enrollments_per_user=3,
+                labs=12, paths=6, discussions=200, events=24)
+
+    @classmethod
+    def setUpTestData(cls):
+        seeding.seed(**cls.SEED)
+        # A learner with a finished course and one in progress, so every learner endpoint has data
+        certificate = Certificate.objects.filter(
+            user__course_progress__is_completed=False
+        ).select_related('user').first()
+        cls.learner = certificate.user
+        cls.certificate = certificate
+        # Explicit token: create_session() tokens only differ per second, and login issues one too
+        cls.token = UserSession.objects.create(
+            user=cls.learner, token='learner-budget-token', expires_at=timezone.now() + timedelta(days=1)
+        ).token
+        cls.enrolled = UserCourseProgress.objects.filter(user=cls.learner, is_completed=False).first()
+        cls.new_course = (
+            Course.objects.exclude(user_progress__user=cls.learner).order_by('title').first()
+        )
+
+    def test_read_endpoints(self):
+        exercised = set()
+        course = self.enrolled.course
+        for name, url, budget in [
+            ('profile', '/api/auth/profile/', 4),
+            ('dashboard-stats', '/api/dashboard/stats/', 7),
+            ('user-courses', '/api/dashboard/courses/', 5),
+            ('user-certificates', '/api/dashboard/certificates/', 5),
+            ('learning-paths', '/api/learning-paths/', 3),
+            ('courses-list', '/api/courses/', 3),
+            ('course-detail', f'/api/courses/{course.id}/', 4),
+            ('course-progress', f'/api/courses/{course.id}/progress/', 7),
+            ('user-modules', '/api/modules/user-modules/', 7),
+            ('ai-labs-list', '/api/ai-labs/', 8),
+            ('progress-stats', '/api/progress/stats/', 11),
+            ('user-achievements', '/api/progress/achievements/', 15),
+            ('community-stats', '/api/community/stats/', 8),
+            ('mentors-list', '/api/community/mentors/', 4),
+            ('discussions-list', '/api/community/discussions/', 4),
+            ('events-list', '/api/community/events/', 5),
+            ('user-settings', '/api/settings/', 8),
+            ('debug-middleware', '/api/debug-middleware/', 2),
+        ]:
+            with self.subTest(name):
+                self.assertRequestWithinBudget('GET', url, budget, self.token)
+            exercised.add(name)
+
+        self.assertRoutesCovered(base_urls, exercised, exempt=[
+            # Writes and auth flows, budgeted in test_write_endpoints
+            'login', 'signup', 'accept-invite', 'logout', 'change-password', 'enroll-course',
+            'mark-module-complete', 'start-ai-lab', 'download-certificate', 'update-profile',
+        ])
+
+    def test_write_endpoints(self):
+        module = CourseModule.objects.filter(course=self.enrolled.course).order_by('order').last()
+        lab = AILab.objects.filter(prerequisites=[]).first()
+        invited = User.objects.create(email='invited@example.com', full_name='Invited')
+        invite, invite_token = UserInvite.issue(invited)
+        invite.save()
+        token = self.token
+        check = self.assertRequestWithinBudget
+
+        # Password hashing makes the auth flows slow by design
+        check('POST', '/api/auth/login/', 3, max_seconds=5,
+              data={'email': self.learner.email, 'password': seeding.SEED_PASSWORD})
+        check('POST', '/api/auth/signup/', 3, status_code=201, max_seconds=5,
+              data={'full_name': 'New', 'email': 'new@example.com', 'password': 'NewPass123!'})
+        # Claim the invite, set the password and open a session; plus the savepoint pair
+        check('POST', '/api/auth/accept-invite/', 6, max_seconds=5,
+              data={'token': invite_token, 'password': 'NewPass123!'})
+        # The cap check runs under a lock on the course row: plus the savepoint pair
+        check('POST', f'/api/courses/{self.new_course.id}/enroll/', 14, token, status_code=201)
+        check('POST', f'/api/modules/{module.id}/complete/', 18, token)
+        check('POST', f'/api/ai-labs/{lab.id}/start/', 10, token)
+        check('POST', f'/api/certificates/{self.certificate.id}/download/', 6, token)
+        check('PUT', '/api/settings/', 9, token, data={'dark_mode': True})
+        check('PUT', '/api/settings/profile/', 5, token, data={'full_name': 'Renamed'})
+        check('POST', '/api/auth/change-password/', 6, token, max_seconds=5,
+              data={'current_password': seeding.SEED_PASSWORD, 'new_password': 'NewPass123!'})
+        check('POST', '/api/auth/logout/', 4, token)
+
+
+class BearerTokenCsrfTests(TestCase):
+    def test_bearer_authenticated_post_needs_no_csrf_token(self):
+        user = User.objects.create_user(email='csrf@example.com', full_name='Csrf', password='Csrf123!')
+        session = UserSession.create_session(user)
+        client = self.client_class(enforce_csrf_checks=True)
+
+        response = client.put('/api/settings/profile/', {'full_name': 'Renamed'},
+                              content_type='application/json', HTTP_AUTHORIZATION=f'Bearer {session.token}')
+
+        self.assertEqual(response.status_code, 200, response.content)
+
+
+class FeatureToggleTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='learner@example.com', full_name='Learner', password='Learner123!')
+        cls.token = UserSession.create_session(cls.user).token
+        cls.course = Course.objects.create(title='Course', description='Description', category='ml',
+                                           difficulty='beginner', instructor='Instructor')
+
+    def setUp(self):
+        system_config.invalidate()
+        self.addCleanup(system_config.invalidate)
+
+    def configure(self, key, value, data_type='boolean'):
+        SystemConfig.objects.update_or_create(key=key, defaults={
+            'value': value, 'description': key, 'data_type': data_type,
+        })
+        bump_generation()
+
+    def request(self, method, url, **kwargs):
+        return getattr(self.client, method)(url, HTTP_AUTHORIZATION=f'Bearer {self.token}', **kwargs)
+
+    def test_signup_closed(self):
+        self.configure('ALLOW_NEW_REGISTRATIONS', 'false')
+        response = self.client.post('/api/auth/signup/', {
+            'full_name': 'New', 'email': 'new@example.com', 'password': 'NewPass123!',
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(User.objects.filter(email='new@example.com').exists())
+
+    def test_labs_disabled(self):
+        lab = AILab.objects.create(title='Lab', description='Lab')
+        self.configure('ENABLE_AI_LABS', 'false')
+        self.assertEqual(self.request('get', '/api/ai-labs/').status_code, 403)
+        self.assertEqual(self.request('post', f'/api/ai-labs/{lab.id}/start/').status_code, 403)
+
+    def test_certificates_disabled(self):
+        certificate = Certificate.objects.create(user=self.user, course=self.course, certificate_id='CERT-1')
+        self.assertEqual(self.request('post', f'/api/certificates/{certificate.id}/download/').status_code, 200)
+        self.configure('ENABLE_CERTIFICATES', 'false')
+        self.assertEqual(self.request('post', f'/api/certificates/{certificate.id}/download/').status_code, 403)
+
+    def test_enrollment_cap(self):
+        other = User.objects.create_user(email='other@example.com', full_name='Other', password='Other123!')
+        UserCourseProgress.objects.create(user=other, course=self.course)
+        self.configure('MAX_STUDENTS_PER_COURSE', '1', data_type='integer')
+
+        response = self.request('post', f'/api/courses/{self.course.id}/enroll/')
+
+        self.assertEqual(response.status_code, 409)
+        self.configure('MAX_STUDENTS_PER_COURSE', '0', data_type='integer')
+        self.assertEqual(self.request('post', f'/api/courses/{self.course.id}/enroll/').status_code, 201)
+
+
+class CachedQueryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        query_cache.reset_stats()
+
+    def test_hits_after_first_compute_until_invalidated(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return None  # None results are cached too
+
+        for _ in range(3):
+            self.assertIsNone(query_cache.cached_query('things', ('a',), compute))
+        query_cache.invalidate('things')
+        query_cache.cached_query('things', ('a',), compute)
+
+        self.assertEqual(len(calls), 2)
+        stats = query_cache.stats()['things']
+        self.assertEqual((stats['hits'], stats['misses'], stats['computes']), (2, 2, 2))
+        self.assertEqual(stats['hit_rate'], 0.5)
+
+    def test_concurrent_misses_compute_once(self):
+        calls = []
+        results = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return 'value'
+
+        threads = [
+            threading.Thread(target=lambda: results.append(query_cache.cached_query('slow', (), compute)))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ['value'] * 8)
+        self.assertEqual(query_cache.stats()['slow']['coalesced'], 7)
+
+    def test_ttls_are_jittered(self):
+        with self.settings(CACHE_TTL_JITTER=0.1):
+            ttls = {query_cache.jittered(100) for _ in range(50)}
+        self.assertGreater(len(ttls), 1)
+        self.assertTrue(all(90 <= ttl <= 110 for ttl in ttls))
+
+    def test_catalog_follows_course_writes(self):
+        from adminapp.bulk import BulkOperation, update_rows
+
+        user = User.objects.create_user(email='learner@example.com', full_name='Learner', password='Learner123!')
+        token = UserSession.create_session(user).token
+        get = lambda url: self.client.get(url, HTTP_AUTHORIZATION=f'Bearer {token}')
+        course = Course.objects.create(title='First', description='Description', category='ml',
+                                       difficulty='beginner', instructor='Instructor')
+        self.assertEqual([row['title'] for row in get('/api/courses/').json()], ['First'])
+        with self.assertNumQueries(2):  # Authentication only
+            self.assertEqual([row['title'] for row in get('/api/courses/').json()], ['First'])
+
+        course.title = 'Renamed'
+        course.save()  # Signal
+        self.assertEqual([row['title'] for row in get('/api/courses/').json()], ['Renamed'])
+
+        BulkOperation(Course, update_rows(Course, is_active=False)).run([course.id])  # No signals
+        self.assertEqual(get('/api/courses/').json(), [])
+        self.assertEqual(get(f'/api/courses/{course.id}/').status_code, 404)
+
+
+class ResponseCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='learner@example.com', full_name='Learner', password='Learner123!')
+        cls.token = UserSession.create_session(cls.user).token
+        cls.courses = [
+            Course.objects.create(title=title, description='Description', category='ml',
+                                  difficulty='beginner', instructor='Instructor')
+            for title in ('First', 'Second')
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def get(self, url, token=None, **headers):
+        return self.client.get(url, HTTP_AUTHORIZATION=f'Bearer {token or self.token}', **headers)
+
+    def test_conditional_requests(self):
+        response = self.get('/api/courses/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response['Cache-Control'], 'private, no-cache')
+
+        not_modified = self.get('/api/courses/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual((not_modified.status_code, not_modified.content), (304, b''))
+        self.assertEqual(not_modified['X-Cache'], 'HIT')
+        self.assertEqual(self.get('/api/courses/', HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304)
+        self.assertEqual(self.get('/api/courses/', HTTP_IF_NONE_MATCH='"other"').status_code, 200)
+        self.assertEqual(self.client.get('/api/courses/').status_code, 403)  # Authentication still runs
+
+    def test_stale_entry_is_served_while_refreshed(self):
+        self.get('/api/courses/')
+        Course.objects.filter(pk=self.courses[0].pk).update(title='Renamed')  # No signal
+        later = time.time() + CATALOG_CACHE_TTL + 1
+
+        with mock.patch('base.response_cache.time.time', return_value=later):
+            stale = self.get('/api/courses/')
+            fresh = self.get('/api/courses/')
+
+        self.assertEqual(stale['X-Cache'], 'STALE')
+        self.assertNotIn('Renamed', [course['title'] for course in stale.json()])
+        self.assertEqual(fresh['X-Cache'], 'HIT')
+        self.assertIn('Renamed', [course['title'] for course in fresh.json()])
+        self.assertNotEqual(fresh['ETag'], stale['ETag'])
+
+    def test_background_refresh_rebuilds_the_request(self):
+        from django.http import HttpRequest
+        from base.views import COMMUNITY_CACHE_TTL
+
+        event = CommunityEvent.objects.create(title='Event', description='Event', event_type='workshop',
+                                              start_date=timezone.now() + timedelta(days=1), host=self.user)
+        self.get('/api/community/events/')
+        EventRegistration.objects.bulk_create([EventRegistration(event=event, user=self.user)])  # No signals
+        CommunityEvent.objects.update(title='Renamed')
+        later = time.time() + COMMUNITY_CACHE_TTL + 1
+
+        executor = mock.Mock()
+        with self.settings(RESPONSE_CACHE_REFRESH_SYNC=False), \
+                mock.patch('base.response_cache._get_executor', return_value=executor), \
+                mock.patch('base.response_cache.time.time', return_value=later):
+            self.assertEqual(self.get('/api/community/events/')['X-Cache'], 'STALE')
+        function, *args = executor.submit.call_args.args
+        self.assertFalse([arg for arg in args if isinstance(arg, HttpRequest) or hasattr(arg, '_request')])
+
+        function(*args)
+        body = self.get('/api/community/events/').json()
+        self.assertEqual((body[0]['title'], body[0]['is_registered']), ('Renamed', True))
+
+    def test_course_writes_invalidate_only_that_course(self):
+        first, second = self.courses
+        for course in self.courses:
+            self.get(f'/api/courses/{course.id}/')
+
+        CourseModule.objects.create(course=first, title='Module', description='Module', order=1)
+
+        self.assertEqual(self.get(f'/api/courses/{first.id}/')['X-Cache'], 'MISS')
+        self.assertEqual(self.get(f'/api/courses/{second.id}/')['X-Cache'], 'HIT')
+        self.assertEqual(self.get('/api/courses/')['X-Cache'], 'MISS')
+        self.assertEqual(self.get('/api/courses/')['X-Cache'], 'HIT')
+        self.assertEqual(self.get(f'/api/courses/{first.id}/').json()['modules'][0]['title'], 'Module')
+
+    def test_events_vary_on_user(self):
+        other = User.objects.create_user(email='other@example.com', full_name='Other', password='Other123!')
+        other_token = UserSession.create_session(other).token
+        event = CommunityEvent.objects.create(title='Event', description='Event', event_type='workshop',
+                                              start_date=timezone.now() + timedelta(days=1), host=other)
+        EventRegistration.objects.create(event=event, user=other)
+
+        self.assertFalse(self.get('/api/community/events/').json()[0]['is_registered'])
+        response = self.get('/api/community/events/', other_token)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertTrue(response.json()[0]['is_registered'])
+
+
+class ConditionalETagTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='learner@example.com', full_name='Learner', password='Learner123!')
+        cls.token = UserSession.create_session(cls.user).token
+        cls.course = Course.objects.create(title='Course', description='Description', category='ml',
+                                           difficulty='beginner', instructor='Instructor')
+        cls.module = CourseModule.objects.create(course=cls.course, title='Module', description='Module', order=1)
+        UserCourseProgress.objects.create(user=cls.user, course=cls.course, total_modules_count=1)
+
+    def setUp(self):
+        cache.clear()
+        system_config.invalidate()
+        self.addCleanup(system_config.invalidate)
+
+    def request(self, method, url, token=None, **headers):
+        return getattr(self.client, method)(url, HTTP_AUTHORIZATION=f'Bearer {token or self.token}', **headers)
+
+    def test_unchanged_progress_is_not_modified_without_running_the_view(self):
+        response = self.request('get', '/api/dashboard/courses/')
+        etag = response['ETag']
+        self.assertTrue(etag.startswith('W/"'))
+        self.assertEqual(response['Cache-Control'], 'private, no-cache')
+
+        with self.settings(CONFIG_POLL_INTERVAL=60), self.assertNumQueries(2):  # Authentication only
+            not_modified = self.request('get', '/api/dashboard/courses/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((not_modified.status_code, not_modified.content), (304, b''))
+        self.assertEqual(not_modified['ETag'], etag)
+        # Strong form of the same validator, and other endpoints have their own
+        self.assertEqual(self.request('get', '/api/dashboard/courses/',
+                                      HTTP_IF_NONE_MATCH=etag.removeprefix('W/')).status_code, 304)
+        self.assertEqual(self.request('get', '/api/dashboard/certificates/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_progress_writes_change_only_that_learners_etags(self):
+        other = User.objects.create_user(email='other@example.com', full_name='Other', password='Other123!')
+        other_token = UserSession.create_session(other).token
+        etag = self.request('get', '/api/modules/user-modules/')['ETag']
+        other_etag = self.request('get', '/api/modules/user-modules/', other_token)['ETag']
+
+        self.request('post', f'/api/modules/{self.module.id}/complete/')
+
+        response = self.request('get', '/api/modules/user-modules/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(self.request('get', '/api/modules/user-modules/', other_token,
+                                      HTTP_IF_NONE_MATCH=other_etag).status_code, 304)
+
+    def test_middleware_is_unused_without_a_shared_cache(self):
+        from django.core.exceptions import MiddlewareNotUsed
+        from base.middleware import ConditionalETagMiddleware
+
+        with self.settings(CONDITIONAL_ETAGS=False), self.assertRaises(MiddlewareNotUsed):
+            ConditionalETagMiddleware(lambda request: None)
+
+    def test_awarded_achievements_invalidate_the_learners_progress(self):
+        from base.views import check_and_award_achievements
+
+        Achievement.objects.create(title='Starter', description='Starter', criteria_type='modules_completed',
+                                   criteria_threshold=0)
+        with mock.patch('base.views.invalidate') as invalidate, self.captureOnCommitCallbacks(execute=True):
+            check_and_award_achievements(self.user)
+        self.assertTrue(UserAchievement.objects.filter(user=self.user).exists())
+        self.assertEqual([call.args for call in invalidate.call_args_list], [(f'progress:{self.user.pk}',)] * 2)
+
+    def test_config_changes_and_missing_credentials_are_never_not_modified(self):
+        etag = self.request('get', '/api/ai-labs/')['ETag']
+        SystemConfig.objects.update_or_create(key='ENABLE_AI_LABS', defaults={
+            'value': 'false', 'description': 'Labs', 'data_type': 'boolean',
+        })
+        bump_generation()
 
-# Create your tests here.
+        self.assertEqual(self.request('get', '/api/ai-labs/', HTTP_IF_NONE_MATCH=etag).status_code, 403)
+        self.assertEqual(self.client.get('/api/dashboard/courses/', HTTP_IF_NONE_MATCH='*').status_code, 403)
@@ -5,6 +5,7 @@ urlpatterns = [
     # Authentication endpoints
     path('auth/login/', views.login, name='login'),
     path('auth/signup/', views.signup, name='signup'),
+    path('auth/accept-invite/', views.accept_invite, name='accept-invite'),
     path('auth/logout/', views.logout, name='logout'),
     path('auth/profile/', views.profile, name='profile'),
     path('auth/change-password/', views.change_password, name='change-password'),
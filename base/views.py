@@ -1,12 +1,25 @@
+import logging
+
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
-from .models import User, UserSession
+from .models import User, UserSession, UserInvite
 from .serializers import *
-from django.db.models import Sum
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef, Sum
 from django.http import HttpResponse
 from datetime import timedelta
+from adminapp.config import system_config
+from base.cache import invalidate
+from base.etags import conditional_etag
+from base.response_cache import cache_response
+
+logger = logging.getLogger(__name__)
+
+# Response cache TTLs in seconds; model writes invalidate sooner (base.signals)
+CATALOG_CACHE_TTL = 300
+COMMUNITY_CACHE_TTL = 60
 
 # base/views.py
 from django.http import JsonResponse
@@ -60,6 +73,11 @@ def login(request):
 @permission_classes([AllowAny])
 def signup(request):
     """Handle user registration with FormData support"""
+    if not system_config.get_bool('ALLOW_NEW_REGISTRATIONS', True):
+        return Response({
+            'error': 'New registrations are currently closed'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
     # Handle FormData (frontend might be sending this)
     if request.content_type == 'application/x-www-form-urlencoded' or request.content_type.startswith('multipart/form-data'):
         data = {
@@ -71,7 +89,7 @@ def signup(request):
         # Assume JSON
         data = request.data
     
-    print("Processing signup with data:", data)
+    logger.debug('Processing signup', extra={'fields': sorted(data.keys())})
     
     # Validate required fields
     if not data.get('full_name') or not data.get('email') or not data.get('password'):
@@ -95,6 +113,49 @@ def signup(request):
     
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def accept_invite(request):
+    """Set the password of an imported account from its invite token and sign in"""
+    serializer = AcceptInviteSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    token_hash = UserInvite.hash_token(serializer.validated_data['token'])
+    invite = UserInvite.objects.select_related('user').filter(token_hash=token_hash).first()
+    if invite is None or not invite.is_valid():
+        return Response(
+            {'error': 'Invite is invalid or has expired'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    user = invite.user
+    if not user.is_active or user.pending_delete:
+        return Response(
+            {'error': 'Account is deactivated'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    with transaction.atomic():
+        # Claim the invite first, so two requests with the same token cannot both use it
+        claimed = UserInvite.objects.filter(pk=invite.pk, accepted_at__isnull=True).update(
+            accepted_at=timezone.now()
+        )
+        if not claimed:
+            return Response(
+                {'error': 'Invite is invalid or has expired'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        user.set_password(serializer.validated_data['password'])
+        user.save()
+    
+    session = UserSession.create_session(user)
+    return Response({
+        'user': UserSerializer(user).data,
+        'token': session.token,
+        'message': 'Invite accepted'
+    }, status=status.HTTP_200_OK)
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def logout(request):
@@ -200,6 +261,7 @@ from .serializers import (
     LearningPathSerializer, UserLearningStatsSerializer, DashboardStatsSerializer
 )
 
+@conditional_etag('progress', 'progress:{user}', 'catalog')
 @api_view(['GET'])
 def dashboard_stats(request):
     """Get dashboard statistics and data for the current user"""
@@ -255,6 +317,7 @@ def dashboard_stats(request):
             status=status.HTTP_401_UNAUTHORIZED
         )
 
+@conditional_etag('progress', 'progress:{user}', 'catalog')
 @api_view(['GET'])
 def user_courses(request):
     """Get all courses for the current user"""
@@ -288,6 +351,7 @@ def user_courses(request):
             status=status.HTTP_401_UNAUTHORIZED
         )
 
+@conditional_etag('progress', 'progress:{user}', 'catalog')
 @api_view(['GET'])
 def user_certificates(request):
     """Get all certificates for the current user"""
@@ -322,6 +386,7 @@ def user_certificates(request):
         )
 
 @api_view(['GET'])
+@cache_response(ttl=CATALOG_CACHE_TTL, tags=('catalog',))
 def learning_paths(request):
     """Get all available learning paths"""
     try:
@@ -355,31 +420,42 @@ def enroll_course(request, course_id):
         
         user = session.user
         
-        try:
-            course = Course.objects.get(id=course_id, is_active=True)
-        except Course.DoesNotExist:
-            return Response(
-                {'error': 'Course not found'},
-                status=status.HTTP_404_NOT_FOUND
-            )
-        
-        # Check if user is already enrolled
-        if UserCourseProgress.objects.filter(user=user, course=course).exists():
-            return Response(
-                {'error': 'Already enrolled in this course'},
-                status=status.HTTP_400_BAD_REQUEST
+        # The course row stays locked until the enrollment is written, so
+        # concurrent requests take the cap check one at a time
+        with transaction.atomic():
+            try:
+                course = Course.objects.select_for_update().get(id=course_id, is_active=True)
+            except Course.DoesNotExist:
+                return Response(
+                    {'error': 'Course not found'},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+            
+            # Check if user is already enrolled
+            if UserCourseProgress.objects.filter(user=user, course=course).exists():
+                return Response(
+                    {'error': 'Already enrolled in this course'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            # 0 or less means no cap
+            cap = system_config.get_int('MAX_STUDENTS_PER_COURSE')
+            if cap > 0 and UserCourseProgress.objects.filter(course=course).count() >= cap:
+                return Response(
+                    {'error': 'This course is full'},
+                    status=status.HTTP_409_CONFLICT
+                )
+            
+            # Get total modules count
+            total_modules = CourseModule.objects.filter(course=course).count()
+            
+            # Create user course progress
+            progress = UserCourseProgress.objects.create(
+                user=user,
+                course=course,
+                total_modules_count=total_modules
             )
         
-        # Get total modules count
-        total_modules = CourseModule.objects.filter(course=course).count()
-        
-        # Create user course progress
-        progress = UserCourseProgress.objects.create(
-            user=user,
-            course=course,
-            total_modules_count=total_modules
-        )
-        
         return Response({
             'message': 'Successfully enrolled in course',
             'course': CourseSerializer(course).data,
@@ -393,6 +469,7 @@ def enroll_course(request, course_id):
         )
 
 @api_view(['GET'])
+@cache_response(ttl=CATALOG_CACHE_TTL, tags=('catalog',))
 def courses_list(request):
     """Get all available courses"""
     try:
@@ -406,6 +483,7 @@ def courses_list(request):
         )
 
 @api_view(['GET'])
+@cache_response(ttl=CATALOG_CACHE_TTL, tags=('course', 'course:{course_id}'))
 def course_detail(request, course_id):
     """Get detailed information about a specific course"""
     try:
@@ -579,6 +657,7 @@ def mark_module_complete(request, module_id):
             status=status.HTTP_401_UNAUTHORIZED
         )
 
+@conditional_etag('progress', 'progress:{user}', 'catalog', 'modules')
 @api_view(['GET'])
 def user_modules(request):
     """Get all modules for user's enrolled courses with progress"""
@@ -601,17 +680,16 @@ def user_modules(request):
         user = session.user
         
         # Get user's enrolled courses
-        user_courses = UserCourseProgress.objects.filter(user=user).select_related('course')
+        course_ids = list(UserCourseProgress.objects.filter(user=user).values_list('course_id', flat=True))
         
         # Get all modules for enrolled courses
-        course_ids = [uc.course.id for uc in user_courses]
         modules = CourseModule.objects.filter(course__id__in=course_ids).select_related('course').order_by('course__title', 'order')
         
         # Get module progress
         module_progress = UserModuleProgress.objects.filter(
             user=user,
             module__course__id__in=course_ids
-        ).select_related('module')
+        )
         
         # Serialize modules
         modules_data = []
@@ -637,7 +715,7 @@ def user_modules(request):
         for mp in module_progress:
             module_progress_data.append({
                 'id': str(mp.id),
-                'module': str(mp.module.id),
+                'module': str(mp.module_id),
                 'is_completed': mp.is_completed,
                 'completed_at': mp.completed_at,
                 'time_spent_minutes': mp.time_spent_minutes,
@@ -657,9 +735,16 @@ def user_modules(request):
 
 from rest_framework import status  # Make sure this import exists
 
+@conditional_etag('progress', 'progress:{user}', 'labs')
 @api_view(['GET'])
 def ai_labs_list(request):
     """Get all AI labs with user progress"""
+    if not system_config.get_bool('ENABLE_AI_LABS', True):
+        return Response(
+            {'error': 'AI labs are currently disabled'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+    
     auth_header = request.headers.get('Authorization', '')
     if not auth_header.startswith('Bearer '):
         return Response(
@@ -682,30 +767,22 @@ def ai_labs_list(request):
         labs = AILab.objects.filter(is_active=True).order_by('difficulty', 'created_at')
         
         # Get user progress for labs
-        user_progress = UserAILabProgress.objects.filter(user=user).select_related('lab')
+        user_progress = UserAILabProgress.objects.filter(user=user)
         
         # Create a mapping of lab ID to user progress
-        progress_map = {up.lab.id: up for up in user_progress}
+        progress_map = {up.lab_id: up for up in user_progress}
+        completed = completed_item_ids(user)
         
         labs_data = []
         for lab in labs:
             user_lab_progress = progress_map.get(lab.id)
             
-            # Determine lab status
+            # Determine lab status (a progress row is only created when the lab is started)
             if user_lab_progress:
                 status_value = user_lab_progress.status
             else:
-                # Check prerequisites to determine if lab should be available or locked
-                has_prerequisites = check_prerequisites(user, lab.prerequisites)
+                has_prerequisites = check_prerequisites(user, lab.prerequisites, completed)
                 status_value = 'available' if has_prerequisites else 'locked'
-                
-                # Create user progress record if needed
-                if status_value == 'available':
-                    user_lab_progress = UserAILabProgress.objects.create(
-                        user=user,
-                        lab=lab,
-                        status='available'
-                    )
             
             labs_data.append({
                 'id': str(lab.id),
@@ -731,13 +808,8 @@ def ai_labs_list(request):
             status=status.HTTP_401_UNAUTHORIZED
         )
 
-def check_prerequisites(user, prerequisites):
-    """Check if user has completed all prerequisites"""
-    if not prerequisites:
-        return True
-    
-    # Check if user has completed all prerequisite courses/modules
-    # This is a simplified implementation - you might want to expand this
+def completed_item_ids(user):
+    """Ids (as strings) of the courses and modules the user has completed"""
     completed_courses = UserCourseProgress.objects.filter(
         user=user,
         is_completed=True
@@ -748,16 +820,30 @@ def check_prerequisites(user, prerequisites):
         is_completed=True
     ).values_list('module_id', flat=True)
     
-    for prereq in prerequisites:
-        # Check if prerequisite is a course or module ID
-        if prereq not in completed_courses and prereq not in completed_modules:
-            return False
+    return {str(item_id) for item_id in completed_courses} | {str(item_id) for item_id in completed_modules}
+
+def check_prerequisites(user, prerequisites, completed=None):
+    """
+    Check if user has completed all prerequisites (course or module ids).
+    Pass `completed` from completed_item_ids() when checking many labs.
+    """
+    if not prerequisites:
+        return True
+    
+    if completed is None:
+        completed = completed_item_ids(user)
     
-    return True
+    return all(str(prereq) in completed for prereq in prerequisites)
 
 @api_view(['POST'])
 def start_ai_lab(request, lab_id):
     """Start an AI lab"""
+    if not system_config.get_bool('ENABLE_AI_LABS', True):
+        return Response(
+            {'error': 'AI labs are currently disabled'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+    
     auth_header = request.headers.get('Authorization', '')
     if not auth_header.startswith('Bearer '):
         return Response(
@@ -845,11 +931,8 @@ def progress_stats(request):
         
         user = session.user
         
-        # Get or create learning stats
-        learning_stats, created = UserLearningStats.objects.get_or_create(user=user)
-        
         # Update stats based on current progress
-        update_user_learning_stats(user)
+        learning_stats = update_user_learning_stats(user)
         
         serializer = UserLearningStatsSerializer(learning_stats)
         return Response(serializer.data, status=status.HTTP_200_OK)
@@ -906,6 +989,7 @@ def update_user_learning_stats(user):
     stats.save()
     return stats
 
+@conditional_etag('progress', 'progress:{user}', 'achievements')
 @api_view(['GET'])
 def user_achievements(request):
     """Get user achievements"""
@@ -932,9 +1016,9 @@ def user_achievements(request):
         
         # Get all achievements with user unlock status
         achievements = Achievement.objects.filter(is_active=True).order_by('criteria_threshold')
-        user_achievements = UserAchievement.objects.filter(user=user).select_related('achievement')
-        
-        unlocked_achievement_ids = set(ua.achievement.id for ua in user_achievements)
+        unlocked_at = dict(
+            UserAchievement.objects.filter(user=user).values_list('achievement_id', 'unlocked_at')
+        )
         
         achievements_data = []
         for achievement in achievements:
@@ -943,11 +1027,8 @@ def user_achievements(request):
                 'description': achievement.description,
                 'icon': achievement.icon_name,
                 'color': achievement.color,
-                'unlocked': achievement.id in unlocked_achievement_ids,
-                'unlocked_at': next(
-                    (ua.unlocked_at.isoformat() for ua in user_achievements if ua.achievement.id == achievement.id),
-                    None
-                )
+                'unlocked': achievement.id in unlocked_at,
+                'unlocked_at': unlocked_at[achievement.id].isoformat() if achievement.id in unlocked_at else None,
             })
         
         return Response(achievements_data, status=status.HTTP_200_OK)
@@ -961,12 +1042,12 @@ def user_achievements(request):
 def check_and_award_achievements(user):
     """Check and award achievements based on user progress"""
     stats = update_user_learning_stats(user)
-    achievements = Achievement.objects.filter(is_active=True)
+    achievements = Achievement.objects.filter(is_active=True).exclude(
+        user_achievements__user=user
+    )
     
+    awarded = []
     for achievement in achievements:
-        # Check if user already has this achievement
-        if UserAchievement.objects.filter(user=user, achievement=achievement).exists():
-            continue
         
         # Check achievement criteria
         criteria_met = False
@@ -984,11 +1065,23 @@ def check_and_award_achievements(user):
             criteria_met = stats.total_certificates_earned >= achievement.criteria_threshold
         
         if criteria_met:
-            UserAchievement.objects.create(user=user, achievement=achievement)
+            awarded.append(UserAchievement(user=user, achievement=achievement))
+    
+    if awarded:
+        UserAchievement.objects.bulk_create(awarded, ignore_conflicts=True)
+        # bulk_create sends no signals: bump this learner's progress tag as base.signals would
+        invalidate(f'progress:{user.pk}')
+        transaction.on_commit(lambda: invalidate(f'progress:{user.pk}'))
 
 @api_view(['POST'])
 def download_certificate(request, certificate_id):
     """Download certificate PDF"""
+    if not system_config.get_bool('ENABLE_CERTIFICATES', True):
+        return Response(
+            {'error': 'Certificates are currently disabled'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+    
     auth_header = request.headers.get('Authorization', '')
     if not auth_header.startswith('Bearer '):
         return Response(
@@ -1035,6 +1128,7 @@ def download_certificate(request, certificate_id):
         )
 
 @api_view(['GET'])
+@cache_response(ttl=COMMUNITY_CACHE_TTL, tags=('community',))
 def community_stats(request):
     """Get community statistics"""
     auth_header = request.headers.get('Authorization', '')
@@ -1058,8 +1152,8 @@ def community_stats(request):
         total_discussions = Discussion.objects.count()
         total_workshops = CommunityEvent.objects.filter(event_type='workshop').count()
         upcoming_events = CommunityEvent.objects.filter(
-            event_date__gte=timezone.now().date(),
-            is_active=True
+            start_date__gte=timezone.now(),
+            status='upcoming'
         ).count()
         active_mentors = Mentor.objects.filter(is_available=True).count()
         
@@ -1080,6 +1174,7 @@ def community_stats(request):
         )
 
 @api_view(['GET'])
+@cache_response(ttl=CATALOG_CACHE_TTL, tags=('community',))
 def mentors_list(request):
     """Get list of available mentors"""
     auth_header = request.headers.get('Authorization', '')
@@ -1141,7 +1236,9 @@ def discussions_list(request):
                 status=status.HTTP_401_UNAUTHORIZED
             )
         
-        discussions = Discussion.objects.filter(is_closed=False).select_related('author').order_by('-created_at')[:10]
+        discussions = Discussion.objects.filter(
+            status__in=['active', 'locked']
+        ).select_related('author').order_by('-created_at')[:10]
         
         discussions_data = []
         for discussion in discussions:
@@ -1157,7 +1254,7 @@ def discussions_list(request):
                 'replies_count': discussion.replies_count,
                 'likes_count': discussion.likes_count,
                 'views_count': discussion.views_count,
-                'tags': discussion.tags,
+                'tags': [],  # Discussions have no tags yet
                 'created_at': discussion.created_at.isoformat(),
             })
         
@@ -1170,6 +1267,7 @@ def discussions_list(request):
         )
 
 @api_view(['GET'])
+@cache_response(ttl=COMMUNITY_CACHE_TTL, vary_on_user=True, tags=('community',))
 def events_list(request):
     """Get upcoming events"""
     auth_header = request.headers.get('Authorization', '')
@@ -1189,34 +1287,37 @@ def events_list(request):
             )
         
         user = session.user
-        today = timezone.now().date()
         
+        # Registration count and the user's own registration come from subqueries, not a query per event
         events = CommunityEvent.objects.filter(
-            event_date__gte=today,
-            is_active=True
-        ).select_related('host').order_by('event_date', 'event_time')[:10]
+            start_date__gte=timezone.now(),
+            status='upcoming'
+        ).select_related('host').annotate(
+            attendees_count=Count('registrations'),
+            is_registered=Exists(EventRegistration.objects.filter(event=OuterRef('pk'), user=user)),
+        ).order_by('start_date')[:10]
         
         events_data = []
         for event in events:
-            attendees_count = EventRegistration.objects.filter(event=event).count()
-            is_registered = EventRegistration.objects.filter(event=event, user=user).exists()
+            start = timezone.localtime(event.start_date)
+            duration = (event.end_date - event.start_date) if event.end_date else None
             
             events_data.append({
                 'id': str(event.id),
                 'title': event.title,
                 'description': event.description,
-                'event_date': event.event_date.isoformat(),
-                'event_time': event.event_time.strftime('%H:%M'),
-                'duration_minutes': event.duration_minutes,
+                'event_date': start.date().isoformat(),
+                'event_time': start.strftime('%H:%M'),
+                'duration_minutes': int(duration.total_seconds() // 60) if duration else None,
                 'host': {
                     'id': str(event.host.id),
                     'name': event.host.full_name,
                     'avatar': '',  # Add avatar field to User model
                 },
-                'attendees_count': attendees_count,
+                'attendees_count': event.attendees_count,
                 'max_attendees': event.max_attendees,
                 'event_type': event.event_type,
-                'is_registered': is_registered,
+                'is_registered': event.is_registered,
             })
         
         return Response(events_data, status=status.HTTP_200_OK)
@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 import os
+import sys
+import tempfile
 from pathlib import Path
 from decouple import config
 from datetime import timedelta
@@ -51,6 +53,7 @@ AUTH_USER_MODEL = 'base.User'  # or whatever your custom user model is
 
 
 MIDDLEWARE = [
+    'adminapp.metrics.RequestMetricsMiddleware',  # First: times the whole stack
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -60,7 +63,9 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'base.middleware.JWTAuthenticationMiddleware',
+    'base.middleware.ConditionalETagMiddleware',  # After JWT authentication: ETags are per user
     'adminapp.middleware.AdminAuthenticationMiddleware',  # Your admin middleware
+    'adminapp.profiler.SQLProfilerMiddleware',  # After authentication: the opt-in header is staff-only
 ]
 
 ROOT_URLCONF = 'gdg_ai_lms.urls'
@@ -185,3 +190,111 @@ STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+
+# Logging: JSON lines written off the request thread, tokens redacted.
+# LOG_LEVELS sets per-module levels, e.g. "adminapp.middleware=DEBUG,adminapp.permissions=DEBUG"
+from adminapp.log import build_logging_config
+
+LOGGING = build_logging_config(
+    level=config('LOG_LEVEL', default='INFO'),
+    module_levels=config('LOG_LEVELS', default=''),
+    json_output=config('LOG_JSON', default=True, cast=bool),
+)
+
+# Audit log pipeline (adminapp.audit). Records are batched off the request
+# thread; the test runner writes them inline so assertions see them at once.
+TESTING = len(sys.argv) > 1 and sys.argv[1] == 'test'
+AUDIT_LOG_SYNC = config('AUDIT_LOG_SYNC', default=TESTING, cast=bool)
+AUDIT_LOG_BATCH_SIZE = config('AUDIT_LOG_BATCH_SIZE', default=200, cast=int)
+AUDIT_LOG_FLUSH_INTERVAL = config('AUDIT_LOG_FLUSH_INTERVAL', default=1.0, cast=float)
+AUDIT_LOG_SPOOL_PATH = config('AUDIT_LOG_SPOOL_PATH', default=str(BASE_DIR / 'audit_spool.jsonl'))
+AUDIT_LOG_RETENTION_DAYS = config('AUDIT_LOG_RETENTION_DAYS', default=365, cast=int)
+AUDIT_LOG_ARCHIVE_DIR = config('AUDIT_LOG_ARCHIVE_DIR', default=str(BASE_DIR / 'audit_archive'))
+
+# Admin bulk actions (adminapp.bulk): selections larger than this run as a
+# background AdminJob; the test runner executes jobs inline.
+BULK_ASYNC_THRESHOLD = config('BULK_ASYNC_THRESHOLD', default=5000, cast=int)
+ADMIN_JOBS_SYNC = config('ADMIN_JOBS_SYNC', default=TESTING, cast=bool)
+# Running jobs refresh a heartbeat this often; one that is this old (or whose
+# process is gone) is marked failed when the job is read.
+ADMIN_JOB_HEARTBEAT_INTERVAL = config('ADMIN_JOB_HEARTBEAT_INTERVAL', default=30, cast=int)
+ADMIN_JOB_ORPHAN_TIMEOUT = config('ADMIN_JOB_ORPHAN_TIMEOUT', default=300, cast=int)
+
+# User import (adminapp.user_import): password hashing runs on at most this
+# many spawned processes, and uploads with passwords larger than
+# USER_IMPORT_ASYNC_BYTES are imported in a background AdminJob.
+USER_IMPORT_WORKERS = config('USER_IMPORT_WORKERS', default=2, cast=int)
+USER_IMPORT_ASYNC_BYTES = config('USER_IMPORT_ASYNC_BYTES', default=64 * 1024, cast=int)
+
+# Health sampler (adminapp.health): samples every HEALTH_SAMPLE_INTERVAL
+# seconds in a background thread and persists one averaged SystemHealth row
+# per HEALTH_PERSIST_EVERY samples.
+HEALTH_SAMPLER_THREAD = config('HEALTH_SAMPLER_THREAD', default=not TESTING, cast=bool)
+HEALTH_SAMPLE_INTERVAL = config('HEALTH_SAMPLE_INTERVAL', default=10.0, cast=float)
+HEALTH_HISTORY_SIZE = config('HEALTH_HISTORY_SIZE', default=360, cast=int)
+HEALTH_PERSIST_EVERY = config('HEALTH_PERSIST_EVERY', default=30, cast=int)
+HEALTH_RETENTION_DAYS = config('HEALTH_RETENTION_DAYS', default=7, cast=int)
+
+# Request metrics (adminapp.metrics): each worker writes its snapshot here so
+# /api/admin/system/metrics covers all of them. Empty = this process only.
+METRICS_DIR = config(
+    'METRICS_DIR', default='' if TESTING else os.path.join(tempfile.gettempdir(), 'gdg_ai_lms_metrics')
+)
+METRICS_FLUSH_INTERVAL = config('METRICS_FLUSH_INTERVAL', default=5.0, cast=float)
+
+# SQL profiler (adminapp.profiler): on for every request when enabled, or for
+# staff requests carrying the SQL_PROFILER_HEADER header. Fingerprints run at
+# least SQL_PROFILER_REPEAT_THRESHOLD times in one request are flagged as N+1.
+SQL_PROFILER_ENABLED = config('SQL_PROFILER_ENABLED', default=False, cast=bool)
+SQL_PROFILER_HEADER = config('SQL_PROFILER_HEADER', default='X-Profile-SQL')
+SQL_PROFILER_REPEAT_THRESHOLD = config('SQL_PROFILER_REPEAT_THRESHOLD', default=5, cast=int)
+SQL_PROFILER_SAMPLES = config('SQL_PROFILER_SAMPLES', default=50, cast=int)
+
+# SystemConfig registry (adminapp.config): each worker keeps a parsed snapshot
+# and checks the config generation counter at most this often (seconds).
+CONFIG_POLL_INTERVAL = config('CONFIG_POLL_INTERVAL', default=2.0, cast=float)
+
+# Cache (base.cache). CACHE_BACKEND is 'locmem' (the default: per process),
+# 'redis' (CACHE_LOCATION = redis:// URL) or 'file' (CACHE_LOCATION =
+# directory). Only Redis shares invalidations, locks and ETag versions between
+# worker processes: run more than one worker with Redis. The file cache's
+# add()/incr() are not atomic, so it is only a persistent per-host store, not
+# a coordination point. Redis needs the redis package (requirements.txt). The
+# test runner always uses locmem.
+CACHE_BACKEND = 'locmem' if TESTING else config('CACHE_BACKEND', default='locmem')
+CACHE_LOCATION = config('CACHE_LOCATION', default='')
+if CACHE_BACKEND == 'redis':
+    try:
+        import redis  # noqa: F401
+    except ImportError:
+        from django.core.exceptions import ImproperlyConfigured
+        raise ImproperlyConfigured("CACHE_BACKEND is 'redis' but the redis package is not installed")
+CACHES = {
+    'default': {
+        'BACKEND': {
+            'redis': 'django.core.cache.backends.redis.RedisCache',
+            'file': 'django.core.cache.backends.filebased.FileBasedCache',
+            'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+        }[CACHE_BACKEND],
+        'LOCATION': CACHE_LOCATION or {
+            'redis': 'redis://127.0.0.1:6379/1',
+            'file': os.path.join(tempfile.gettempdir(), 'gdg_ai_lms_cache'),
+            'locmem': 'gdg-ai-lms',
+        }[CACHE_BACKEND],
+        'KEY_PREFIX': 'lms',
+        'TIMEOUT': 300,
+    }
+}
+CACHE_TTL_JITTER = config('CACHE_TTL_JITTER', default=0.1, cast=float)
+CACHE_LOCK_WAIT = config('CACHE_LOCK_WAIT', default=2.0, cast=float)
+
+# Response cache (base.response_cache): stale entries are refreshed on this
+# many background threads per worker, or inline under the test runner.
+RESPONSE_CACHE_REFRESH_SYNC = config('RESPONSE_CACHE_REFRESH_SYNC', default=TESTING, cast=bool)
+RESPONSE_CACHE_REFRESH_WORKERS = config('RESPONSE_CACHE_REFRESH_WORKERS', default=4, cast=int)
+
+# Conditional ETags (base.etags) are built from cache tag versions that never
+# expire, so with a per-process cache another worker would answer 304 with
+# stale data for good. They are on with Redis and under the test runner (one
+# process); set CONDITIONAL_ETAGS=true to use them with a single worker.
+CONDITIONAL_ETAGS = config('CONDITIONAL_ETAGS', default=CACHE_BACKEND == 'redis' or TESTING, cast=bool)